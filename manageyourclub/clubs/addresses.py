@@ -0,0 +1,243 @@
+# Zentrale Stelle zum Auflösen von Adressen (AddressModel/PlaceModel).
+# Gleiche Adressen werden nur einmal gespeichert und von Vereinen, Benutzern und Mitgliedschaften gemeinsam genutzt.
+# Nicht mehr genutzte Adressen und Orte werden nicht beim Bearbeiten gelöscht,
+# sondern regelmäßig mit "python manage.py collect_orphan_addresses" aufgeräumt (siehe delete_orphans).
+# Doppelte Orte und Adressen aus der Zeit vor unique_together führt "python manage.py merge_duplicate_addresses"
+# zusammen (siehe merge_duplicates), das muss vor dem Anlegen der Constraints in einer bestehenden Datenbank laufen.
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+# maximale Anzahl der Adressen, die pro Prozess im Arbeitsspeicher gehalten werden
+ADDRESS_CACHE_SIZE = getattr(settings, 'ADDRESS_CACHE_SIZE', 4096)
+
+# Anzahl der Zeilen, die beim Aufräumen pro Transaktion gelöscht werden
+ORPHAN_BATCH_SIZE = 1000
+
+
+def normalize_address(streetAddress, houseNumber, postcode, village):
+    """
+    Gibt das normalisierte Tupel (streetAddress, houseNumber, postcode, village) zurück.
+    Leerzeichen am Anfang und Ende werden entfernt, mehrere Leerzeichen zusammengefasst
+    und die Postleitzahl wird als Zahl gespeichert.
+    """
+    return (
+        ' '.join(str(streetAddress).split()),
+        ' '.join(str(houseNumber).split()),
+        int(postcode),
+        ' '.join(str(village).split()),
+    )
+
+
+class AddressInterner:
+    """
+    Löst Adressen-Tupel zu AddressModel-Objekten auf und legt fehlende Orte und Adressen an.
+    Die zuletzt genutzten Adressen werden in einem begrenzten LRU-Zwischenspeicher gehalten,
+    sodass eine bereits bekannte Adresse ohne Datenbankabfrage aufgelöst wird.
+    Wird eine Adresse gelöscht oder geändert, wird sie aus dem Zwischenspeicher entfernt.
+    Neue Einträge werden erst nach dem Commit der laufenden Transaktion übernommen,
+    damit zurückgerollte Adressen (z.B. beim Probelauf eines Imports) nicht im Zwischenspeicher landen.
+    """
+
+    def __init__(self, addressModel, placeModel, maxsize=ADDRESS_CACHE_SIZE):
+        self.addressModel = addressModel
+        self.placeModel = placeModel
+        self.maxsize = maxsize
+        self._entries = OrderedDict() # normalisiertes Tupel -> AddressModel
+        self._keys = {} # primary key der Adresse -> normalisiertes Tupel
+        self._lock = threading.Lock()
+        post_save.connect(self._forget_instance, sender=addressModel, weak=False, dispatch_uid='address_interner_save_%s' % id(self))
+        post_delete.connect(self._forget_instance, sender=addressModel, weak=False, dispatch_uid='address_interner_delete_%s' % id(self))
+
+    def intern(self, streetAddress, houseNumber, postcode, village):
+        "Gibt das AddressModel-Objekt zur übergebenen Adresse zurück und legt es gegebenenfalls an."
+        key = normalize_address(streetAddress, houseNumber, postcode, village)
+        address = self._get(key)
+        if address is None:
+            place = self.placeModel.objects.get_or_create(postcode=key[2], village=key[3])[0]
+            address = self.addressModel.objects.get_or_create(streetAddress=key[0], houseNumber=key[1], postcode=place)[0]
+            self._remember({key: address})
+        return address
+
+    def intern_many(self, addresses):
+        """
+        Wie intern, aber für viele Adressen gleichzeitig.
+        addresses ist eine Sammlung von Tupeln (streetAddress, houseNumber, postcode, village).
+        Adressen, die nicht im Zwischenspeicher liegen, werden mit wenigen Abfragen gesucht
+        und fehlende Orte und Adressen mit bulk_create angelegt.
+        Gibt ein dict zurück, das jedem übergebenen Tupel sein AddressModel-Objekt zuordnet.
+        """
+        keys = {address: normalize_address(*address) for address in set(addresses)}
+        found = {}
+        for key in set(keys.values()):
+            address = self._get(key)
+            if address is not None:
+                found[key] = address
+
+        missing = set(keys.values()) - found.keys()
+        if missing:
+            placeKeys = {(postcode, village) for _, _, postcode, village in missing}
+            places = self._find_places(placeKeys)
+            if placeKeys - places.keys():
+                self.placeModel.objects.bulk_create(
+                    (self.placeModel(postcode=pc, village=v) for pc, v in placeKeys - places.keys()),
+                    ignore_conflicts=True,
+                )
+                places = self._find_places(placeKeys)
+
+            addressKeys = {(street, number, places[(postcode, village)]) for street, number, postcode, village in missing}
+            rows = self._find_addresses(addressKeys)
+            if addressKeys - rows.keys():
+                self.addressModel.objects.bulk_create(
+                    (self.addressModel(streetAddress=street, houseNumber=number, postcode=place)
+                        for street, number, place in addressKeys - rows.keys()),
+                    ignore_conflicts=True,
+                )
+                rows = self._find_addresses(addressKeys)
+
+            new = {key: rows[(key[0], key[1], places[(key[2], key[3])])] for key in missing}
+            self._remember(new)
+            found.update(new)
+
+        return {address: found[key] for address, key in keys.items()}
+
+    def save_with_address(self, save, streetAddress, houseNumber, postcode, village):
+        """
+        Löst die Adresse auf und ruft save(address) in einer Transaktion auf.
+        Die Adresse wird vorher in der Transaktion gesperrt (select_for_update). Das prüft, dass eine zwischengespeicherte
+        Adresse nicht inzwischen von einem anderen Prozess (z.B. collect_orphan_addresses) gelöscht wurde, und verhindert,
+        dass sie bis zum Commit gelöscht wird. Auf einen IntegrityError kann man sich dafür nicht verlassen: die
+        Fremdschlüssel werden erst beim Commit geprüft, in einer äußeren Transaktion (ATOMIC_REQUESTS, Import, Tests)
+        also erst nach dieser Methode. Fehlt die Adresse, wird sie aus dem Zwischenspeicher entfernt und neu angelegt.
+        """
+        with transaction.atomic():
+            address = self.intern(streetAddress, houseNumber, postcode, village)
+            if not self.addressModel.objects.select_for_update().filter(pk=address.pk).exists():
+                self.forget(address)
+                address = self.intern(streetAddress, houseNumber, postcode, village)
+            return save(address)
+
+    def forget(self, address):
+        "Entfernt die Adresse aus dem Zwischenspeicher."
+        with self._lock:
+            key = self._keys.pop(address.pk, None)
+            if key is not None:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        "Leert den Zwischenspeicher."
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+
+    def _forget_instance(self, sender, instance, **kwargs):
+        self.forget(instance)
+
+    def _get(self, key):
+        with self._lock:
+            address = self._entries.get(key)
+            if address is not None:
+                self._entries.move_to_end(key)
+            return address
+
+    def _remember(self, entries):
+        "Übernimmt die Einträge (normalisiertes Tupel -> AddressModel) nach dem Commit in den Zwischenspeicher."
+        transaction.on_commit(lambda: self._put(entries))
+
+    def _put(self, entries):
+        with self._lock:
+            for key, address in entries.items():
+                self._entries[key] = address
+                self._entries.move_to_end(key)
+                self._keys[address.pk] = key
+            while len(self._entries) > self.maxsize:
+                _, oldest = self._entries.popitem(last=False)
+                self._keys.pop(oldest.pk, None)
+
+    def _find_places(self, keys):
+        "Sucht die Orte zu den Tupeln (postcode, village) mit einer Abfrage."
+        found = {}
+        for place in self.placeModel.objects.filter(postcode__in={postcode for postcode, _ in keys}):
+            key = (place.postcode, place.village)
+            if key in keys:
+                found[key] = place
+        return found
+
+    def _find_addresses(self, keys):
+        "Sucht die Adressen zu den Tupeln (streetAddress, houseNumber, PlaceModel) mit einer Abfrage."
+        found = {}
+        candidates = self.addressModel.objects.filter(
+            postcode__in={place for _, _, place in keys},
+            streetAddress__in={street for street, _, _ in keys},
+        ).select_related('postcode')
+        for address in candidates:
+            key = (address.streetAddress, address.houseNumber, address.postcode)
+            if key in keys:
+                found[key] = address
+        return found
+
+
+def orphans(model):
+    """
+    Gibt ein QuerySet mit allen Zeilen von model zurück, auf die kein Fremdschlüssel mehr verweist.
+    Die Verweise werden aus den Metadaten des Modells ermittelt (z.B. ClubModel.address, CustomUser.Adresse
+    und Membership.adresse für AddressModel), sodass neue Verweise automatisch berücksichtigt werden.
+    Die Bedingungen werden als LEFT JOIN ... IS NULL (Anti-Join) in einer Abfrage ausgewertet.
+    """
+    conditions = {relation.name + '__isnull': True for relation in model._meta.related_objects}
+    return model.objects.filter(**conditions)
+
+
+def merge_duplicates(model, fields, normalize, columns, key=None):
+    """
+    Führt Zeilen von model zusammen, die nach normalize(Werte von fields) gleich sind, z.B. Orte, die sich nur
+    durch Leerzeichen unterscheiden. Mit key kann aus dem normalisierten Tupel ein anderer Vergleichswert gebildet werden
+    (z.B. ohne Groß- und Kleinschreibung). Behalten wird jeweils die Zeile mit dem kleinsten primary key, alle
+    Fremdschlüssel auf die anderen Zeilen werden auf sie umgebogen, bevor die anderen gelöscht werden. Danach erhalten
+    die Spalten columns der behaltenen Zeile ihre normalisierten Werte (die ersten len(columns) Werte des Tupels).
+    Jede Gruppe wird in einer eigenen Transaktion geändert. Gibt die Anzahl der entfernten Zeilen zurück.
+    """
+    groups = OrderedDict()
+    for row in model.objects.order_by('pk').values_list('pk', *fields).iterator():
+        normalized = normalize(row[1:])
+        groups.setdefault(normalized if key is None else key(normalized), []).append((row, normalized))
+
+    relations = [relation for relation in model._meta.related_objects if relation.one_to_many]
+    merged = 0
+    for rows in groups.values():
+        (first, normalized), duplicates = rows[0], [row[0] for row, _ in rows[1:]]
+        keep = first[0]
+        values = dict(zip(columns, normalized))
+        if not duplicates and first[1:len(columns) + 1] == normalized[:len(columns)]:
+            continue
+        with transaction.atomic():
+            for relation in relations:
+                relation.related_model._base_manager.filter(
+                    **{relation.field.name + '__in': duplicates}
+                ).update(**{relation.field.name: keep})
+            model.objects.filter(pk__in=duplicates).delete()
+            model.objects.filter(pk=keep).update(**values)
+        merged += len(duplicates)
+    return merged
+
+
+def delete_orphans(model, batch_size=ORPHAN_BATCH_SIZE):
+    """
+    Löscht alle nicht mehr referenzierten Zeilen von model in Blöcken von batch_size Zeilen.
+    Jeder Block wird in einer eigenen Transaktion gelöscht. Da die Bedingung beim Löschen erneut geprüft wird,
+    bleiben Zeilen erhalten, die zwischen Suchen und Löschen wieder verwendet wurden.
+    Gibt die Anzahl der gelöschten Zeilen zurück.
+    """
+    deleted = 0
+    while True:
+        pks = list(orphans(model).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            count = orphans(model).filter(pk__in=pks).delete()[1].get(model._meta.label, 0)
+        deleted += count
+        if len(pks) < batch_size or not count:
+            return deleted
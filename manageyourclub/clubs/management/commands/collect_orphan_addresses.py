@@ -0,0 +1,27 @@
+# Löscht Adressen und Orte, die von keinem Verein, Benutzer oder Mitglied mehr genutzt werden.
+# Sollte regelmäßig (z.B. nächtlich per cron) ausgeführt werden:
+#   python manage.py collect_orphan_addresses
+import time
+
+from django.core.management.base import BaseCommand
+
+from clubs.addresses import ORPHAN_BATCH_SIZE, delete_orphans
+from clubs.models import AddressModel, PlaceModel
+
+
+class Command(BaseCommand):
+    help = 'Löscht nicht mehr genutzte Adressen und Orte.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ORPHAN_BATCH_SIZE,
+                            help='Anzahl der Zeilen, die pro Transaktion gelöscht werden.')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        # zuerst die Adressen, da erst danach die zugehörigen Orte ungenutzt sind
+        addressCount = delete_orphans(AddressModel, options['batch_size'])
+        placeCount = delete_orphans(PlaceModel, options['batch_size'])
+        duration = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            '%d Adressen und %d Orte in %.2f s gelöscht.' % (addressCount, placeCount, duration)
+        ))
@@ -0,0 +1,36 @@
+# Führt doppelte Adressen und Orte zusammen, die vor unique_together angelegt wurden
+# oder sich nur durch Leerzeichen unterscheiden. Muss in einer bestehenden Datenbank
+# vor dem Anlegen der Constraints auf PlaceModel und AddressModel ausgeführt werden:
+#   python manage.py merge_duplicate_addresses
+import time
+
+from django.core.management.base import BaseCommand
+
+from clubs.addresses import merge_duplicates, normalize_address
+from clubs.models import AddressModel, PlaceModel, addresses
+
+
+class Command(BaseCommand):
+    help = 'Führt doppelte Adressen und Orte zusammen.'
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        # zuerst die Adressen (über doppelte Orte hinweg), danach können die doppelten Orte ohne Konflikte zusammengeführt werden
+        addressCount = merge_duplicates(
+            AddressModel,
+            ('streetAddress', 'houseNumber', 'postcode__postcode', 'postcode__village'),
+            lambda values: normalize_address(*values),
+            ('streetAddress', 'houseNumber'),
+        )
+        placeCount = merge_duplicates(
+            PlaceModel,
+            ('postcode', 'village'),
+            lambda values: normalize_address('', '', *values)[2:],
+            ('postcode', 'village'),
+        )
+        # die entfernten Adressen dürfen nicht im Zwischenspeicher bleiben
+        addresses.clear()
+        duration = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            '%d Adressen und %d Orte in %.2f s zusammengeführt.' % (addressCount, placeCount, duration)
+        ))
@@ -1,6 +1,8 @@
 # Author: Tobias
 from django.db import models
+from django.db.models.functions import Lower
 import os
+from clubs.addresses import AddressInterner
 
 # Vorgabe von den Architekten:
 # https://vereinsmanagement.atlassian.net/wiki/spaces/VEREINSMAN/pages/33062915/ERM+f+r+Datenbank+mit+Datentypen 
@@ -11,6 +13,13 @@ class PlaceModel(models.Model):
     postcode = models.IntegerField(verbose_name='Postleitzahl')
     village = models.CharField(max_length=20, verbose_name='Stadt')
 
+    class Meta:
+        # Index für die Präfixsuche im Vereinsverzeichnis ohne Beachtung der Groß-/Kleinschreibung (siehe clubs/views.py)
+        indexes = [models.Index(Lower('village'), name='clubs_place_village_lower')]
+        # verhindert doppelte Orte, wenn zwei Anfragen gleichzeitig denselben Ort anlegen
+        # (bestehende Datenbanken vorher mit "python manage.py merge_duplicate_addresses" bereinigen)
+        unique_together = ('postcode', 'village',)
+
 class AddressModel(models.Model):
     """
     Model für Adressen. Mit einer automatisch generierten ID als primary key. 
@@ -20,21 +29,19 @@ class AddressModel(models.Model):
     houseNumber = models.CharField(max_length=5, verbose_name='Hausnummer')
     postcode = models.ForeignKey(to=PlaceModel, on_delete=models.PROTECT)
 
+    class Meta:
+        # verhindert doppelte Adressen, wenn zwei Anfragen gleichzeitig dieselbe Adresse anlegen
+        # (bestehende Datenbanken vorher mit "python manage.py merge_duplicate_addresses" bereinigen)
+        unique_together = ('streetAddress', 'houseNumber', 'postcode',)
+
     @staticmethod
     def create(streetAddress, houseNumber, postcode, village):
         """
         Erstellt ein Adressen-Objekt. 
         Wenn der entsprechende Ort noch nicht in der Datenbank existiert, wird dieser auch erstellt.
+        Da jede Adresse nur einmal gespeichert wird, wird eine bereits existierende Adresse zurückgegeben.
         """
-        if village:
-            postcode, created = PlaceModel.objects.get_or_create(postcode=postcode, village=village)[0]
-            if created:
-                postcode.save()
-    
-        AddressModel.objects.create(postcode=postcode, streetAddress=streetAddress, houseNumber=houseNumber).save()
-        address = AddressModel.objects.create(postcode=postcode, streetAddress=streetAddress, houseNumber=houseNumber)
-        address.save()
-        return address
+        return addresses.intern(streetAddress, houseNumber, postcode, village)
 
     @staticmethod
     def get_or_create(streetAddress, houseNumber, postcode, village):
@@ -43,17 +50,21 @@ class AddressModel(models.Model):
         Wenn das gesuchte Adressen-Objekt nicht gefunden wird, wird es erstellt.
         Für den Parameter postcode soll eine Postleitzahl übergeben werden. Keine Instanz vom PlaceModel.
         """
-        postcode, created = PlaceModel.objects.get_or_create(postcode=postcode, village=village)
-        if created:
-            postcode.save()
-        address, created = AddressModel.objects.get_or_create(postcode=postcode, streetAddress=streetAddress, houseNumber=houseNumber)
-        if created:
-            address.save()
-        return address
+        return addresses.intern(streetAddress, houseNumber, postcode, village)
 
-    def isUsed(self):
-        "Prüft ob die Adresse genutzt wird, indem geschaut wird ob es eine Verlinkung zu dieser Adresse gibt."
-        return self.clubmodel_set.exists() or self.customuser_set.exists()
+
+class ClubQuerySet(models.QuerySet):
+    """QuerySet für Vereine mit Abfragen, die sich auf die Mitgliedschaften eines Benutzers beziehen."""
+
+    def active_clubs_of(self, user):
+        """
+        Gibt alle Vereine zurück, in denen der übergebene Benutzer aktives Mitglied (memberState 1) ist.
+        Die Vereine werden mit einer einzigen Abfrage (JOIN über Membership) ermittelt,
+        anstatt für jeden Verein einzeln club_has_member aufzurufen.
+        """
+        if not user.is_authenticated:
+            return self.none()
+        return self.filter(membership__member=user, membership__memberState=1).order_by('clubname', 'pk')
 
 class ClubModel(models.Model):
     """
@@ -64,17 +75,25 @@ class ClubModel(models.Model):
     yearOfFoundation = models.CharField(max_length=4)
     address = models.ForeignKey(to=AddressModel, on_delete=models.PROTECT)
 
+    objects = ClubQuerySet.as_manager()
+
+    class Meta:
+        # Indizes für die Keyset-Paginierung und die Präfixsuche im Vereinsverzeichnis (allClubs)
+        indexes = [
+            models.Index(fields=['clubname', 'id']),
+            models.Index(Lower('clubname'), name='clubs_club_clubname_lower'),
+        ]
+
     @staticmethod
     def create(clubname, yearOfFoundation, streetAddress, houseNumber, postcode, village):
         """
         Erstellt ein Vereins-Objekt. 
         Wenn die entsprechende Adresse noch nicht in der Datenbank existiert, wird diese auch erstellt.
         """
-        address = AddressModel.get_or_create(streetAddress, houseNumber, postcode, village)
-            
-        club = ClubModel.objects.create(address=address, clubname=clubname, yearOfFoundation=yearOfFoundation)
-        club.save()
-        return club
+        return addresses.save_with_address(
+            lambda address: ClubModel.objects.create(address=address, clubname=clubname, yearOfFoundation=yearOfFoundation),
+            streetAddress, houseNumber, postcode, village
+        )
 
     @staticmethod
     def get_or_create(clubname, yearOfFoundation, streetAddress, houseNumber, postcode, village):
@@ -93,18 +112,22 @@ class ClubModel(models.Model):
     def edit(self, clubname, yearOfFoundation, streetAddress, houseNumber, postcode, village):
         """
             Überschreibt die Daten des Objektes mit den übergebenen Parametern.
-            Wenn die vorherige Adresse nicht mehr gebraucht wird, wird sie gelöscht.
+            Die vorherige Adresse wird, falls sie nicht mehr gebraucht wird, von collect_orphan_addresses gelöscht.
         """
         self.clubname = clubname
         self.yearOfFoundation = yearOfFoundation
-        oldAdr = self.address
-        self.address = AddressModel.get_or_create(streetAddress, houseNumber, postcode, village)
+        return addresses.save_with_address(self._saveAddress, streetAddress, houseNumber, postcode, village)
+
+    def _saveAddress(self, address):
+        self.address = address
         self.save()
-        if not oldAdr.isUsed():
-            oldAdr.delete()
         return self
 
 
+# Zwischenspeicher und zentrale Stelle zum Anlegen von Adressen, siehe clubs/addresses.py
+addresses = AddressInterner(AddressModel, PlaceModel)
+
+
 class ClubDataModel(models.Model):
     #Autor: Max Rosemeier 
     #Speicherung von Dateien, die Vereine für den Mitgliedsschaftsantragsprozess hochgeladen haben
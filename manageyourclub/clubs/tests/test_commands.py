@@ -0,0 +1,121 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from clubs.models import AddressModel, PlaceModel, addresses
+from members.models import Membership, MemberState
+from clubs.tests.test_views import createTestUser, createTestClub
+
+class TestCollectOrphanAddresses(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        addresses.clear()
+        MemberState.objects.get_or_create(stateID=0, state='Anfrage')
+        self.user = createTestUser()
+        self.club = createTestClub(streetAddress='Vereinsweg', houseNumber='1')
+
+    def tearDown(self):
+        addresses.clear()
+
+    def collect(self, *args):
+        out = StringIO()
+        call_command('collect_orphan_addresses', *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_only_orphans(self):
+        """
+            Testinhalt:
+            Adressen von Vereinen, Benutzern und Mitgliedschaften sowie ihre Orte sollten erhalten bleiben,
+            nicht mehr genutzte Adressen und Orte sollten gelöscht werden.
+        """
+        membership = Membership.addUnregisteredMembershipRequestData(
+            club=self.club, phone='0123', first_name='Vorname', last_name='Nachname', birthday='2000-01-01',
+            gender=self.user.Geschlecht, postcode_id=11111, streetAddress='Mitgliedsweg', houseNumber='7',
+            village='Mitgliedsdorf', iban=None, bank_account_owner=None
+        )
+        orphan = AddressModel.create('Leerstraße', '1', 12345, 'München') # Ort wird noch vom Testnutzer genutzt
+        lonely = AddressModel.create('Leerstraße', '2', 99999, 'Nirgendwo')
+
+        output = self.collect()
+
+        self.assertIn('2 Adressen und 1 Orte', output)
+        remaining = set(AddressModel.objects.values_list('pk', flat=True))
+        self.assertEqual(remaining, {self.user.Adresse.pk, self.club.address.pk, membership.adresse.pk})
+        self.assertFalse(AddressModel.objects.filter(pk__in=[orphan.pk, lonely.pk]).exists())
+        self.assertFalse(PlaceModel.objects.filter(village='Nirgendwo').exists())
+        self.assertTrue(PlaceModel.objects.filter(village='München').exists())
+
+    def test_batches(self):
+        """
+            Testinhalt:
+            Alle nicht mehr genutzten Adressen sollten auch bei kleinen Blöcken gelöscht werden.
+        """
+        for number in range(5):
+            AddressModel.create('Leerstraße', str(number), 99999, 'Nirgendwo')
+
+        self.assertIn('5 Adressen und 1 Orte', self.collect('--batch-size', '2'))
+        self.assertIn('0 Adressen und 0 Orte', self.collect('--batch-size', '2'))
+
+    def test_edit_keeps_old_address(self):
+        """
+            Testinhalt:
+            Beim Bearbeiten eines Vereins sollte die alte Adresse erst vom Aufräum-Befehl gelöscht werden.
+        """
+        oldAddress = self.club.address
+        self.club.edit(self.club.clubname, self.club.yearOfFoundation, 'Neue Straße', '3', 54321, 'Neustadt')
+
+        self.assertTrue(AddressModel.objects.filter(pk=oldAddress.pk).exists())
+        self.collect()
+        self.assertFalse(AddressModel.objects.filter(pk=oldAddress.pk).exists())
+
+
+class TestMergeDuplicateAddresses(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        addresses.clear()
+        self.user = createTestUser()
+        self.club = createTestClub(streetAddress='Vereinsweg', houseNumber='1')
+
+    def tearDown(self):
+        addresses.clear()
+
+    def merge(self):
+        out = StringIO()
+        call_command('merge_duplicate_addresses', stdout=out)
+        return out.getvalue()
+
+    def test_merges_and_repoints(self):
+        """
+            Testinhalt:
+            Orte und Adressen, die sich nur durch Leerzeichen unterscheiden, sollten zusammengeführt werden.
+            Vereine und Benutzer sollten danach auf die behaltene Adresse zeigen, nichts sollte gelöscht werden, was noch genutzt wird.
+        """
+        place = self.club.address.postcode
+        duplicatePlace = PlaceModel.objects.create(postcode=place.postcode, village=' %s ' % place.village)
+        duplicate = AddressModel.objects.create(streetAddress='Vereinsweg ', houseNumber='1', postcode=duplicatePlace)
+        self.user.Adresse = duplicate
+        self.user.save()
+
+        output = self.merge()
+
+        self.assertIn('1 Adressen und 1 Orte', output)
+        self.user.refresh_from_db()
+        self.club.refresh_from_db()
+        self.assertEqual(self.user.Adresse, self.club.address)
+        self.assertFalse(AddressModel.objects.filter(pk=duplicate.pk).exists())
+        self.assertFalse(PlaceModel.objects.filter(pk=duplicatePlace.pk).exists())
+        self.assertEqual(PlaceModel.objects.filter(postcode=place.postcode).count(), 1)
+        self.assertIn('0 Adressen und 0 Orte', self.merge())
+
+    def test_normalizes_single_rows(self):
+        """
+            Testinhalt:
+            Einzelne Orte mit überflüssigen Leerzeichen sollten normalisiert werden, ohne dass Zeilen gelöscht werden.
+        """
+        place = PlaceModel.objects.create(postcode=99999, village='  Neu   Stadt ')
+
+        self.assertIn('0 Orte', self.merge())
+        place.refresh_from_db()
+        self.assertEqual(place.village, 'Neu Stadt')
@@ -1,7 +1,9 @@
+from django.db import transaction
 from django.test import TestCase, Client
 from django.urls import reverse
-from clubs.models import ClubModel, AddressModel
+from clubs.models import ClubModel, AddressModel, PlaceModel, addresses
 from users.models import CustomUser, Gender
+from members.models import Membership, MemberState
 from clubs.tests.test_views import createTestUser, createTestClub, logTestClientIn
 
 class TestModels(TestCase):
@@ -77,4 +79,134 @@ class TestModels(TestCase):
         )
 
         self.assertEqual(self.club.clubname, club1.clubname)
-        self.assertEqual(self.club.yearOfFoundation, club1.yearOfFoundation)        
\ No newline at end of file
+        self.assertEqual(self.club.yearOfFoundation, club1.yearOfFoundation)        
+
+class TestClubQuerySet(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        MemberState.objects.get_or_create(stateID=0, state='Anfrage')
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        self.user = createTestUser()
+
+    def createClubs(self, count, prefix):
+        "Erstellt count Vereine, in denen der Testnutzer aktives Mitglied ist."
+        for i in range(count):
+            Membership.addMember(createTestClub(clubname=prefix + str(i)), self.user)
+
+    def test_active_clubs_of(self):
+        """
+            Testinhalt:
+            Es sollten nur die Vereine zurückgegeben werden, in denen der Nutzer aktives Mitglied ist.
+        """
+        active = createTestClub(clubname='aktiv')
+        requested = createTestClub(clubname='angefragt')
+        createTestClub(clubname='fremd')
+        Membership.addMember(active, self.user)
+        Membership.objects.create(club=requested, member=self.user, memberState_id=0)
+
+        self.assertEqual(list(ClubModel.objects.active_clubs_of(self.user)), [active])
+
+    def test_active_clubs_of_query_count(self):
+        """
+            Testinhalt:
+            Die Anzahl der Abfragen sollte unabhängig von der Anzahl der Vereine konstant bleiben.
+        """
+        self.createClubs(3, 'klein')
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(ClubModel.objects.active_clubs_of(self.user))), 3)
+
+        self.createClubs(30, 'gross')
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(ClubModel.objects.active_clubs_of(self.user))), 33)
+
+class TestAddressInterner(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        addresses.clear()
+
+    def tearDown(self):
+        addresses.clear()
+
+    def test_create_does_not_duplicate(self):
+        """
+            Testinhalt:
+            Gleiche Adressen (auch mit abweichenden Leerzeichen) sollten nur einmal gespeichert werden.
+        """
+        first = AddressModel.create('Hauptstraße', '1', 12345, 'Musterstadt')
+        second = AddressModel.create(' Hauptstraße ', '1', '12345', 'Musterstadt  ')
+
+        self.assertEqual(first, second)
+        self.assertEqual(AddressModel.objects.count(), 1)
+        self.assertEqual(PlaceModel.objects.count(), 1)
+
+    def test_cache_hit_without_queries(self):
+        """
+            Testinhalt:
+            Eine bereits aufgelöste Adresse sollte ohne Datenbankabfrage zurückgegeben werden.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            address = addresses.intern('Hauptstraße', '1', 12345, 'Musterstadt')
+        with self.assertNumQueries(0):
+            self.assertEqual(addresses.intern('Hauptstraße', '1', 12345, 'Musterstadt'), address)
+
+    def test_rolled_back_address_not_cached(self):
+        """
+            Testinhalt:
+            Adressen aus einer zurückgerollten Transaktion sollten nicht im Zwischenspeicher landen.
+        """
+        with transaction.atomic():
+            addresses.intern('Hauptstraße', '1', 12345, 'Musterstadt')
+            transaction.set_rollback(True)
+        self.assertEqual(AddressModel.objects.count(), 0)
+        address = addresses.intern('Hauptstraße', '1', 12345, 'Musterstadt')
+        self.assertTrue(AddressModel.objects.filter(pk=address.pk).exists())
+
+    def test_delete_evicts(self):
+        """
+            Testinhalt:
+            Eine gelöschte Adresse sollte aus dem Zwischenspeicher entfernt und neu angelegt werden.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            address = addresses.intern('Hauptstraße', '1', 12345, 'Musterstadt')
+        address.delete()
+        newAddress = addresses.intern('Hauptstraße', '1', 12345, 'Musterstadt')
+        self.assertTrue(AddressModel.objects.filter(pk=newAddress.pk).exists())
+
+    def test_intern_many(self):
+        """
+            Testinhalt:
+            intern_many sollte jedem Tupel seine Adresse zuordnen und bestehende Adressen wiederverwenden.
+        """
+        existing = AddressModel.create('Hauptstraße', '1', 12345, 'Musterstadt')
+        rows = [
+            ('Hauptstraße', '1', 12345, 'Musterstadt'),
+            ('Hauptstraße ', '1', 12345, 'Musterstadt'),
+            ('Nebenweg', '2a', 12345, 'Musterstadt'),
+            ('Nebenweg', '2a', 54321, 'Anderswo'),
+        ]
+        with self.assertNumQueries(6):
+            result = addresses.intern_many(rows)
+
+        self.assertEqual(result[rows[0]], existing)
+        self.assertEqual(result[rows[1]], existing)
+        self.assertNotEqual(result[rows[2]], result[rows[3]])
+        self.assertEqual(result[rows[3]].postcode.village, 'Anderswo')
+        self.assertEqual(AddressModel.objects.count(), 3)
+        self.assertEqual(PlaceModel.objects.count(), 2)
+
+    def test_save_with_deleted_address(self):
+        """
+            Testinhalt:
+            Wurde eine zwischengespeicherte Adresse von einem anderen Prozess (ohne Signal) gelöscht,
+            sollte save_with_address auch innerhalb einer äußeren Transaktion eine bestehende Adresse übergeben.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            address = addresses.intern('Hauptstraße', '1', 12345, 'Musterstadt')
+        AddressModel.objects.filter(pk=address.pk)._raw_delete(AddressModel.objects.db)
+
+        saved = addresses.save_with_address(lambda newAddress: newAddress, 'Hauptstraße', '1', 12345, 'Musterstadt')
+
+        self.assertNotEqual(saved.pk, address.pk)
+        self.assertTrue(AddressModel.objects.filter(pk=saved.pk).exists())
@@ -1,7 +1,13 @@
+from unittest import skipUnless
+from unittest.mock import patch
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from clubs.models import ClubModel, AddressModel, PlaceModel
+from clubs.views import startsWith
 from users.models import CustomUser, Gender
+from members.models import FUNCTION_ADMINISTRATOR, Membership, MemberFunction, MemberState
 
 def createTestUser(email='testuser@email.de', password='12345'):
     "Erstellt einen Testnutzer."
@@ -84,4 +90,109 @@ class TestViews(TestCase):
     def test_requestMembershipView_GET(self):
         response = self.client.get(self.requestMembershipView_url)
         self.assertEqual(response.status_code, 302) #statuscode 302 bei redirect
-       # self.assertTemplateUsed(response, 'all_clubs')
\ No newline at end of file
+       # self.assertTemplateUsed(response, 'all_clubs')
+
+class TestAllClubs(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        self.client = Client()
+        logTestClientIn(self.client)
+        self.allClubs_url = reverse('allclubs')
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+
+    def test_allClubs_pages(self):
+        """
+            Testinhalt:
+            Die Vereine sollten seitenweise nach Namen sortiert angezeigt werden.
+            Über nextPage sollte die nächste Seite ohne Überschneidungen erreichbar sein.
+        """
+        for i in range(5):
+            createTestClub(clubname='Verein ' + str(i))
+        createTestClub(clubname='Verein 2')
+
+        with patch('clubs.views.CLUBS_PER_PAGE', 4):
+            response = self.client.get(self.allClubs_url)
+            firstPage = [club.clubname for club in response.context['clubs']]
+            self.assertEqual(firstPage, ['Verein 0', 'Verein 1', 'Verein 2', 'Verein 2'])
+
+            response = self.client.get(self.allClubs_url + '?' + response.context['nextPage'])
+            secondPage = [club.clubname for club in response.context['clubs']]
+            self.assertEqual(secondPage, ['Verein 3', 'Verein 4'])
+            self.assertIsNone(response.context['nextPage'])
+
+    def test_allClubs_search(self):
+        """
+            Testinhalt:
+            Es sollten nur Vereine angezeigt werden, deren Name oder Ort mit dem Suchbegriff beginnt.
+        """
+        createTestClub(clubname='Bayern')
+        createTestClub(clubname='Hamburg', village='Hamburg')
+        createTestClub(clubname='Werder', village='Bremen')
+
+        response = self.client.get(self.allClubs_url, {'q': 'b'})
+        self.assertEqual([club.clubname for club in response.context['clubs']], ['Bayern', 'Werder'])
+        response = self.client.get(self.allClubs_url, {'q': 'BAY'})
+        self.assertEqual([club.clubname for club in response.context['clubs']], ['Bayern'])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Der Abfrageplan wird nur für SQLite geprüft.')
+    def test_allClubs_search_uses_index(self):
+        """
+            Testinhalt:
+            Die Suche nach Name und Ort sollte die Indizes auf Lower(clubname) und Lower(village) nutzen.
+        """
+        byName = startsWith(ClubModel.objects.all(), 'clubname', 'b').values('pk')
+        byVillage = startsWith(ClubModel.objects.all(), 'address__postcode__village', 'b').values('pk')
+        plan = ClubModel.objects.filter(pk__in=byName.union(byVillage)).explain()
+        self.assertIn('USING INDEX clubs_club_clubname_lower', plan)
+        self.assertIn('USING INDEX clubs_place_village_lower', plan)
+
+    def test_allClubs_is_member(self):
+        """
+            Testinhalt:
+            Vereine, in denen der Nutzer Mitglied ist, sollten mit is_member markiert werden.
+        """
+        club1 = createTestClub(clubname='Verein 1')
+        createTestClub(clubname='Verein 2')
+        Membership.addMember(club1, self.client.user)
+
+        response = self.client.get(self.allClubs_url)
+        self.assertEqual([club.is_member for club in response.context['clubs']], [True, False])
+
+    def test_allClubs_query_count(self):
+        """
+            Testinhalt:
+            Die Anzahl der Abfragen sollte nicht von der Anzahl der Vereine abhängen.
+        """
+        createTestClub(clubname='Verein')
+        self.client.get(self.allClubs_url) # Navigation zwischenspeichern
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.allClubs_url)
+
+        for i in range(20):
+            createTestClub(clubname='Verein ' + str(i), village='Ort ' + str(i))
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(self.allClubs_url)
+
+        self.assertEqual(len(few), len(many))
+
+class TestAddClubView(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        self.client = Client()
+        logTestClientIn(self.client)
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        self.administrator = MemberFunction.objects.get_or_create(functionID=FUNCTION_ADMINISTRATOR, function='Administrator')[0]
+
+    def test_creator_is_administrator(self):
+        """
+            Testinhalt:
+            Wer einen Verein anlegt, sollte als Administrator Mitglied werden und damit Funktionen vergeben können.
+        """
+        self.client.post(reverse('addclub'), {
+            'clubname': 'Neuer Verein', 'yearOfFoundation': '2000', 'streetAddress': 'Vereinsweg',
+            'houseNumber': '1', 'postcode': 12345, 'village': 'München',
+        })
+        membership = Membership.objects.get(club__clubname='Neuer Verein', member=self.client.user)
+        self.assertEqual(membership.memberFunction, self.administrator)
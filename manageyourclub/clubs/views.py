@@ -1,32 +1,77 @@
 # Author: Tobias
 
+from django.db.models import Exists, OuterRef, Q, Value
+from django.db.models.functions import Lower
 from django.shortcuts import render, redirect
+from django.utils.http import urlencode
 from clubs.forms import AddClubForm
-from clubs.models import ClubModel, AddressModel
-from members.models import club_has_member, Membership, MemberState
+from clubs.models import ClubModel
+from members.models import FUNCTION_ADMINISTRATOR, Membership, MemberFunction, MemberState, member_functions
+
+CLUBS_PER_PAGE = 50
+
+def startsWith(queryset, field, search):
+    """
+    Filtert queryset auf Zeilen, deren field ohne Beachtung der Groß-/Kleinschreibung mit search beginnt.
+    Statt istartswith (LIKE) wird ein Bereich auf Lower(field) abgefragt, damit die Datenbank
+    den Index auf Lower(field) nutzen kann (siehe Meta.indexes in clubs/models.py).
+    Beide Seiten werden von der Datenbank kleingeschrieben, damit sie gleich behandelt werden.
+    """
+    return queryset.annotate(searchLower=Lower(field)).filter(
+        searchLower__gte=Lower(Value(search)),
+        searchLower__lt=Lower(Value(search + '\uffff')),
+    )
+
 
 def allClubs(request):
+    """
+    Vereinsverzeichnis mit Suche und Keyset-Paginierung.
+    Die Seiten werden über (clubname, id) des letzten Vereins der vorherigen Seite fortgesetzt,
+    sodass auch bei vielen Vereinen keine großen OFFSETs abgefragt werden.
+    Mit dem Parameter q werden Vereine gesucht, deren Name oder Ort mit q beginnt.
+    Name und Ort werden als zwei eigene Abfragen über ihren Index gesucht und mit UNION zusammengeführt,
+    da die Datenbank für eine Bedingung mit OR über zwei Tabellen keinen der Indizes nutzen kann.
+    """
     user = request.user
 
     if not user.is_authenticated: 
         return redirect('login')
 
-    #myClubs Liste von Max hinzugefügt um Beziehung zu den Vereinen im Template darzustellen
-    Memberships = Membership.objects.filter(member=user)
-    myClubs = []
-    for membership in Memberships:
-        myClubs.append(membership.club)
+    search = request.GET.get('q', '').strip()
+    afterName = request.GET.get('after_name')
+    afterId = request.GET.get('after_id')
 
+    # is_member ersetzt die myClubs Liste von Max: bereits Mitglied oder Antrag wird geprüft
+    clubs = ClubModel.objects.select_related('address__postcode').annotate(
+        is_member=Exists(Membership.objects.filter(club=OuterRef('pk'), member=user))
+    ).order_by('clubname', 'pk')
 
-    context = {
-        'Memberships':Memberships,
-        'clubs': ClubModel.objects.all(),
-        'myClubs':myClubs,
-    }
+    if search:
+        byName = startsWith(ClubModel.objects.all(), 'clubname', search).values('pk')
+        byVillage = startsWith(ClubModel.objects.all(), 'address__postcode__village', search).values('pk')
+        clubs = clubs.filter(pk__in=byName.union(byVillage))
 
-    if not ClubModel.objects.all().exists():
+    isFirstPage = afterName is None or not (afterId or '').isdigit()
+    if not isFirstPage:
+        clubs = clubs.filter(Q(clubname__gt=afterName) | Q(clubname=afterName, pk__gt=int(afterId)))
+
+    # ein Verein mehr als angezeigt wird abgefragt, um zu wissen ob es eine weitere Seite gibt
+    clubs = list(clubs[:CLUBS_PER_PAGE + 1])
+    nextPage = None
+    if len(clubs) > CLUBS_PER_PAGE:
+        clubs = clubs[:CLUBS_PER_PAGE]
+        nextPage = urlencode({'q': search, 'after_name': clubs[-1].clubname, 'after_id': clubs[-1].pk})
+
+    if not clubs and isFirstPage and not search:
         return redirect('addclub')
 
+    context = {
+        'clubs': clubs,
+        'search': search,
+        'nextPage': nextPage,
+        'isFirstPage': isFirstPage,
+    }
+
     return render(request, 'all_clubs.html', context)
 
 # Tutorial genutzt: https://www.youtube.com/watch?v=F5mRW0jo-U4&t=1358s (2:58:24)
@@ -35,15 +80,9 @@ def clubViewOrAdd(request, club):
         return redirect('addclub')
     
     club = ClubModel.objects.get(pk=club)
-    club_list = filter(
-                lambda c: 
-                    club_has_member(c, request.user), 
-                ClubModel.objects.all()
-            )
     
     context = {
         'club'     : club,
-        'club_list': club_list,
         'to'         : 'myclub',
     }
     return render(request, 'my_club.html', context)
@@ -81,7 +120,13 @@ def addClubView(request):
         form = AddClubForm(request.POST)
         if form.is_valid():
             club = form.create()
-            Membership.addMember(club=club, user=request.user)
+            membership = Membership.addMember(club=club, user=request.user)
+            # wer den Verein anlegt, verwaltet ihn und darf Funktionen vergeben (siehe editMemberView)
+            try:
+                membership.memberFunction = member_functions.get(FUNCTION_ADMINISTRATOR)
+                membership.save()
+            except MemberFunction.DoesNotExist: # Datenbank ohne static/standardValues.sql
+                pass
             return redirect('myclub', club.pk)
     else:        
         form = AddClubForm()
@@ -95,13 +140,8 @@ def addClubView(request):
 def deleteClubView(request, club):
     club = ClubModel.objects.get(pk=club)
     if request.method == 'POST':
-        adr = club.address    
+        # die Adresse des Vereins wird von collect_orphan_addresses aufgeräumt
         club.delete()
-        if not ClubModel.objects.filter(address=adr).exists():
-            pc = adr.postcode
-            adr.delete()
-            if not AddressModel.objects.filter(postcode=pc).exists():
-                pc.delete()
         return redirect('/?Verein_wurde_gelöscht:_'+str(club))
     return redirect('/?Verein_wurde_NICHT_gelöscht:_'+str(club))
 
@@ -0,0 +1,170 @@
+# Lesende JSON-API für Vereine, Mitgliedschaften, Mannschaften und Sportarten (z.B. für die App).
+#   /api/clubs/                     Vereinsverzeichnis
+#   /api/clubs/<club>/              ein Verein
+#   /api/clubs/<club>/members/      Mitglieder des Vereins (nur für aktive Mitglieder)
+#   /api/clubs/<club>/teams/        Mannschaften des Vereins (nur für aktive Mitglieder)
+#   /api/sports/                    Sportarten
+#
+# GET-Parameter der Listen:
+#   fields=id,name   nur diese Felder ausliefern (sparse fieldsets)
+#   limit=50         Anzahl pro Seite (höchstens API_MAX_PAGE_SIZE)
+#   cursor=...       Fortsetzung, steht in "next" der vorherigen Seite
+#
+# Der ETag jeder Antwort setzt sich aus der Version des Vereins bzw. des Verzeichnisses (manageyourclub/versions.py)
+# und den GET-Parametern zusammen, Last-Modified aus dem Zeitpunkt der letzten Änderung. Passt If-None-Match
+# oder If-Modified-Since, antwortet Django (condition) mit 304, ohne die Daten abzufragen. Die Berechtigung
+# wird über die zwischengespeicherte Navigation (manageyourclub/navigation.py) geprüft.
+import hashlib
+
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.urls import path
+from django.views.decorators.http import condition
+
+from manageyourclub.navigation import clubs_of
+from manageyourclub.versions import catalog_key, club_key, last_modified, versions
+
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+
+
+class Resource:
+    """
+    Eine Liste der API. fields ordnet jedem Feld der Antwort das Feld für values() zu, das erste ist der Schlüssel
+    für Reihenfolge und cursor. queryset(club) gibt die Objekte zurück (club ist None bei vereinsübergreifenden Listen).
+    version_key(club) gibt den Versionsschlüssel zurück, members_only beschränkt den Zugriff auf aktive Mitglieder.
+    """
+
+    def __init__(self, fields, queryset, version_key, members_only=False):
+        self.fields = fields
+        self.queryset = queryset
+        self.version_key = version_key
+        self.members_only = members_only
+        self.key = next(iter(fields))
+        self.pk = fields[self.key]
+
+    def options(self, request):
+        "Liest fields, limit und cursor aus den GET-Parametern. Gibt (Optionen, None) oder (None, Fehlermeldung) zurück."
+        fields = [field for field in request.GET.get('fields', '').split(',') if field] or list(self.fields)
+        unknown = [field for field in fields if field not in self.fields]
+        if unknown:
+            return None, 'Unbekannte Felder: %s. Erlaubt: %s.' % (', '.join(unknown), ', '.join(self.fields))
+
+        limit = request.GET.get('limit', '')
+        if limit and not limit.isdigit():
+            return None, 'limit muss eine Zahl sein.'
+        limit = min(max(int(limit), 1), API_MAX_PAGE_SIZE) if limit else API_PAGE_SIZE
+
+        cursor = request.GET.get('cursor', '')
+        if cursor and not cursor.isdigit():
+            return None, 'Ungültiger cursor.'
+        return {'fields': fields, 'limit': limit, 'cursor': int(cursor) if cursor else None}, None
+
+    def etag(self, request, club=None, options=None, detail=False):
+        version = versions([self.version_key(club)])[self.version_key(club)]
+        # die Optionen gehören zum ETag, weil jede Kombination eine andere Antwort liefert
+        variant = hashlib.md5(repr((sorted(options.items()), detail)).encode()).hexdigest()[:12]
+        return '%s-%s' % (version, variant)
+
+    def last_modified(self, request, club=None, options=None, detail=False):
+        return last_modified([self.version_key(club)])
+
+    def rows(self, club, options, detail=False):
+        fields = options['fields']
+        if self.key not in fields:
+            fields = [self.key] + fields # der Schlüssel wird für den cursor gebraucht
+        objects = self.queryset(club).order_by(self.pk)
+        if detail:
+            objects = objects.filter(**{self.pk: club})
+        elif options['cursor'] is not None:
+            objects = objects.filter(**{self.pk + '__gt': options['cursor']})
+        # ein Objekt mehr als ausgeliefert wird abgefragt, um zu wissen ob es eine weitere Seite gibt
+        values = objects.values_list(*(self.fields[field] for field in fields))[:options['limit'] + 1]
+        return [dict(zip(fields, row)) for row in values]
+
+    def view(self, detail=False):
+        "Gibt die View der Liste (bzw. mit detail=True die des einzelnen Vereins) zurück."
+        @condition(etag_func=self.etag, last_modified_func=self.last_modified)
+        def respond(request, club=None, options=None, detail=False):
+            rows = self.rows(club, options, detail)
+            if detail:
+                if not rows:
+                    return JsonResponse({'error': 'Nicht gefunden.'}, status=404)
+                return JsonResponse({field: rows[0][field] for field in options['fields']})
+
+            nextPage = None
+            if len(rows) > options['limit']:
+                rows = rows[:options['limit']]
+                params = request.GET.copy()
+                params['cursor'] = rows[-1][self.key]
+                nextPage = '%s?%s' % (request.path, params.urlencode())
+            results = [{field: row[field] for field in options['fields']} for row in rows]
+            return JsonResponse({'results': results, 'next': nextPage})
+
+        def view(request, club=None):
+            if request.method not in ('GET', 'HEAD'):
+                return JsonResponse({'error': 'Nur GET wird unterstützt.'}, status=405)
+            if not request.user.is_authenticated:
+                return JsonResponse({'error': 'Nicht angemeldet.'}, status=401)
+            if self.members_only and not any(entry['id'] == club for entry in clubs_of(request.user)):
+                return JsonResponse({'error': 'Keine Berechtigung.'}, status=403)
+            options, error = self.options(request)
+            if error:
+                return JsonResponse({'error': error}, status=400)
+            response = respond(request, club=club, options=options, detail=detail)
+            # die App soll jedes Mal nachfragen, dank ETag meistens mit 304
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return view
+
+
+def _clubs(club):
+    from clubs.models import ClubModel
+    return ClubModel.objects.all()
+
+
+def _members(club):
+    from members.models import Membership
+    return Membership.objects.filter(club=club).annotate(
+        display_first_name=Coalesce('member__Vorname', 'first_name'),
+        display_last_name=Coalesce('member__Nachname', 'last_name'),
+    )
+
+
+def _teams(club):
+    from teams.models import TeamModel
+    return TeamModel.objects.filter(clubId=club)
+
+
+def _sports(club):
+    from teams.models import SportModel
+    return SportModel.objects.all()
+
+
+clubs = Resource(
+    {'id': 'pk', 'name': 'clubname', 'founded': 'yearOfFoundation',
+     'postcode': 'address__postcode__postcode', 'village': 'address__postcode__village'},
+    _clubs, lambda club: catalog_key('clubs'),
+)
+# ein einzelner Verein hängt nur von seiner eigenen Version ab, nicht von der des Verzeichnisses
+club = Resource(clubs.fields, _clubs, club_key)
+members = Resource(
+    {'number': 'number', 'first_name': 'display_first_name', 'last_name': 'display_last_name',
+     'email': 'member__email', 'state': 'memberState__state', 'function': 'memberFunction__function',
+     'memberSince': 'memberSince'},
+    _members, club_key, members_only=True,
+)
+teams = Resource(
+    {'id': 'pk', 'name': 'teamName', 'sport_id': 'sportId', 'sport': 'sportId__sportName'},
+    _teams, club_key, members_only=True,
+)
+sports = Resource({'id': 'pk', 'name': 'sportName'}, _sports, lambda club: catalog_key('sports'))
+
+urlpatterns = [
+    path('clubs/', clubs.view(), name='api_clubs'),
+    path('clubs/<int:club>/', club.view(detail=True), name='api_club'),
+    path('clubs/<int:club>/members/', members.view(), name='api_members'),
+    path('clubs/<int:club>/teams/', teams.view(), name='api_teams'),
+    path('sports/', sports.view(), name='api_sports'),
+]
@@ -0,0 +1,27 @@
+"""
+ASGI config for manageyourclub project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Nur unter ASGI (z.B. uvicorn manageyourclub.asgi:application) wartet membershipRequestEventsView
+auf neue Ereignisse, ohne einen Worker-Thread zu belegen. Unter WSGI (wsgi.py, z.B. PythonAnywhere)
+antwortet die View sofort und der Browser fragt nur etwa einmal pro Minute nach.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'manageyourclub.settings')
+
+application = get_asgi_application()
+
+from django.conf import settings
+
+if settings.TEMPLATE_PROFILE == 'production':
+    # alle Vorlagen vor der ersten Anfrage kompilieren, fehlerhafte Vorlagen brechen den Start ab,
+    # siehe manageyourclub/template_loading.py
+    from manageyourclub.template_loading import warm_templates_on_startup
+    warm_templates_on_startup()
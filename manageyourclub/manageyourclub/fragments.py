@@ -0,0 +1,59 @@
+# Template-Fragmente, die an die Version eines Vereins gebunden sind (siehe manageyourclub/versions.py).
+# In settings.TEMPLATES als Bibliothek "fragments" eingetragen:
+#
+#   {% load fragments %}
+#   {% clubcache 'team_list' club.id %} ... {% endclubcache %}
+#   {% clubcache 'member_rows' club.id query memberships.number %} ... {% endclubcache %}
+#
+# Der Inhalt wird einmal gerendert und danach aus dem Cache ausgeliefert, bis sich die Version des Vereins ändert
+# (Mitgliedschaften, Verein, Mannschaften, Sportarten oder Benutzer der Mitglieder) oder FRAGMENT_TIMEOUT abläuft.
+# Ohne gemeinsamen Cache wird FRAGMENT_TIMEOUT gekürzt, siehe LOCAL_CACHE_TIMEOUT in manageyourclub/versions.py.
+# Weitere Argumente nach der id des Vereins unterscheiden Varianten des Fragments (z.B. Filter und Seite).
+# QuerySets, die nur innerhalb des Fragments ausgewertet werden, werden bei einem Treffer gar nicht abgefragt.
+from django import template
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from manageyourclub.versions import cache_timeout, club_version
+
+FRAGMENT_TIMEOUT = 60 * 60
+
+register = template.Library()
+
+
+class ClubCacheNode(template.Node):
+
+    def __init__(self, nodelist, fragment_name, club, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.club = club
+        self.vary_on = vary_on
+
+    def render(self, context):
+        club_id = self.club.resolve(context)
+        vary_on = [club_id, club_version(club_id)] + [var.resolve(context) for var in self.vary_on]
+        key = make_template_fragment_key(self.fragment_name.resolve(context), vary_on)
+        value = cache.get(key)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, cache_timeout(FRAGMENT_TIMEOUT))
+        return value
+
+
+@register.tag('clubcache')
+def do_clubcache(parser, token):
+    """
+    {% clubcache fragment_name club_id [vary_on ...] %} ... {% endclubcache %}
+    Speichert den Inhalt unter der aktuellen Version des Vereins club_id zwischen.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError('%r benötigt mindestens den Namen des Fragments und die id des Vereins.' % bits[0])
+    nodelist = parser.parse(('endclubcache',))
+    parser.delete_first_token()
+    return ClubCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
@@ -0,0 +1,103 @@
+# Zwischenspeicher für statische Nachschlagetabellen (z.B. MemberState, Gender),
+# deren Einträge aus static/standardValues.sql stammen und sich praktisch nie ändern.
+import copy
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save
+
+
+class LookupTableCache:
+    """
+    Hält alle Zeilen einer Nachschlagetabelle im Arbeitsspeicher des Prozesses.
+    Die Tabelle wird beim ersten Zugriff mit einer einzigen Abfrage geladen.
+    Wird eine Zeile gespeichert oder gelöscht (z.B. im Admin-Bereich), wird der Zwischenspeicher verworfen.
+    Signale erreichen nur den eigenen Prozess. Wird ein unbekannter primary key angefragt,
+    wird die Tabelle deshalb einmal neu geladen, bevor DoesNotExist ausgelöst wird.
+    all und get geben Kopien der zwischengespeicherten Objekte zurück, damit Änderungen eines Aufrufers
+    (z.B. state.state = ... ohne save) nicht bei allen anderen Anfragen des Prozesses ankommen.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._rows = None
+        post_save.connect(self.invalidate, sender=model, weak=False, dispatch_uid=self._dispatch_uid('save'))
+        post_delete.connect(self.invalidate, sender=model, weak=False, dispatch_uid=self._dispatch_uid('delete'))
+
+    def _dispatch_uid(self, action):
+        return 'lookup_cache_%s_%s_%s' % (self.model._meta.label_lower, action, id(self))
+
+    def _load(self):
+        rows = {row.pk: row for row in self.model.objects.order_by('pk')}
+        self._rows = rows
+        return rows
+
+    def all(self):
+        "Gibt alle Zeilen der Tabelle sortiert nach primary key zurück."
+        rows = self._rows
+        if rows is None:
+            rows = self._load()
+        return [copy.copy(row) for row in rows.values()]
+
+    def get(self, pk):
+        """
+        Gibt die Zeile mit dem übergebenen primary key zurück.
+        Wie bei Model.objects.get darf der primary key auch als String übergeben werden (z.B. '1' aus einem Formular),
+        und DoesNotExist wird ausgelöst, wenn die Zeile nicht existiert.
+        """
+        try:
+            pk = self.model._meta.pk.to_python(pk)
+        except ValidationError:
+            pk = None
+        rows = self._rows
+        if rows is None or pk not in rows:
+            rows = self._load()
+        try:
+            return copy.copy(rows[pk])
+        except KeyError:
+            raise self.model.DoesNotExist(
+                '%s matching query does not exist.' % self.model._meta.object_name
+            ) from None
+
+    def invalidate(self, *args, **kwargs):
+        "Verwirft den Zwischenspeicher. Wird als Signal-Empfänger für post_save und post_delete genutzt."
+        self._rows = None
+
+
+class CachedModelChoiceIterator(forms.models.ModelChoiceIterator):
+    "Liefert die Auswahlmöglichkeiten aus dem LookupTableCache des Feldes statt aus dem QuerySet."
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.cache.all():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.cache.all()) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.cache.all())
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField für Nachschlagetabellen.
+    Sowohl die Darstellung der Auswahl als auch die Validierung nutzen den übergebenen LookupTableCache,
+    sodass beim Anzeigen und Absenden eines Formulars keine Datenbankabfrage für das Feld nötig ist.
+    """
+    iterator = CachedModelChoiceIterator
+
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(queryset=cache.model.objects.all(), **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.cache.model):
+            return value
+        try:
+            return self.cache.get(self.cache.model._meta.pk.to_python(value))
+        except (ValidationError, self.cache.model.DoesNotExist):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
@@ -0,0 +1,85 @@
+# Zwischenspeicher für die Navigation der eingeloggten Seiten (base loggedin.html, select_club_dropdown.html):
+# Vereine des Benutzers, ausgewählter Verein, offene Beitrittsanfragen und Anzahl der Mannschaften.
+# Der Context Processor "navigation" stellt die Daten als {{ navigation }} bereit.
+# Im eingeschwungenen Zustand kommt die Navigation ohne Datenbankabfrage aus.
+#
+# Jeder Eintrag hängt von einer Version des Benutzers und einer Version je Verein ab, siehe manageyourclub/versions.py.
+# Ohne gemeinsamen Cache wird NAVIGATION_TIMEOUT gekürzt, siehe LOCAL_CACHE_TIMEOUT in manageyourclub/versions.py.
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils.functional import SimpleLazyObject
+
+from manageyourclub.versions import cache_timeout, club_key, user_key, versions
+
+NAVIGATION_TIMEOUT = 24 * 60 * 60
+
+
+def _entry_key(user_id):
+    return 'navigation_entry_%s' % user_id
+
+
+def _compute(user):
+    from members.models import ClubMembershipSummary, Membership
+    from teams.models import TeamModel
+
+    memberships = Membership.objects.filter(member=user, memberState=1).select_related('club').order_by('club__clubname', 'club__pk')
+    clubs = [
+        {'id': membership.club_id, 'clubname': membership.club.clubname, 'membership': membership.number}
+        for membership in memberships
+    ]
+    ids = [club['id'] for club in clubs]
+    if ids:
+        pending = dict(ClubMembershipSummary.objects.filter(club_id__in=ids).values_list('club_id', 'pendingRequests'))
+        teams = dict(TeamModel.objects.filter(clubId__in=ids).values_list('clubId').annotate(count=Count('pk')))
+        for club in clubs:
+            if club['id'] not in pending:
+                pending[club['id']] = ClubMembershipSummary.recount(club['id']).pendingRequests
+            club['pendingRequests'] = pending[club['id']]
+            club['teams'] = teams.get(club['id'], 0)
+    return clubs
+
+
+def clubs_of(user):
+    """
+    Gibt die Vereine zurück, in denen der Benutzer aktives Mitglied ist, als Liste von dicts mit
+    id, clubname, membership (Nummer der Mitgliedschaft), pendingRequests und teams, sortiert nach Vereinsname.
+    """
+    entry = cache.get(_entry_key(user.pk))
+    if entry is not None:
+        keys = [user_key(user.pk)] + [club_key(club['id']) for club in entry['clubs']]
+        if versions(keys) == entry['versions']:
+            return entry['clubs']
+
+    # die Version des Benutzers vor dem Berechnen lesen: ändert sich währenddessen etwas, passt der Eintrag nicht mehr
+    userVersion = versions([user_key(user.pk)])
+    clubs = _compute(user)
+    entryVersions = dict(userVersion, **versions([club_key(club['id']) for club in clubs]))
+    cache.set(_entry_key(user.pk), {'versions': entryVersions, 'clubs': clubs}, cache_timeout(NAVIGATION_TIMEOUT))
+    return clubs
+
+
+class Navigation:
+    "Navigationsdaten einer Anfrage. club ist der Verein aus der URL oder, falls keiner angegeben ist, der erste Verein."
+
+    def __init__(self, user, club_id=None):
+        self.clubs = clubs_of(user)
+        self.club = None
+        for club in self.clubs:
+            if club['id'] == club_id:
+                self.club = club
+                break
+        if self.club is None and club_id is None and self.clubs:
+            self.club = self.clubs[0]
+
+
+def navigation(request):
+    "Context Processor, stellt {{ navigation }} auf allen Seiten eingeloggter Benutzer bereit."
+    if not request.user.is_authenticated:
+        return {}
+
+    def load():
+        match = request.resolver_match
+        club_id = match.kwargs.get('club') if match else None
+        return Navigation(request.user, club_id if isinstance(club_id, int) else None)
+
+    return {'navigation': SimpleLazyObject(load)}
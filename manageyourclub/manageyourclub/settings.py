@@ -78,11 +78,28 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'manageyourclub.navigation.navigation',
             ],
+            'libraries': {
+                'fragments': 'manageyourclub.fragments',
+            },
         },
     },
 ]
 
+# Produktivbetrieb der Vorlagen, siehe manageyourclub/template_loading.py:
+# Mit TEMPLATE_PROFILE = 'production' werden die Vorlagen vom cached loader nur einmal gesucht und kompiliert
+# und beim Start in wsgi.py vorgeladen. Im Entwicklungsbetrieb werden Änderungen an Vorlagen sofort sichtbar.
+TEMPLATE_PROFILE = os.environ.get('TEMPLATE_PROFILE', 'development' if DEBUG else 'production')
+if TEMPLATE_PROFILE == 'production':
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'manageyourclub.wsgi.application'
 
 """
@@ -107,7 +124,48 @@ DATABASES = {
     }
 } 
 
-AUTHENTICATION_BACKENDS = ('django.contrib.auth.backends.ModelBackend',)
+# Zwischenspeicher, u.a. für die Navigation (manageyourclub/navigation.py), auswählbar über CACHE_PROFILE:
+#   local   LocMemCache im Arbeitsspeicher des Prozesses, nur für einen einzelnen Prozess (Entwicklung, Tests)
+#   shared  gemeinsamer Memcached-Server unter CACHE_LOCATION (Paket pymemcache), nötig sobald mehrere Prozesse laufen
+# Nur mit einem gemeinsamen Cache erreichen die Versionen (manageyourclub/versions.py) alle Prozesse.
+CACHE_PROFILES = {
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+}
+CACHE_PROFILE = os.environ.get('CACHE_PROFILE', 'local')
+CACHES = {
+    'default': CACHE_PROFILES[CACHE_PROFILE],
+}
+# Anzahl der Server-Prozesse (z.B. Worker bei PythonAnywhere). Mit mehr als einem Prozess ist ein gemeinsamer
+# Cache Pflicht (Prüfung manageyourclub.E001).
+SERVER_PROCESSES = int(os.environ.get('SERVER_PROCESSES', '1'))
+
+# CachedModelBackend lädt request.user aus dem Cache (users/backends.py). Das ist nur mit einem gemeinsamen Cache
+# sicher, sonst erfährt ein anderer Prozess nichts von einer Passwortänderung (Prüfung manageyourclub.E002).
+if CACHE_PROFILE == 'shared':
+    AUTHENTICATION_BACKENDS = ('users.backends.CachedModelBackend',)
+else:
+    AUTHENTICATION_BACKENDS = ('django.contrib.auth.backends.ModelBackend',)
+
+# Speicherort der Sitzungen, auswählbar über die Umgebungsvariable SESSION_PROFILE:
+#   db             jede Anfrage liest die Sitzung aus der Datenbank (Standard von Django)
+#   cached_db      liest aus dem Cache, schreibt in Cache und Datenbank
+#   cache          nur im Cache, Sitzungen gehen beim Leeren des Caches verloren
+#   signed_cookie  signiert im Cookie des Browsers, ohne Datenbank und Cache
+# Die Abfragen pro Anfrage der einzelnen Varianten misst "python manage.py benchmark_sessions".
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookie': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_PROFILE = os.environ.get('SESSION_PROFILE', 'db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_PROFILE]
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -156,7 +214,10 @@ LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# E-Mails werden in der Outbox gespeichert und von "python manage.py send_outbox --loop" über
+# OUTBOX_EMAIL_BACKEND versendet, siehe notifications/outbox.py
+EMAIL_BACKEND = 'notifications.outbox.OutboxBackend'
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_HOST_USER = "manageyourclub@gmail.com"
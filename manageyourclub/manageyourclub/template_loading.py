@@ -0,0 +1,106 @@
+# Laden der Vorlagen im Produktivbetrieb.
+# Mit TEMPLATE_PROFILE = 'production' (settings.py) nutzt Django den cached loader: jede Vorlage wird nur einmal
+# gesucht und kompiliert und danach aus dem Speicher gerendert. warm_templates() kompiliert beim Start (wsgi.py)
+# alle Vorlagen des Projekts, damit die ersten Anfragen nicht warten müssen und Syntaxfehler sofort auffallen:
+# warm_templates_on_startup protokolliert fehlerhafte Vorlagen und bricht den Start ab.
+#
+# Alle Apps legen ihre Vorlagen ohne Unterordner ab (z.B. popup.html, form.html). Gibt es einen Namen
+# in mehreren Verzeichnissen, wird immer nur die erste gefundene Vorlage genutzt. check_template_collisions
+# meldet das als Warnung bei "python manage.py check" und beim Start des Servers.
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.core.exceptions import ImproperlyConfigured
+from django.template import TemplateSyntaxError, engines
+
+
+logger = logging.getLogger(__name__)
+
+
+def _engine():
+    return engines['django'].engine
+
+
+def _loader_dirs(loaders):
+    for loader in loaders:
+        if hasattr(loader, 'loaders'): # cached loader
+            yield from _loader_dirs(loader.loaders)
+        elif hasattr(loader, 'get_dirs'):
+            yield from loader.get_dirs()
+
+
+def project_template_dirs():
+    "Gibt die Vorlagenverzeichnisse des Projekts (ohne Django und installierte Pakete) in Suchreihenfolge zurück."
+    base = os.path.join(os.path.abspath(settings.BASE_DIR), '')
+    dirs = []
+    for directory in _loader_dirs(_engine().template_loaders):
+        directory = str(directory)
+        if os.path.abspath(directory).startswith(base) and directory not in dirs:
+            dirs.append(directory)
+    return dirs
+
+
+def template_sources(dirs=None):
+    "Gibt für jeden Vorlagennamen die Verzeichnisse zurück, in denen er vorkommt, in Suchreihenfolge."
+    sources = {}
+    for directory in project_template_dirs() if dirs is None else dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                name = os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+                sources.setdefault(name, []).append(directory)
+    return sources
+
+
+def template_collisions(dirs=None):
+    "Gibt die Vorlagennamen zurück, die in mehreren Verzeichnissen vorkommen. Genutzt wird jeweils das erste Verzeichnis."
+    return {name: found for name, found in sorted(template_sources(dirs).items()) if len(found) > 1}
+
+
+@register(Tags.templates)
+def check_template_collisions(app_configs, **kwargs):
+    return [
+        Warning(
+            'Die Vorlage %s gibt es mehrfach, genutzt wird nur %s.' % (name, os.path.join(found[0], name)),
+            hint='Verdeckt: %s. Vorlage umbenennen oder in einen Unterordner der App verschieben.' % ', '.join(
+                os.path.join(directory, name) for directory in found[1:]
+            ),
+            id='manageyourclub.W001',
+        )
+        for name, found in template_collisions().items()
+    ]
+
+
+def warm_templates():
+    """
+    Lädt und kompiliert alle HTML-Vorlagen des Projekts. Mit dem cached loader bleiben sie danach im Speicher.
+    Gibt (Anzahl, Dauer in Sekunden, {Name: Fehler}) zurück.
+    """
+    start = time.monotonic()
+    engine = _engine()
+    count, errors = 0, {}
+    for name in template_sources():
+        if not name.endswith('.html'):
+            continue
+        try:
+            engine.get_template(name)
+            count += 1
+        except TemplateSyntaxError as error:
+            errors[name] = error
+    return count, time.monotonic() - start, errors
+
+
+def warm_templates_on_startup():
+    """
+    Kompiliert beim Start (wsgi.py, asgi.py) alle Vorlagen. Fehlerhafte Vorlagen werden protokolliert
+    und der Start wird mit ImproperlyConfigured abgebrochen, statt erst bei der ersten Anfrage an die Seite zu scheitern.
+    """
+    count, duration, errors = warm_templates()
+    for name, error in errors.items():
+        logger.error('Vorlage %s kann nicht kompiliert werden: %s', name, error)
+    if errors:
+        raise ImproperlyConfigured('Fehlerhafte Vorlagen: %s' % ', '.join(sorted(errors)))
+    logger.info('%d Vorlagen in %.1f ms vorkompiliert.', count, duration * 1000)
+    return count
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from clubs.tests.test_views import createTestClub, createTestUser, logTestClientIn
+from members.models import Membership, MemberState
+from teams.models import SportModel
+from teams.tests.test_views import createTestTeam
+
+
+class TestApi(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        cache.clear()
+        MemberState.objects.get_or_create(stateID=0, state='Anfrage')
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        self.client = Client()
+        logTestClientIn(self.client)
+        self.club = createTestClub(clubname='Die Tester')
+        self.otherClub = createTestClub(clubname='Die Anderen')
+        Membership.addMember(self.club, self.client.user)
+        self.members_url = reverse('api_members', kwargs={'club': self.club.pk})
+
+    def test_members(self):
+        """
+            Testinhalt:
+            Die Mitglieder sollten mit den zusammengeführten Namen ausgeliefert werden,
+            mit fields nur die angefragten Felder.
+        """
+        Membership.objects.create(club=self.club, memberState_id=0, first_name='Ohne', last_name='Konto')
+        results = self.client.get(self.members_url).json()['results']
+        self.assertEqual([(row['first_name'], row['last_name'], row['state']) for row in results],
+                         [('Vorname', 'Nachname', 'aktiv'), ('Ohne', 'Konto', 'Anfrage')])
+        self.assertEqual(results[0]['email'], 'testuser@email.de')
+
+        results = self.client.get(self.members_url, {'fields': 'last_name'}).json()['results']
+        self.assertEqual(results, [{'last_name': 'Nachname'}, {'last_name': 'Konto'}])
+        self.assertEqual(self.client.get(self.members_url, {'fields': 'iban'}).status_code, 400)
+
+    def test_cursor(self):
+        """
+            Testinhalt:
+            Mit limit sollte seitenweise geliefert werden, next setzt nach dem letzten Objekt fort.
+        """
+        for sportName in ('A', 'B', 'C'):
+            SportModel.objects.create(sportName=sportName)
+        page = self.client.get(reverse('api_sports'), {'limit': 2, 'fields': 'name'}).json()
+        self.assertEqual(page['results'], [{'name': 'A'}, {'name': 'B'}])
+        page = self.client.get(page['next']).json()
+        self.assertEqual(page['results'], [{'name': 'C'}])
+        self.assertIsNone(page['next'])
+
+    def test_permissions(self):
+        """
+            Testinhalt:
+            Mitglieder und Mannschaften sollten nur aktive Mitglieder des Vereins abrufen können,
+            das Vereinsverzeichnis alle angemeldeten Benutzer.
+        """
+        self.assertEqual(self.client.get(reverse('api_teams', kwargs={'club': self.otherClub.pk})).status_code, 403)
+        self.assertEqual(self.client.get(reverse('api_club', kwargs={'club': self.otherClub.pk})).json()['name'], 'Die Anderen')
+        self.assertEqual(self.client.post(self.members_url).status_code, 405)
+        self.assertEqual(Client().get(reverse('api_clubs')).status_code, 401)
+
+    def test_not_modified(self):
+        """
+            Testinhalt:
+            Mit passendem If-None-Match sollte 304 ohne Abfrage der Mitglieder zurückgegeben werden.
+            Nach einer Änderung im Verein sollte sich der ETag ändern.
+        """
+        response = self.client.get(self.members_url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.members_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # nur noch Sitzung (SESSION_PROFILE 'db') und request.user (ModelBackend ohne gemeinsamen Cache),
+        # die Berechtigung kommt aus dem Cache
+        self.assertEqual([
+            query for query in queries if 'django_session' not in query['sql'] and 'FROM "users_customuser"' not in query['sql']
+        ], [])
+        # andere Felder, anderer ETag
+        self.assertEqual(self.client.get(self.members_url, {'fields': 'number'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        createTestTeam(self.club)
+        response = self.client.get(self.members_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        """
+            Testinhalt:
+            Das Vereinsverzeichnis sollte bei unverändertem Last-Modified 304 liefern und nach dem Anlegen
+            eines Vereins einen neuen ETag erhalten.
+        """
+        response = self.client.get(reverse('api_clubs'))
+        self.assertEqual(len(response.json()['results']), 2)
+        response = self.client.get(reverse('api_clubs'), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        etag = self.client.get(reverse('api_clubs'))['ETag']
+        createTestClub(clubname='Die Neuen')
+        response = self.client.get(reverse('api_clubs'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.json()['results']), 3)
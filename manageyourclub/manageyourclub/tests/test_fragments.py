@@ -0,0 +1,39 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import engines
+from django.test import SimpleTestCase
+
+from manageyourclub.fragments import FRAGMENT_TIMEOUT
+from manageyourclub.versions import LOCAL_CACHE_TIMEOUT
+
+TEMPLATE = "{% load fragments %}{% clubcache 'liste' club %}{{ value }}{% endclubcache %}"
+
+
+class TestClubCache(SimpleTestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        cache.clear()
+        self.template = engines['django'].from_string(TEMPLATE)
+
+    def test_cached_until_version_changes(self):
+        """
+            Testinhalt:
+            Das Fragment sollte bis zur nächsten Version des Vereins aus dem Cache kommen.
+        """
+        self.assertEqual(self.template.render({'club': 1, 'value': 'alt'}), 'alt')
+        self.assertEqual(self.template.render({'club': 1, 'value': 'neu'}), 'alt')
+        self.assertEqual(self.template.render({'club': 2, 'value': 'neu'}), 'neu')
+
+    def test_timeout(self):
+        """
+            Testinhalt:
+            Ohne gemeinsamen Cache sollte ein Fragment nur LOCAL_CACHE_TIMEOUT Sekunden gelten, mit gemeinsamem FRAGMENT_TIMEOUT.
+        """
+        for shared, timeout in ((False, LOCAL_CACHE_TIMEOUT), (True, FRAGMENT_TIMEOUT)):
+            cache.clear()
+            with mock.patch('manageyourclub.versions.shared_cache', return_value=shared), \
+                    mock.patch('manageyourclub.fragments.cache', wraps=cache) as fragmentCache:
+                self.template.render({'club': 1, 'value': 'Inhalt'})
+            self.assertEqual(fragmentCache.set.call_args[0][2], timeout)
@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.template import TemplateSyntaxError
+from manageyourclub.template_loading import check_template_collisions, template_collisions, warm_templates, warm_templates_on_startup
+
+CACHED_LOADERS = [('django.template.loaders.cached.Loader', [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+])]
+
+class TestTemplateLoading(SimpleTestCase):
+
+    def createTemplates(self, directory, *names):
+        for name in names:
+            path = os.path.join(directory, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as file:
+                file.write(name)
+
+    def test_collisions(self):
+        """
+            Testinhalt:
+            Vorlagen mit gleichem Namen in mehreren Verzeichnissen sollten in Suchreihenfolge gemeldet werden.
+        """
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            self.createTemplates(first, 'popup.html', 'form.html', 'mail/text.html')
+            self.createTemplates(second, 'popup.html', 'liste.html', 'mail/text.html')
+            self.assertEqual(template_collisions([first, second]), {
+                'mail/text.html': [first, second],
+                'popup.html': [first, second],
+            })
+
+    def test_project_has_no_collisions(self):
+        """
+            Testinhalt:
+            Die Vorlagen der Apps sollten sich nicht gegenseitig verdecken.
+        """
+        self.assertEqual(check_template_collisions(None), [])
+
+    def test_warm_templates(self):
+        """
+            Testinhalt:
+            Alle Vorlagen sollten sich kompilieren lassen und danach vom cached loader ohne Dateizugriff geliefert werden.
+        """
+        templates = [dict(engine, OPTIONS=dict(engine['OPTIONS'], loaders=CACHED_LOADERS), APP_DIRS=False)
+                     for engine in settings.TEMPLATES]
+        with override_settings(TEMPLATES=templates):
+            count, _, errors = warm_templates()
+            self.assertEqual(errors, {})
+            self.assertGreater(count, 0)
+            loader = engines['django'].engine.template_loaders[0]
+            self.assertIn('club_members.html', loader.get_template_cache)
+
+    def test_startup_fails_on_syntax_error(self):
+        """
+            Testinhalt:
+            Eine fehlerhafte Vorlage sollte beim Start protokolliert werden und den Start abbrechen.
+        """
+        errors = {'kaputt.html': TemplateSyntaxError('Invalid block tag')}
+        with mock.patch('manageyourclub.template_loading.warm_templates', return_value=(3, 0.01, errors)):
+            with self.assertLogs('manageyourclub.template_loading', 'ERROR') as logs, self.assertRaises(ImproperlyConfigured):
+                warm_templates_on_startup()
+        self.assertIn('kaputt.html', logs.output[0])
+        with mock.patch('manageyourclub.template_loading.warm_templates', return_value=(3, 0.01, {})):
+            self.assertEqual(warm_templates_on_startup(), 3)
@@ -36,6 +36,7 @@ urlpatterns = [
     path('members/', include('members.urls')),
     path('form_builder_example/', include('django_form_builder.urls')),
     path('<int:club>/mebershiprequest/', include('membership_request.urls')),
+    path('api/', include('manageyourclub.api')),
     path('favicon.ico', RedirectView.as_view(url=staticfiles_storage.url('img/favicon.ico'))),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
@@ -0,0 +1,206 @@
+# Versionszähler für zwischengespeicherte Daten eines Benutzers bzw. eines Vereins.
+# Zwischengespeicherte Einträge (Navigation, Template-Fragmente) enthalten die Versionen, von denen sie abhängen.
+# Die Signal-Empfänger unten erhöhen die Versionen, wenn sich Mitgliedschaften, Vereine, Mannschaften, Sportarten
+# oder Benutzer ändern, veraltete Einträge passen dadurch nicht mehr und werden beim nächsten Zugriff neu berechnet.
+# Für Verzeichnisse, die nicht zu einem Verein gehören (alle Vereine, Sportarten), gibt es Katalog-Versionen.
+# Die Felder des Antragsformulars eines Vereins haben eine eigene Version (form_key), damit eine Änderung
+# am Formular nicht alle anderen Einträge des Vereins verwirft.
+# Zu jeder Version wird der Zeitpunkt der letzten Änderung gespeichert (ETag und Last-Modified der JSON-API).
+# Mit dem voreingestellten LocMemCache gelten die Versionen nur im eigenen Prozess. Laufen mehrere Prozesse,
+# muss ein gemeinsamer Cache genutzt werden (CACHE_PROFILE = 'shared' in settings.py), siehe check_shared_cache.
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks import Error, Tags, register
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+
+def user_key(user_id):
+    return 'version_user_%s' % user_id
+
+
+def club_key(club_id):
+    return 'version_club_%s' % club_id
+
+
+def catalog_key(name):
+    return 'version_catalog_%s' % name
+
+
+def form_key(club_id):
+    return 'version_form_%s' % club_id
+
+
+def _modified_key(key):
+    return '%s_modified' % key
+
+
+def shared_cache():
+    "Gibt zurück, ob alle Prozesse denselben Cache nutzen (also nicht LocMemCache oder DummyCache)."
+    backend = settings.CACHES['default']['BACKEND']
+    return not backend.endswith(('.LocMemCache', '.DummyCache'))
+
+
+# Höchstens so viele Sekunden gelten versionierte Einträge ohne gemeinsamen Cache (LocMemCache). Die Versionen
+# erreichen dann nur den eigenen Prozess, andere Prozesse sehen eine Änderung erst nach Ablauf ihrer Einträge.
+# Gilt für alle Zwischenspeicher, die ihre Lebensdauer über cache_timeout bestimmen: Navigation (navigation.py),
+# Template-Fragmente (fragments.py) und kompilierte Antragsformulare (membership_request/compiled.py).
+# Mit mehreren Server-Prozessen meldet check_shared_cache deshalb einen Fehler.
+LOCAL_CACHE_TIMEOUT = 60
+
+
+def cache_timeout(timeout):
+    "Gibt die Lebensdauer für einen versionierten Eintrag zurück: timeout mit gemeinsamem Cache, sonst höchstens LOCAL_CACHE_TIMEOUT."
+    return timeout if shared_cache() else min(timeout, LOCAL_CACHE_TIMEOUT)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    errors = []
+    if getattr(settings, 'SERVER_PROCESSES', 1) > 1 and not shared_cache():
+        errors.append(Error(
+            'Mit %d Server-Prozessen wird ein gemeinsamer Cache benötigt.' % settings.SERVER_PROCESSES,
+            hint="Mit LocMemCache sehen die anderen Prozesse Änderungen erst nach LOCAL_CACHE_TIMEOUT Sekunden. "
+                 "CACHE_PROFILE = 'shared' setzen.",
+            id='manageyourclub.E001',
+        ))
+    if 'users.backends.CachedModelBackend' in settings.AUTHENTICATION_BACKENDS and not shared_cache():
+        errors.append(Error(
+            'CachedModelBackend benötigt einen gemeinsamen Cache.',
+            hint='Mit LocMemCache wirken Passwortänderungen und gesperrte Benutzer nur im eigenen Prozess. '
+                 "CACHE_PROFILE = 'shared' setzen oder django.contrib.auth.backends.ModelBackend verwenden.",
+            id='manageyourclub.E002',
+        ))
+    return errors
+
+
+def _new_version():
+    # eine zeitbasierte Startversion verhindert, dass nach dem Verdrängen einer Version ein alter Eintrag wieder passt
+    return time.time_ns()
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+    cache.set(_modified_key(key), time.time(), None)
+
+
+def _invalidate(key):
+    # sofort, damit die laufende Anfrage die Änderung sieht, und nach dem Commit noch einmal,
+    # damit ein paralleler Zugriff, der vor dem Commit neu berechnet hat, keinen veralteten Eintrag hinterlässt
+    _bump(key)
+    transaction.on_commit(lambda: _bump(key))
+
+
+def invalidate_user(user_id):
+    "Verwirft die zwischengespeicherten Daten des Benutzers."
+    if user_id is not None:
+        _invalidate(user_key(user_id))
+
+
+def invalidate_club(club_id):
+    "Verwirft die zwischengespeicherten Daten des Vereins und die Navigation aller seiner Mitglieder."
+    if club_id is not None:
+        _invalidate(club_key(club_id))
+
+
+def invalidate_catalog(name):
+    "Verwirft die zwischengespeicherten Daten eines vereinsübergreifenden Verzeichnisses (z.B. 'clubs', 'sports')."
+    _invalidate(catalog_key(name))
+
+
+def invalidate_form(club_id):
+    "Verwirft die zwischengespeicherten Formulare des Vereins (Felder des Antragsformulars, siehe membership_request)."
+    if club_id is not None:
+        _invalidate(form_key(club_id))
+
+
+def versions(keys):
+    "Gibt die aktuellen Versionen der übergebenen Schlüssel als dict zurück (eine Cache-Abfrage)."
+    current = cache.get_many(keys)
+    for key in keys:
+        if key not in current:
+            current[key] = _new_version()
+            cache.set(key, current[key], None)
+    return current
+
+
+def club_version(club_id):
+    "Gibt die aktuelle Version des Vereins zurück."
+    key = club_key(club_id)
+    return versions([key])[key]
+
+
+def form_version(club_id):
+    "Gibt die aktuelle Version des Antragsformulars des Vereins zurück."
+    key = form_key(club_id)
+    return versions([key])[key]
+
+
+def last_modified(keys):
+    """
+    Gibt den Zeitpunkt der letzten Änderung der übergebenen Schlüssel als datetime (UTC) zurück.
+    Ist für einen Schlüssel kein Zeitpunkt bekannt, gilt der aktuelle.
+    """
+    modifiedKeys = [_modified_key(key) for key in keys]
+    current = cache.get_many(modifiedKeys)
+    for key in modifiedKeys:
+        if key not in current:
+            current[key] = time.time()
+            cache.set(key, current[key], None)
+    return datetime.fromtimestamp(max(current.values()), timezone.utc)
+
+
+def _membership_changed(sender, instance, **kwargs):
+    invalidate_user(instance.member_id)
+    invalidate_club(instance.club_id)
+
+
+def _club_changed(sender, instance, **kwargs):
+    invalidate_club(instance.pk)
+    invalidate_catalog('clubs')
+
+
+def _team_changed(sender, instance, **kwargs):
+    invalidate_club(instance.clubId_id)
+
+
+def _team_members_changed(sender, instance, action, **kwargs):
+    # team.members.add(...) und membership.teams.add(...) speichern weder Mannschaft noch Mitgliedschaft
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_club(instance.clubId_id if hasattr(instance, 'clubId_id') else instance.club_id)
+
+
+def _sport_changed(sender, instance, **kwargs):
+    invalidate_catalog('sports')
+    # der Name der Sportart erscheint in der Mannschaftsübersicht aller Vereine mit Mannschaften dieser Sportart
+    for club_id in instance.teammodel_set.values_list('clubId', flat=True).distinct():
+        invalidate_club(club_id)
+
+
+def _form_field_changed(sender, instance, **kwargs):
+    invalidate_form(instance.club_id)
+
+
+def _user_changed(sender, instance, **kwargs):
+    # nach dem Zurückrollen einer Transaktion kann ein neuer Benutzer die id eines alten erhalten
+    invalidate_user(instance.pk)
+    # Name und E-Mail-Adresse erscheinen in der Mitgliederübersicht der Vereine
+    if kwargs.get('created') is False:
+        for club_id in instance.membership_set.values_list('club', flat=True).distinct():
+            invalidate_club(club_id)
+
+
+for _name, _signal in (('save', post_save), ('delete', post_delete)):
+    _signal.connect(_membership_changed, sender='members.Membership', dispatch_uid='versions_membership_%s' % _name)
+    _signal.connect(_club_changed, sender='clubs.ClubModel', dispatch_uid='versions_club_%s' % _name)
+    _signal.connect(_team_changed, sender='teams.TeamModel', dispatch_uid='versions_team_%s' % _name)
+    _signal.connect(_user_changed, sender=settings.AUTH_USER_MODEL, dispatch_uid='versions_user_%s' % _name)
+    _signal.connect(_sport_changed, sender='teams.SportModel', dispatch_uid='versions_sport_%s' % _name)
+    _signal.connect(_form_field_changed, sender='membership_request.FieldsListModel', dispatch_uid='versions_form_field_%s' % _name)
+m2m_changed.connect(_team_members_changed, sender='teams.TeamModel_members', dispatch_uid='versions_team_members')
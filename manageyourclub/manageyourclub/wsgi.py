@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'manageyourclub.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings
+
+if settings.TEMPLATE_PROFILE == 'production':
+    # alle Vorlagen vor der ersten Anfrage kompilieren, fehlerhafte Vorlagen brechen den Start ab,
+    # siehe manageyourclub/template_loading.py
+    from manageyourclub.template_loading import warm_templates_on_startup
+    warm_templates_on_startup()
@@ -0,0 +1,157 @@
+# Export der Mitgliederliste eines Vereins (CSV/XLSX), z.B. für die Kassenwarte.
+# Die Mitgliedschaften werden mit QuerySet.iterator in Blöcken von EXPORT_CHUNK_SIZE Zeilen gelesen
+# und direkt weitergegeben, sodass der Speicherbedarf unabhängig von der Größe des Vereins bleibt.
+import csv
+import json
+import re
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+
+from django_form_builder.utils import format_field_name
+from members.models import Membership, member_functions, member_states, payment_methods
+from membership_request.models import FieldsListModel
+from users.models import genders
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Zeichen, mit denen Excel und LibreOffice einen Zellinhalt als Formel auswerten (CSV-Injection)
+FORMULA_PREFIXES = ('=', '@', '\t', '\r')
+# + und - leiten nur eine Formel ein, wenn danach mehr als eine Zahl oder Telefonnummer folgt (z.B. +49 621 123-45)
+SIGN_PREFIXES = ('+', '-')
+PLAIN_NUMBER = re.compile(r'[+-][\d\s()/.,-]*\d[\d\s()/.,-]*')
+
+# Spalten der Mitgliedschaft, die ersten Spalten entsprechen members.imports.IMPORT_COLUMNS
+EXPORT_COLUMNS = (
+    'number', 'email', 'first_name', 'last_name', 'birthday', 'gender', 'phone',
+    'streetAddress', 'houseNumber', 'postcode', 'village', 'iban', 'bank_account_owner',
+    'memberState', 'memberFunction', 'memberSince', 'paymentMethod', 'paymentState',
+)
+
+
+class MembershipExportError(Exception):
+    "Wird ausgelöst, wenn die Mitgliederliste nicht im gewünschten Format erstellt werden kann."
+
+
+class _Echo:
+    "Pseudo-Datei für csv.writer, die die geschriebene Zeile zurückgibt statt sie zu speichern."
+
+    def write(self, value):
+        return value
+
+
+def _lookup(cache, pk):
+    return '' if pk is None else str(cache.get(pk))
+
+
+def _membership_row(membership, customKeys):
+    "Gibt die Werte einer Mitgliedschaft in der Reihenfolge von EXPORT_COLUMNS und customKeys zurück."
+    user = membership.member
+    if user is not None:
+        # registrierte Mitglieder: persönliche Daten stehen am Benutzer
+        email, firstName, lastName, birthday = user.email, user.Vorname, user.Nachname, user.Geburtstag
+        genderId, address = user.Geschlecht_id, user.Adresse
+    else:
+        email, firstName, lastName, birthday = '', membership.first_name, membership.last_name, membership.birthday
+        genderId, address = membership.gender_id, membership.adresse
+
+    row = [
+        membership.number, email, firstName, lastName, birthday, _lookup(genders, genderId), membership.phone,
+        address.streetAddress if address else '', address.houseNumber if address else '',
+        address.postcode.postcode if address else '', address.postcode.village if address else '',
+        membership.iban, membership.bank_account_owner,
+        _lookup(member_states, membership.memberState_id), _lookup(member_functions, membership.memberFunction_id),
+        membership.memberSince, _lookup(payment_methods, membership.paymentMethod_id), membership.paymentState,
+    ]
+
+    answers = {}
+    customData = getattr(membership, 'custommembershipdata', None)
+    if customData is not None:
+        try:
+            answers = json.loads(customData.json)
+        except ValueError: # ältere Anträge wurden nicht immer als gültiges JSON gespeichert
+            answers = {}
+    row.extend(_answer(answers.get(key, '')) for key in customKeys)
+    return ['' if value is None else value for value in row]
+
+
+def _answer(value):
+    "Mehrfachauswahlen werden durch Kommas getrennt, Tabellenfelder (Formset) als JSON ausgegeben."
+    if isinstance(value, list):
+        if all(isinstance(item, str) for item in value):
+            return ', '.join(value)
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _spreadsheet_row(row):
+    """
+    Stellt Texten, die mit einem Zeichen aus FORMULA_PREFIXES beginnen, ein ' voran,
+    damit Eingaben der Mitglieder (z.B. =HYPERLINK(...)) in der Tabellenkalkulation nicht als Formel ausgeführt werden.
+    Texte mit + oder - am Anfang werden nur maskiert, wenn sie keine reine Zahl oder Telefonnummer sind.
+    """
+    return ["'" + value if _is_formula(value) else value for value in row]
+
+
+def _is_formula(value):
+    if not isinstance(value, str):
+        return False
+    if value.startswith(FORMULA_PREFIXES):
+        return True
+    return value.startswith(SIGN_PREFIXES) and PLAIN_NUMBER.fullmatch(value) is None
+
+
+def export_rows(club):
+    """
+    Gibt die Kopfzeile und danach eine Zeile pro Mitgliedschaft des Vereins zurück (Generator).
+    Die Antworten aus dem Antragsformular des Vereins (CustomMembershipData) stehen in zusätzlichen Spalten,
+    eine pro Feld des aktuellen Formulars (FieldsListModel). Antworten auf inzwischen gelöschte Felder entfallen.
+    """
+    fields = list(FieldsListModel.objects.filter(club=club).order_by('ordering').values_list('name', flat=True))
+    customKeys = [format_field_name(name) for name in fields]
+    yield list(EXPORT_COLUMNS) + fields
+
+    memberships = Membership.objects.filter(club=club).select_related(
+        'member__Adresse__postcode', 'adresse__postcode', 'custommembershipdata',
+    ).order_by('number')
+    for membership in memberships.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield _membership_row(membership, customKeys)
+
+
+def _csv_lines(club):
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff' # BOM, damit Excel die Datei als UTF-8 erkennt
+    for row in export_rows(club):
+        yield writer.writerow(_spreadsheet_row(row))
+
+
+def csv_response(club, filename):
+    "Gibt die Mitgliederliste als StreamingHttpResponse im CSV-Format zurück."
+    response = StreamingHttpResponse(_csv_lines(club), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="%s.csv"' % filename
+    return response
+
+
+def xlsx_response(club, filename):
+    """
+    Gibt die Mitgliederliste als XLSX-Datei zurück.
+    openpyxl schreibt im write_only Modus jede Zeile sofort in eine temporäre Datei,
+    die anschließend blockweise mit FileResponse gesendet wird.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise MembershipExportError('Für XLSX-Dateien muss das Paket openpyxl installiert sein.')
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Mitglieder')
+    for row in export_rows(club):
+        sheet.append(_spreadsheet_row(row))
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output, as_attachment=True, filename='%s.xlsx' % filename,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
@@ -1,7 +1,10 @@
 # Author: Tobias
 from venv import create
 from django import forms
-from members.models import Membership, MemberFunction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from members.models import Membership, MemberFunction, member_functions, member_states
+from manageyourclub.lookups import CachedModelChoiceField
 from users.models import CustomUser
 
 # Tutorials genutzt: https://www.tutorialspoint.com/python_data_science/python_date_and_time.htm
@@ -16,8 +19,63 @@ class AddClubMemberForm(forms.Form):
         user = CustomUser.objects.get(email=eMail)
         return Membership.addMember(club, user)
 
+class MemberListFilterForm(forms.Form):
+    """
+    Filter und Sortierung der Mitgliederübersicht (GET-Parameter).
+    Registrierte Mitglieder haben ihren Namen am Benutzer, nicht registrierte an der Mitgliedschaft,
+    deshalb wird nach den zusammengeführten Feldern display_first_name und display_last_name gefiltert und sortiert.
+    """
+    # Sortierschlüssel -> Felder für order_by, pk als letztes Feld für eine eindeutige Reihenfolge
+    SORTS = {
+        'name': ('display_last_name', 'display_first_name', 'pk'),
+        'function': ('memberFunction__function', 'display_last_name', 'pk'),
+        'state': ('memberState__state', 'display_last_name', 'pk'),
+        'since': ('memberSince', 'display_last_name', 'pk'),
+    }
+
+    q = forms.CharField(label='Name', max_length=60, required=False)
+    state = CachedModelChoiceField(label='Status', cache=member_states, required=False, empty_label='alle')
+    function = CachedModelChoiceField(label='Funktion', cache=member_functions, required=False, empty_label='alle')
+    sort = forms.ChoiceField(
+        required=False,
+        choices=[(key, key) for key in SORTS] + [('-' + key, '-' + key) for key in SORTS],
+    )
+
+    def apply(self, memberships):
+        """
+        Gibt das gefilterte und sortierte QuerySet zurück.
+        Ungültige Filter werden ignoriert, die Standardsortierung ist nach Namen.
+        """
+        memberships = memberships.select_related('member', 'memberFunction', 'memberState').annotate(
+            display_first_name=Coalesce('member__Vorname', 'first_name'),
+            display_last_name=Coalesce('member__Nachname', 'last_name'),
+        )
+        data = {}
+        if self.is_bound:
+            self.is_valid() # ungültige Felder fehlen in cleaned_data und werden ignoriert
+            data = self.cleaned_data
+
+        search = (data.get('q') or '').strip()
+        if search:
+            memberships = memberships.filter(Q(display_last_name__icontains=search) | Q(display_first_name__icontains=search))
+        if data.get('state') is not None:
+            memberships = memberships.filter(memberState=data['state'])
+        if data.get('function') is not None:
+            memberships = memberships.filter(memberFunction=data['function'])
+
+        sort = data.get('sort') or 'name'
+        fields = self.SORTS[sort.lstrip('-')]
+        if sort.startswith('-'):
+            fields = ['-' + field for field in fields]
+        return memberships.order_by(*fields)
+
+class ImportMembersForm(forms.Form):
+    "Formular zum Hochladen einer Mitgliederliste, siehe members/imports.py"
+    data = forms.FileField(label='Mitgliederliste (CSV/XLSX)')
+    dry_run = forms.BooleanField(label='Nur prüfen, nichts speichern', required=False)
+
 class editMemberForm(forms.Form):
-    memberFunction = forms.ModelChoiceField(label='Funktion', queryset=MemberFunction.objects.all(), required=False)
+    memberFunction = CachedModelChoiceField(label='Funktion', cache=member_functions, required=False)
 
     def saveChanges(self, memship, commit=True):
         memFunction = self.cleaned_data['memberFunction']
@@ -0,0 +1,283 @@
+# Import von Mitgliederlisten (CSV/XLSX) für Vereine, die mit ihrem bestehenden Mitgliederbestand zu uns wechseln.
+# Die Datei wird zeilenweise gelesen und in Blöcken von IMPORT_BATCH_SIZE Zeilen geprüft und gespeichert.
+# Pro Block werden Benutzer, bestehende Mitgliedschaften und Adressen mit wenigen Abfragen aufgelöst
+# und die Mitgliedschaften mit bulk_create in einer Transaktion angelegt.
+import csv
+import io
+from datetime import datetime
+from itertools import islice
+
+from django import forms
+from django.db import transaction
+
+from clubs.models import addresses
+from manageyourclub.versions import invalidate_club, invalidate_user
+from members.models import Membership, member_states
+from users.models import CustomUser, genders
+
+IMPORT_BATCH_SIZE = 500
+
+# Kodierungen, die für CSV-Dateien nacheinander probiert werden (Excel speichert CSV unter Windows als cp1252)
+CSV_ENCODINGS = ('utf-8-sig', 'cp1252')
+
+# Spalten, die in der ersten Zeile der Importdatei stehen dürfen
+IMPORT_COLUMNS = (
+    'email', 'first_name', 'last_name', 'birthday', 'gender', 'phone',
+    'streetAddress', 'houseNumber', 'postcode', 'village', 'iban', 'bank_account_owner',
+)
+
+
+class MembershipImportError(Exception):
+    "Wird ausgelöst, wenn die Importdatei nicht gelesen werden kann."
+
+
+class MembershipImportRowForm(forms.Form):
+    """
+    Prüft eine Zeile der Importdatei.
+    Ist eine E-Mail-Adresse angegeben, muss sie zu einem registrierten Benutzer gehören.
+    Ansonsten werden die Daten wie bei einem nicht registrierten Antrag an der Mitgliedschaft gespeichert
+    und Vorname, Nachname, Geburtstag, Geschlecht und Adresse sind Pflichtfelder.
+    """
+    email = forms.EmailField(max_length=60, required=False)
+    first_name = forms.CharField(max_length=30, required=False)
+    last_name = forms.CharField(max_length=30, required=False)
+    birthday = forms.DateField(required=False)
+    gender = forms.CharField(max_length=8, required=False)
+    phone = forms.CharField(max_length=20, required=False)
+    streetAddress = forms.CharField(max_length=20, required=False)
+    houseNumber = forms.CharField(max_length=5, required=False)
+    postcode = forms.IntegerField(max_value=99999, min_value=0, required=False)
+    village = forms.CharField(max_length=20, required=False)
+    iban = forms.CharField(max_length=34, required=False)
+    bank_account_owner = forms.CharField(max_length=60, required=False)
+
+    UNREGISTERED_REQUIRED = ('first_name', 'last_name', 'birthday', 'gender', 'streetAddress', 'houseNumber', 'postcode', 'village')
+
+    def clean_gender(self):
+        gender = self.cleaned_data['gender']
+        if not gender:
+            return None
+        for instance in genders.all():
+            if gender.lower() in (instance.gender.lower(), str(instance.pk)):
+                return instance
+        raise forms.ValidationError('Unbekanntes Geschlecht "%s".' % gender)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('email'):
+            for key in self.UNREGISTERED_REQUIRED:
+                if key not in self.errors and cleaned_data.get(key) in (None, ''):
+                    self.add_error(key, 'Dieses Feld ist ohne E-Mail-Adresse erforderlich.')
+        return cleaned_data
+
+    def validate(self, row):
+        """
+        Prüft eine Zeile mit diesem Formular-Objekt und gibt (cleaned_data, errors) zurück.
+        Ein Formular-Objekt wird für alle Zeilen eines Imports wiederverwendet,
+        da das Kopieren der Felder in Form.__init__ sonst den Großteil der Laufzeit ausmacht.
+        """
+        self.data = row
+        self.is_bound = True
+        self._errors = None
+        return self.cleaned_data if self.is_valid() else None, self.errors
+
+
+def _address_key(data):
+    "Gibt das Adressen-Tupel einer geprüften Zeile für addresses.intern_many zurück oder None."
+    if data['email']:
+        return None
+    return (data['streetAddress'], data['houseNumber'], data['postcode'], data['village'])
+
+
+class MembershipImportReport:
+    "Ergebnis eines Imports: Anzahl der (geplanten) Mitgliedschaften und Fehler pro Zeile."
+
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.created = 0
+        self.rows = 0
+        self.errors = [] # Liste von (Zeilennummer, Fehlermeldung)
+
+    def add_error(self, row, message):
+        self.errors.append((row, message))
+
+    @property
+    def failed(self):
+        return len({row for row, _ in self.errors})
+
+
+def read_rows(uploaded_file):
+    """
+    Liest die hochgeladene Datei zeilenweise und gibt für jede Zeile (Zeilennummer, dict) zurück.
+    CSV-Dateien werden mit dem csv Modul gelesen (Trennzeichen , oder ;),
+    XLSX-Dateien mit openpyxl im read_only Modus, sodass die Datei nicht komplett im Speicher liegt.
+    """
+    name = uploaded_file.name.lower()
+    if name.endswith('.xlsx'):
+        return _read_xlsx(uploaded_file)
+    if name.endswith('.csv'):
+        return _read_csv(uploaded_file)
+    raise MembershipImportError('Es werden nur CSV- und XLSX-Dateien unterstützt.')
+
+
+def _read_csv(uploaded_file):
+    """
+    Liest eine CSV-Datei in der ersten Kodierung aus CSV_ENCODINGS, mit der sie sich komplett lesen lässt.
+    Die Datei wird dafür vorher einmal ganz durchlaufen, damit Kodierungs- und Formatfehler gemeldet werden,
+    bevor import_memberships den ersten Block speichert.
+    """
+    for encoding in CSV_ENCODINGS:
+        try:
+            for _ in _csv_rows(uploaded_file, encoding):
+                pass
+        except UnicodeDecodeError:
+            continue
+        break
+    else:
+        raise MembershipImportError('Die Datei ist weder in UTF-8 noch in Windows-1252 kodiert.')
+    yield from _csv_rows(uploaded_file, encoding)
+
+
+def _csv_rows(uploaded_file, encoding):
+    uploaded_file.seek(0)
+    text = io.TextIOWrapper(uploaded_file, encoding=encoding, newline='')
+    try:
+        try:
+            dialect = csv.Sniffer().sniff(text.readline(), delimiters=',;')
+        except csv.Error:
+            dialect = csv.excel
+        text.seek(0)
+        reader = csv.DictReader(text, dialect=dialect)
+        try:
+            _check_header(reader.fieldnames or [])
+            for row in reader:
+                yield reader.line_num, {key: (value or '').strip() for key, value in row.items() if key}
+        except csv.Error as error:
+            raise MembershipImportError('Zeile %d ist keine gültige CSV-Zeile: %s' % (reader.line_num, error))
+    finally:
+        # sonst schließt der TextIOWrapper die hochgeladene Datei
+        text.detach()
+
+
+def _read_xlsx(uploaded_file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise MembershipImportError('Für XLSX-Dateien muss das Paket openpyxl installiert sein.')
+
+    sheet = load_workbook(uploaded_file, read_only=True, data_only=True).active
+    rows = sheet.iter_rows(values_only=True)
+    header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+    _check_header(header)
+    for number, values in enumerate(rows, start=2):
+        row = {}
+        for key, value in zip(header, values):
+            if not key:
+                continue
+            if hasattr(value, 'date'): # Excel speichert Datumsangaben als datetime
+                value = value.date().isoformat()
+            row[key] = '' if value is None else str(value).strip()
+        if any(row.values()):
+            yield number, row
+
+
+def _check_header(header):
+    unknown = [key for key in header if key and key not in IMPORT_COLUMNS]
+    if unknown:
+        raise MembershipImportError('Unbekannte Spalten: ' + ', '.join(unknown))
+    if 'email' not in header and 'last_name' not in header:
+        raise MembershipImportError('Die Datei benötigt mindestens die Spalte "email" oder "last_name".')
+
+
+def import_memberships(club, rows, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Importiert die Zeilen (siehe read_rows) als aktive Mitgliedschaften in den Verein.
+    Jeder Block wird in einer eigenen Transaktion gespeichert.
+    Bei dry_run werden alle Prüfungen und Schreibvorgänge durchgeführt, die Transaktionen aber zurückgerollt.
+    Gibt einen MembershipImportReport zurück.
+    """
+    report = MembershipImportReport(dry_run)
+    seenEmails = set()
+    seenPersons = set()
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        with transaction.atomic():
+            _import_batch(club, batch, report, seenEmails, seenPersons)
+            if dry_run:
+                transaction.set_rollback(True)
+    report.errors.sort(key=lambda error: error[0])
+    return report
+
+
+def _import_batch(club, batch, report, seenEmails, seenPersons):
+    report.rows += len(batch)
+    validator = MembershipImportRowForm()
+    valid = []
+    for number, row in batch:
+        data, errors = validator.validate(row)
+        if data is not None:
+            valid.append((number, data))
+        else:
+            for field, messages in errors.items():
+                for message in messages:
+                    report.add_error(number, '%s: %s' % (field, message))
+
+    # registrierte Benutzer und ihre bestehenden Mitgliedschaften mit je einer Abfrage laden
+    emails = {CustomUser.objects.normalize_email(data['email']) for _, data in valid if data['email']}
+    users = {user.email: user for user in CustomUser.objects.filter(email__in=emails)}
+    memberIds = set(Membership.objects.filter(club=club, member__in=users.values()).values_list('member_id', flat=True))
+
+    lastNames = {data['last_name'] for _, data in valid if not data['email']}
+    persons = set(Membership.objects.filter(club=club, member__isnull=True, last_name__in=lastNames)
+                  .values_list('first_name', 'last_name', 'birthday'))
+
+    accepted = []
+    for number, data in valid:
+        if data['email']:
+            user = users.get(CustomUser.objects.normalize_email(data['email']))
+            if user is None:
+                report.add_error(number, 'email: Es existiert kein Benutzer mit der E-Mail-Adresse "%s".' % data['email'])
+            elif user.pk in memberIds or user.pk in seenEmails:
+                report.add_error(number, 'email: Der Benutzer "%s" ist bereits Mitglied des Vereins.' % data['email'])
+            else:
+                seenEmails.add(user.pk)
+                accepted.append((data, user))
+        else:
+            person = (data['first_name'], data['last_name'], data['birthday'])
+            if person in persons or person in seenPersons:
+                report.add_error(number, 'Die Person %s %s ist bereits Mitglied des Vereins.' % (data['first_name'], data['last_name']))
+            else:
+                seenPersons.add(person)
+                accepted.append((data, None))
+
+    resolved = addresses.intern_many(
+        key for key in (_address_key(data) for data, _ in accepted) if key is not None
+    )
+
+    memberState = member_states.get(1)
+    memberSince = datetime.today().year
+    memberships = []
+    for data, user in accepted:
+        membership = Membership(
+            club=club, member=user, memberState=memberState, memberSince=memberSince,
+            phone=data['phone'] or None, iban=data['iban'] or None,
+            bank_account_owner=data['bank_account_owner'] or None,
+        )
+        if user is None:
+            membership.first_name = data['first_name']
+            membership.last_name = data['last_name']
+            membership.birthday = data['birthday']
+            membership.gender = data['gender']
+            membership.adresse = resolved[_address_key(data)]
+        memberships.append(membership)
+
+    Membership.objects.bulk_create(memberships, batch_size=IMPORT_BATCH_SIZE)
+    report.created += len(memberships)
+    # bulk_create sendet kein post_save, die zwischengespeicherten Seiten werden deshalb hier verworfen
+    invalidate_club(club.pk)
+    for _, user in accepted:
+        if user is not None:
+            invalidate_user(user.pk)
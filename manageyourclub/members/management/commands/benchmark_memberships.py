@@ -0,0 +1,110 @@
+# Misst die häufigsten Abfragen auf Membership mit einem großen Testdatenbestand:
+#   python manage.py benchmark_memberships --clubs 500 --users 20000
+# Für jede Abfrage werden der Ausführungsplan (EXPLAIN) und die durchschnittliche Laufzeit ausgegeben.
+# Die Testdaten werden am Ende zurückgerollt, außer --keep wird angegeben.
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from clubs.models import ClubModel, addresses
+from members.models import Membership, MemberState
+from users.models import CustomUser, Gender
+
+
+class Rollback(Exception):
+    "Wird ausgelöst, um die Testdaten am Ende zurückzurollen."
+
+
+class Command(BaseCommand):
+    help = 'Legt Testdaten an und gibt Ausführungspläne und Laufzeiten der häufigsten Membership-Abfragen aus.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clubs', type=int, default=200, help='Anzahl der Vereine.')
+        parser.add_argument('--users', type=int, default=5000, help='Anzahl der Benutzer.')
+        parser.add_argument('--memberships-per-user', type=int, default=3, help='Vereine pro Benutzer.')
+        parser.add_argument('--unregistered', type=int, default=20, help='Nicht registrierte Mitglieder pro Verein.')
+        parser.add_argument('--repeat', type=int, default=200, help='Wiederholungen pro Abfrage für die Zeitmessung.')
+        parser.add_argument('--keep', action='store_true', help='Testdaten nicht zurückrollen.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                club, user = self.seed(options)
+                self.benchmark(club, user, options['repeat'])
+                if not options['keep']:
+                    raise Rollback()
+        except Rollback:
+            addresses.clear() # zurückgerollte Adressen dürfen nicht im Zwischenspeicher bleiben
+            self.stdout.write('Testdaten wurden zurückgerollt.')
+
+    def seed(self, options):
+        "Legt die Testdaten mit bulk_create an und gibt einen Verein und einen Benutzer für die Abfragen zurück."
+        start = time.monotonic()
+        for stateID, state in ((0, 'Anfrage'), (1, 'aktiv'), (2, 'abgelehnt')):
+            MemberState.objects.get_or_create(stateID=stateID, defaults={'state': state})
+        gender = Gender.objects.get_or_create(gender='divers')[0]
+        address = addresses.intern('Benchmarkstraße', '1', 12345, 'Benchmarkstadt')
+
+        prefix = 'benchmark%d' % int(time.time())
+        ClubModel.objects.bulk_create(
+            ClubModel(clubname='%s Verein %d' % (prefix, i), yearOfFoundation=1900, address=address)
+            for i in range(options['clubs'])
+        )
+        # nicht jede Datenbank gibt bei bulk_create die primary keys zurück, deshalb neu laden
+        clubs = list(ClubModel.objects.filter(clubname__startswith=prefix).order_by('pk'))
+        CustomUser.objects.bulk_create(
+            (CustomUser(email='%s_%d@example.com' % (prefix, i), Vorname='Vorname', Nachname='Nachname %d' % i,
+                        Geburtstag=date(1990, 1, 1), Geschlecht=gender, Adresse=address, password='!')
+             for i in range(options['users'])),
+            batch_size=1000,
+        )
+        users = list(CustomUser.objects.filter(email__startswith=prefix).order_by('pk'))
+
+        memberships = []
+        for i, user in enumerate(users):
+            for j in range(min(options['memberships_per_user'], len(clubs))):
+                # jede zehnte Mitgliedschaft ist ein offener Antrag
+                memberships.append(Membership(club=clubs[(i + j) % len(clubs)], member=user, memberState_id=0 if (i + j) % 10 == 0 else 1))
+        for club in clubs:
+            for k in range(options['unregistered']):
+                memberships.append(Membership(club=club, memberState_id=1, first_name='Vorname',
+                                              last_name='Person %d' % k, birthday=date(1990, 1, 1)))
+        Membership.objects.bulk_create(memberships, batch_size=1000)
+
+        self.stdout.write('%d Vereine, %d Benutzer und %d Mitgliedschaften in %.2f s angelegt.' % (
+            len(clubs), len(users), len(memberships), time.monotonic() - start))
+        return clubs[len(clubs) // 2], users[len(users) // 2]
+
+    def queries(self, club, user):
+        "Die zu messenden Abfragen: (Name, QuerySet)."
+        return [
+            ('club_has_member', Membership.objects.filter(club=club, member=user, memberState=1)),
+            ('Berechtigungsprüfung (club, member)', Membership.objects.filter(club=club, member=user)),
+            ('get_membership ohne Verein', Membership.objects.filter(member=user, memberState=1)[:1]),
+            ('offene Anträge eines Vereins', Membership.objects.filter(club=club, memberState=0)),
+            ('nicht registriertes Mitglied', Membership.objects.filter(club=club, last_name='Person 1', first_name='Vorname', birthday=date(1990, 1, 1))),
+            ('aktive Vereine eines Benutzers', ClubModel.objects.active_clubs_of(user)),
+        ]
+
+    def benchmark(self, club, user, repeat):
+        for name, queryset in self.queries(club, user):
+            plan = queryset.explain()
+            start = time.monotonic()
+            for _ in range(repeat):
+                list(queryset.all())
+            duration = (time.monotonic() - start) / repeat * 1000
+
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING('%s: %.3f ms' % (name, duration)))
+            for line in plan.splitlines():
+                self.stdout.write('    ' + line)
+            if self.is_full_scan(plan):
+                self.stdout.write(self.style.WARNING('    Vollständiger Tabellenscan!'))
+
+    def is_full_scan(self, plan):
+        "Erkennt Tabellenscans ohne Index in einem SQLite-Ausführungsplan."
+        if connection.vendor != 'sqlite':
+            return False
+        return any('SCAN' in line and 'USING' not in line for line in plan.splitlines())
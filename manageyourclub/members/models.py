@@ -1,11 +1,18 @@
 # Author: Tobias
 from sre_parse import State
+from django.conf import settings
 from django.db import models
-from clubs.models import AddressModel
+from clubs.models import AddressModel, addresses
 from users.models import Gender
 from users.models import CustomUser
 from clubs.models import ClubModel
 from datetime import datetime
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from manageyourclub.lookups import LookupTableCache
+from manageyourclub.versions import invalidate_club
+from notifications.models import MembershipEvent
 # Vorgabe der Architekten https://vereinsmanagement.atlassian.net/wiki/spaces/VEREINSMAN/pages/33062915/ERM+f+r+Datenbank+mit+Datentypen
 
 
@@ -35,6 +42,11 @@ class MemberState(models.Model):
     def __str__(self):
         return self.state
 
+# Zwischenspeicher für die Nachschlagetabellen, siehe manageyourclub/lookups.py
+payment_methods = LookupTableCache(PaymentMethod)
+member_functions = LookupTableCache(MemberFunction)
+member_states = LookupTableCache(MemberState)
+
 class Membership(models.Model):
     """Model für das Verbindungsstück zwischen Vereinen und Mitgliedern"""
     club            = models.ForeignKey(to=ClubModel, on_delete=models.CASCADE)
@@ -56,28 +68,94 @@ class Membership(models.Model):
 
 
     class Meta:
-        unique_together = ('member', 'club',)
+        unique_together = ('member', 'club',) # deckt auch Abfragen nach (member, club) und member ab
+        # Indizes für die häufigsten Abfragen, siehe "python manage.py benchmark_memberships"
+        indexes = [
+            models.Index(fields=['club', 'memberState'], name='membership_club_state_idx'), # offene Anträge, Mitgliederlisten
+            models.Index(fields=['member', 'memberState'], name='membership_member_state_idx'), # get_membership, aktive Vereine
+            models.Index(fields=['club', 'last_name', 'first_name', 'birthday'], name='membership_club_person_idx'), # nicht registrierte Mitglieder
+        ]
 
 
     def setStatusAccepted(self):
         #Autor: Max
         #Methode um den Status einer Mitgliedschaftsanfrage auf angenommen zusetzen. -> DRY Pattern
-        self.memberState = MemberState.objects.get(stateID=1)
-        self.memberSince = datetime.today().year
-        self.save()
+        with transaction.atomic():
+            wasPending = self._lockState() == 0
+            self.memberState = member_states.get(1)
+            self.memberSince = datetime.today().year
+            self.save()
+            if wasPending:
+                ClubMembershipSummary.adjust(self.club_id, -1)
+                MembershipEvent.record(self.club_id, MembershipEvent.ACCEPTED, [self.number])
 
     def setStatusDeclined(self):
         #Autor: Max
         #Methode um den Status einer Mitgliedschaftsanfrage auf abgelehnt zusetzen. -> DRY Pattern
-        self.memberState = MemberState.objects.get(stateID=2)
-        self.save()
+        with transaction.atomic():
+            wasPending = self._lockState() == 0
+            self.memberState = member_states.get(2)
+            self.save()
+            if wasPending:
+                ClubMembershipSummary.adjust(self.club_id, -1)
+                MembershipEvent.record(self.club_id, MembershipEvent.DECLINED, [self.number])
+
+    def _lockState(self):
+        """
+        Sperrt die Mitgliedschaft bis zum Ende der Transaktion und gibt ihren Status aus der Datenbank zurück.
+        Zwei gleichzeitige Anfragen sehen so nicht beide einen offenen Antrag und zählen pendingRequests nicht doppelt herunter.
+        """
+        return Membership.objects.select_for_update().filter(pk=self.pk).values_list('memberState_id', flat=True).first()
+
+    # Ergebnisse von reviewRequests pro Antrag
+    REVIEW_ACCEPTED = 'angenommen'
+    REVIEW_DECLINED = 'abgelehnt'
+    REVIEW_ALREADY_REVIEWED = 'bereits geprüft'
+    REVIEW_NOT_FOUND = 'nicht gefunden'
+
+    @staticmethod
+    def reviewRequests(club, numbers, accept):
+        """
+        Nimmt alle offenen Mitgliedschaftsanträge (memberState 0) des Vereins mit den übergebenen Nummern an
+        oder lehnt sie ab. Die Anträge werden in einer Transaktion gesperrt und mit einem einzigen UPDATE geändert,
+        angenommene Anträge erhalten dabei memberSince.
+        club kann ein ClubModel oder dessen primary key sein (wie in der URL von reviewRequestsView).
+        Gibt ein dict zurück, das jeder Nummer eines der REVIEW_* Ergebnisse zuordnet.
+        """
+        club_id = club.pk if isinstance(club, ClubModel) else club
+        numbers = set(numbers)
+        with transaction.atomic():
+            states = dict(
+                Membership.objects.select_for_update()
+                .filter(club_id=club_id, number__in=numbers)
+                .values_list('number', 'memberState_id')
+            )
+            pending = [number for number, state in states.items() if state == 0]
+            if pending:
+                if accept:
+                    changes = {'memberState': member_states.get(1), 'memberSince': datetime.today().year}
+                else:
+                    changes = {'memberState': member_states.get(2)}
+                Membership.objects.filter(number__in=pending, memberState=0).update(**changes)
+                ClubMembershipSummary.adjust(club_id, -len(pending))
+                MembershipEvent.record(club_id, MembershipEvent.ACCEPTED if accept else MembershipEvent.DECLINED, pending)
+
+        results = {}
+        for number in numbers:
+            if number not in states:
+                results[number] = Membership.REVIEW_NOT_FOUND
+            elif states[number] != 0:
+                results[number] = Membership.REVIEW_ALREADY_REVIEWED
+            else:
+                results[number] = Membership.REVIEW_ACCEPTED if accept else Membership.REVIEW_DECLINED
+        return results
 
     @staticmethod
     def addMember(club,user):
         #Autor: Max
         #Methode zum hinzufügen von Mitgliedern zu vereinen. Kann mit Membership.addMember(club=...,user=...) angesprochen werden
         if not Membership.objects.filter(member=user, club=club).exists():
-            memberState = MemberState.objects.get(stateID = 1)
+            memberState = member_states.get(1)
             newMember  = Membership.objects.create(member=user, club=club, memberSince=datetime.today().year, memberState = memberState)
             newMember.save()
             return newMember
@@ -89,9 +167,11 @@ class Membership(models.Model):
         #Fügt die Daten eines Antragsformulars in den Memberships Table ein
         #Status ist auf 0, die Mitgliedschaft ist somit im Status 'Anfrage' und daher noch nicht aktiv
         if not Membership.objects.filter(member=user, club=club).exists():
-            memberState = MemberState.objects.get(stateID = 0)
-            newMember  = Membership.objects.create(member=user, club=club, memberState = memberState, phone = phone, iban = iban, bank_account_owner=bank_account_owner )
-            newMember.save()
+            memberState = member_states.get(0)
+            with transaction.atomic():
+                newMember  = Membership.objects.create(member=user, club=club, memberState = memberState, phone = phone, iban = iban, bank_account_owner=bank_account_owner )
+                ClubMembershipSummary.adjust(club.pk, 1)
+                MembershipEvent.record(club.pk, MembershipEvent.REQUESTED, [newMember])
             return newMember
         return None
 
@@ -102,21 +182,86 @@ class Membership(models.Model):
         #Fügt die Daten eines Antragsformulars in den Memberships Table ein
         #Status ist auf 0, die Mitgliedschaft ist somit im Status 'Anfrage' und daher noch nicht aktiv
         if not Membership.objects.filter(first_name = first_name,last_name=last_name,birthday=birthday, club=club).exists():
-            memberState = MemberState.objects.get(stateID = 0)
-            adresse = AddressModel.get_or_create(streetAddress, houseNumber, postcode_id, village)
-            newMember  = Membership.objects.create(club=club, memberState = memberState, phone = phone, first_name= first_name, last_name = last_name, 
-            gender = gender, adresse = adresse, iban = iban, bank_account_owner=bank_account_owner, birthday=birthday)
-            newMember.save()
-            return newMember
+            memberState = member_states.get(0)
+            def save(adresse):
+                newMember = Membership.objects.create(club=club, memberState = memberState, phone = phone, first_name= first_name, last_name = last_name, 
+                    gender = gender, adresse = adresse, iban = iban, bank_account_owner=bank_account_owner, birthday=birthday)
+                ClubMembershipSummary.adjust(club.pk, 1)
+                MembershipEvent.record(club.pk, MembershipEvent.REQUESTED, [newMember])
+                return newMember
+            # save läuft in der Transaktion von save_with_address
+            return addresses.save_with_address(save, streetAddress, houseNumber, postcode_id, village)
         return None
 
 
 
 
+class ClubMembershipSummary(models.Model):
+    """
+    Zusammenfassung der Mitgliedschaften eines Vereins für die Startseite, damit dort nicht bei jedem Aufruf
+    alle offenen Anträge geladen werden müssen.
+    pendingRequests wird bei jeder Statusänderung eines Antrags in derselben Transaktion angepasst.
+    Fehlt die Zeile eines Vereins, wird sie beim nächsten Zugriff aus den Mitgliedschaften neu berechnet.
+    """
+    club = models.OneToOneField(to=ClubModel, on_delete=models.CASCADE, primary_key=True)
+    pendingRequests = models.IntegerField(default=0)
+
+    @staticmethod
+    def adjust(club_id, delta):
+        "Ändert die Anzahl der offenen Anträge des Vereins um delta."
+        if not ClubMembershipSummary.objects.filter(club_id=club_id).update(pendingRequests=F('pendingRequests') + delta):
+            ClubMembershipSummary.recount(club_id)
+        invalidate_club(club_id) # die Navigation zeigt die Anzahl an, UPDATE löst kein post_save aus
+
+    @staticmethod
+    def recount(club_id):
+        "Berechnet die Zusammenfassung des Vereins aus den Mitgliedschaften neu."
+        pendingRequests = Membership.objects.filter(club_id=club_id, memberState=0).count()
+        return ClubMembershipSummary.objects.update_or_create(club_id=club_id, defaults={'pendingRequests': pendingRequests})[0]
+
+    @staticmethod
+    def pendingRequestsOf(club):
+        "Gibt die Anzahl der offenen Anträge des Vereins zurück (eine Abfrage)."
+        summary = ClubMembershipSummary.objects.filter(club=club).first()
+        if summary is None:
+            summary = ClubMembershipSummary.recount(club.pk)
+        return summary.pendingRequests
+
+
+def _membership_deleted(sender, instance, **kwargs):
+    # wird ein offener Antrag gelöscht, sinkt die Anzahl; wird der Verein gelöscht, gibt es nichts anzupassen
+    if instance.memberState_id == 0:
+        ClubMembershipSummary.objects.filter(club_id=instance.club_id).update(pendingRequests=F('pendingRequests') - 1)
+        invalidate_club(instance.club_id) # Navigation und clubcache zeigen die Anzahl an, UPDATE löst kein post_save aus
+
+post_delete.connect(_membership_deleted, sender=Membership, dispatch_uid='membership_summary_delete')
+
 
 def club_has_member(club, member):
     return Membership.objects.filter(club=club, member=member, memberState=1).exists()
 
+# IDs der Funktionen aus static/standardValues.sql
+FUNCTION_BOARD = 1 # Vorstand
+FUNCTION_ADMINISTRATOR = 4
+FUNCTION_TREASURER = 6 # Kassenwart
+
+# Funktionen, deren Mitglieder die Mitgliederliste inklusive Zahlungsdaten exportieren dürfen
+EXPORT_FUNCTIONS = getattr(settings, 'MEMBER_EXPORT_FUNCTIONS', (FUNCTION_ADMINISTRATOR, FUNCTION_TREASURER))
+# Funktionen, deren Mitglieder die Funktionen der Mitglieder ändern dürfen
+EDIT_FUNCTIONS = getattr(settings, 'MEMBER_EDIT_FUNCTIONS', (FUNCTION_BOARD, FUNCTION_ADMINISTRATOR))
+
+def club_member_function(club, member):
+    "Gibt die ID der Funktion zurück, die member als aktives Mitglied von club hat, sonst None."
+    return Membership.objects.filter(club=club, member=member, memberState=1).values_list('memberFunction_id', flat=True).first()
+
+def club_member_may_export(club, member):
+    "Prüft, ob member aktives Mitglied von club mit einer Funktion aus EXPORT_FUNCTIONS ist."
+    return club_member_function(club, member) in EXPORT_FUNCTIONS
+
+def club_member_may_edit_functions(club, member):
+    "Prüft, ob member aktives Mitglied von club mit einer Funktion aus EDIT_FUNCTIONS ist."
+    return club_member_function(club, member) in EDIT_FUNCTIONS
+
 # Quelle genutzt: https://stackoverflow.com/questions/5123839/fastest-way-to-get-the-first-object-from-a-queryset-in-django
 def get_membership(member, club=None):
     """Gibt die Mitlgiedschaft beim angegebenen Verein aus. 
@@ -125,7 +270,7 @@ def get_membership(member, club=None):
     Wenn keine Mitgliedschaft mit den entsprechenden Eigenschaften 
     gefunden wurde wird None zurückgegeben."""
 
-    memberState = MemberState.objects.get(stateID=1)
+    memberState = member_states.get(1)
 
     if club is None:
         return Membership.objects.filter(member=member, memberState=memberState).first()
@@ -0,0 +1,20 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from members.models import Membership
+
+class TestBenchmarkMemberships(TestCase):
+
+    def test_no_full_scans(self):
+        """
+            Testinhalt:
+            Keine der gemessenen Abfragen sollte die Membership-Tabelle vollständig durchsuchen.
+            Die Testdaten sollten danach wieder entfernt sein.
+        """
+        out = StringIO()
+        call_command('benchmark_memberships', clubs=5, users=50, unregistered=5, repeat=1, stdout=out)
+
+        self.assertIn('get_membership ohne Verein', out.getvalue())
+        self.assertNotIn('Tabellenscan', out.getvalue())
+        self.assertFalse(Membership.objects.exists())
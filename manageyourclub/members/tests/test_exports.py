@@ -0,0 +1,129 @@
+import csv
+import io
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from clubs.models import AddressModel
+from clubs.tests.test_views import createTestClub, logTestClientIn
+from members.exports import EXPORT_COLUMNS, export_rows
+from members.models import FUNCTION_TREASURER, MemberFunction, Membership, MemberState
+from membership_request.models import CustomMembershipData, FieldsListModel
+from users.models import Gender
+
+class TestExports(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        self.gender = Gender.objects.get_or_create(gender='weiblich')[0]
+        self.client = Client()
+        self.club = createTestClub()
+        logTestClientIn(self.client)
+        self.membership = Membership.addMember(self.club, self.client.user)
+        treasurer = MemberFunction.objects.get_or_create(functionID=FUNCTION_TREASURER, function='Kassenwart')[0]
+        Membership.objects.filter(pk=self.membership.pk).update(memberFunction=treasurer)
+        FieldsListModel.objects.create(club=self.club, name='T-Shirt Größe', field_type='CustomCharField', ordering=1)
+        self.export_url = reverse('export_members', kwargs={'club':self.club.pk})
+
+    def createMembers(self, count):
+        "Erstellt count nicht registrierte Mitglieder mit Adresse und Antworten aus dem Antragsformular."
+        address = AddressModel.create('Hauptstraße', '1', 54321, 'Teststadt')
+        memberships = Membership.objects.bulk_create(
+            Membership(club=self.club, memberState_id=1, first_name='Vorname', last_name='Person %d' % i,
+                       gender=self.gender, adresse=address, iban='DE%02d' % i)
+            for i in range(count)
+        )
+        for membership in Membership.objects.filter(club=self.club, member__isnull=True, custommembershipdata__isnull=True):
+            CustomMembershipData.objects.create(membership=membership, json='{"t-shirt_größe": "L"}')
+        return memberships
+
+    def test_export_rows(self):
+        """
+            Testinhalt:
+            Registrierte und nicht registrierte Mitglieder sollten mit Adresse, Zahlungsdaten
+            und den Antworten aus dem Antragsformular als eigene Spalte exportiert werden.
+        """
+        self.createMembers(1)
+        header, registered, unregistered = export_rows(self.club)
+
+        self.assertEqual(header, list(EXPORT_COLUMNS) + ['T-Shirt Größe'])
+        registered = dict(zip(header, registered))
+        unregistered = dict(zip(header, unregistered))
+        self.assertEqual(registered['email'], 'testuser@email.de')
+        self.assertEqual(registered['village'], 'München')
+        self.assertEqual(registered['memberState'], 'aktiv')
+        self.assertEqual(registered['T-Shirt Größe'], '')
+        self.assertEqual(unregistered['last_name'], 'Person 0')
+        self.assertEqual(unregistered['gender'], 'weiblich')
+        self.assertEqual(unregistered['iban'], 'DE00')
+        self.assertEqual(unregistered['T-Shirt Größe'], 'L')
+
+    def test_export_query_count(self):
+        """
+            Testinhalt:
+            Die Anzahl der Abfragen sollte nicht von der Anzahl der Mitglieder abhängen.
+        """
+        self.createMembers(3)
+        list(export_rows(self.club)) # Zwischenspeicher der Nachschlagetabellen füllen
+        with CaptureQueriesContext(connection) as few:
+            list(export_rows(self.club))
+
+        self.createMembers(30)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(len(list(export_rows(self.club))), 35)
+        self.assertEqual(len(few), len(many))
+
+    def test_exportMembersView_csv(self):
+        """
+            Testinhalt:
+            Die CSV-Datei sollte gestreamt werden und eine Zeile pro Mitglied enthalten.
+        """
+        self.createMembers(2)
+        response = self.client.get(self.export_url)
+
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content), delimiter=';'))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0][0], 'number')
+
+    def test_exportMembersView_not_member(self):
+        """
+            Testinhalt:
+            Nur Mitglieder des Vereins sollten die Mitgliederliste exportieren können.
+        """
+        self.membership.delete()
+        response = self.client.get(self.export_url)
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+    def test_exportMembersView_without_function(self):
+        """
+            Testinhalt:
+            Aktive Mitglieder ohne Funktion wie Kassenwart sollten die Mitgliederliste nicht exportieren können.
+        """
+        Membership.objects.filter(pk=self.membership.pk).update(memberFunction=None)
+        response = self.client.get(self.export_url)
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+    def test_exportMembersView_formula(self):
+        """
+            Testinhalt:
+            Zellen, die mit = oder @ beginnen, sollten mit ' beginnen, damit sie nicht als Formel ausgeführt werden.
+            Mit + oder - sollte nur maskiert werden, was keine Zahl oder Telefonnummer ist.
+        """
+        self.createMembers(1)
+        Membership.objects.filter(member__isnull=True).update(
+            first_name='=HYPERLINK("x")', last_name='@SUM(A1)', phone='+49 621 123-45', bank_account_owner='-2+SUM(A1)',
+        )
+        response = self.client.get(self.export_url)
+
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        header, _, unregistered = csv.reader(io.StringIO(content), delimiter=';')
+        unregistered = dict(zip(header, unregistered))
+        self.assertEqual(unregistered['first_name'], "'=HYPERLINK(\"x\")")
+        self.assertEqual(unregistered['last_name'], "'@SUM(A1)")
+        self.assertEqual(unregistered['phone'], '+49 621 123-45')
+        self.assertEqual(unregistered['bank_account_owner'], "'-2+SUM(A1)")
+        self.assertEqual(unregistered['iban'], 'DE00')
@@ -0,0 +1,25 @@
+from django.test import TestCase
+from members.forms import editMemberForm
+from members.models import MemberFunction, member_functions
+
+class TestForms(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        self.function = MemberFunction.objects.create(functionID=5, function='Trainer')
+
+    def test_editMemberForm_cached_choices(self):
+        """
+            Testinhalt:
+            Die Auswahlmöglichkeiten und die Validierung sollten aus dem Zwischenspeicher kommen.
+        """
+        member_functions.all()
+        with self.assertNumQueries(0):
+            form = editMemberForm(data={'memberFunction': self.function.pk})
+            self.assertIn('Trainer', form.as_p())
+            self.assertTrue(form.is_valid())
+            self.assertEqual(form.cleaned_data['memberFunction'], self.function)
+
+    def test_editMemberForm_invalid_choice(self):
+        form = editMemberForm(data={'memberFunction': 99})
+        self.assertFalse(form.is_valid())
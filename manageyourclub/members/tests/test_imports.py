@@ -0,0 +1,112 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from clubs.models import AddressModel, PlaceModel
+from clubs.tests.test_views import createTestClub, createTestUser
+from members.imports import MembershipImportError, import_memberships, read_rows
+from members.models import Membership, MemberState
+from users.models import Gender
+
+HEADER = 'email;first_name;last_name;birthday;gender;streetAddress;houseNumber;postcode;village;iban\n'
+
+def csvFile(*lines, header=HEADER):
+    "Erstellt eine hochgeladene CSV-Datei mit den übergebenen Zeilen."
+    return SimpleUploadedFile('mitglieder.csv', (header + '\n'.join(lines)).encode('utf-8'))
+
+def unregisteredRow(i, village='Teststadt'):
+    return ';Vorname;Nachname %d;1990-01-01;weiblich;Hauptstraße;%d;54321;%s;DE00' % (i, i % 7, village)
+
+class TestImports(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        Gender.objects.get_or_create(gender='weiblich')
+        self.club = createTestClub(clubname='Die Tester')
+        self.user = createTestUser()
+
+    def test_import_memberships(self):
+        """
+            Testinhalt:
+            Registrierte Benutzer und nicht registrierte Personen sollten als aktive Mitglieder importiert werden.
+            Ungültige Zeilen sollten mit Zeilennummer im Bericht stehen.
+        """
+        report = import_memberships(self.club, read_rows(csvFile(
+            'testuser@email.de;;;;;;;;;',
+            unregisteredRow(1),
+            'unbekannt@email.de;;;;;;;;;',
+            ';Vorname;;1990-01-01;weiblich;Hauptstraße;1;54321;Teststadt;',
+        )))
+
+        self.assertEqual(report.rows, 4)
+        self.assertEqual(report.created, 2)
+        self.assertEqual([row for row, _ in report.errors], [4, 5])
+        self.assertTrue(Membership.objects.filter(club=self.club, member=self.user, memberState=1).exists())
+        imported = Membership.objects.get(club=self.club, last_name='Nachname 1')
+        self.assertEqual(imported.adresse.postcode.village, 'Teststadt')
+
+    def test_import_memberships_duplicates(self):
+        """
+            Testinhalt:
+            Bereits vorhandene Mitglieder und doppelte Zeilen sollten nicht erneut angelegt werden.
+        """
+        import_memberships(self.club, read_rows(csvFile(unregisteredRow(1))))
+        report = import_memberships(self.club, read_rows(csvFile(
+            unregisteredRow(1), unregisteredRow(2), unregisteredRow(2),
+        )))
+        self.assertEqual(report.created, 1)
+        self.assertEqual(report.failed, 2)
+        self.assertEqual(Membership.objects.filter(club=self.club).count(), 2)
+
+    def test_import_memberships_dry_run(self):
+        """
+            Testinhalt:
+            Bei dry_run sollte der Bericht erstellt, aber nichts gespeichert werden.
+        """
+        report = import_memberships(self.club, read_rows(csvFile(unregisteredRow(1))), dry_run=True)
+        self.assertEqual(report.created, 1)
+        self.assertFalse(Membership.objects.filter(club=self.club).exists())
+        self.assertFalse(PlaceModel.objects.filter(village='Teststadt').exists())
+
+    def test_import_memberships_query_count(self):
+        """
+            Testinhalt:
+            Die Anzahl der Abfragen pro Block sollte nicht von der Anzahl der Zeilen abhängen.
+            INSERTs werden nicht mitgezählt, da SQLite bulk_create nach der Anzahl der Parameter aufteilt.
+        """
+        import_memberships(self.club, read_rows(csvFile(unregisteredRow(0, 'Erste Stadt'))))
+        with CaptureQueriesContext(connection) as few:
+            import_memberships(self.club, read_rows(csvFile(*[unregisteredRow(i) for i in range(1, 3)])))
+        with CaptureQueriesContext(connection) as many:
+            import_memberships(self.club, read_rows(csvFile(*[unregisteredRow(i, 'Andere Stadt') for i in range(3, 300)])))
+        selects = lambda queries: [q for q in queries.captured_queries if not q['sql'].startswith('INSERT')]
+        self.assertEqual(len(selects(few)), len(selects(many)))
+        self.assertEqual(Membership.objects.filter(club=self.club).count(), 300)
+        self.assertEqual(AddressModel.objects.filter(postcode__village='Andere Stadt').count(), 7)
+
+    def test_read_rows_unknown_column(self):
+        self.assertRaises(MembershipImportError, list, read_rows(csvFile(header='Spalte\n')))
+        self.assertRaises(MembershipImportError, read_rows, SimpleUploadedFile('mitglieder.txt', b''))
+
+    def test_read_rows_cp1252(self):
+        """
+            Testinhalt:
+            Eine von Excel in Windows-1252 gespeicherte CSV-Datei sollte mit Umlauten gelesen werden.
+        """
+        uploaded = SimpleUploadedFile('mitglieder.csv', (HEADER + unregisteredRow(1, 'Müllheim')).encode('cp1252'))
+        rows = list(read_rows(uploaded))
+        self.assertEqual(rows[0][1]['village'], 'Müllheim')
+
+    def test_read_rows_invalid_file(self):
+        """
+            Testinhalt:
+            Fehler beim Lesen späterer Zeilen sollten als MembershipImportError gemeldet werden,
+            bevor der erste Block gespeichert ist.
+        """
+        undecodable = SimpleUploadedFile('mitglieder.csv', HEADER.encode() + unregisteredRow(1).encode() + b'\n\x81\x8d')
+        self.assertRaises(MembershipImportError, import_memberships, self.club, read_rows(undecodable), batch_size=1)
+
+        rows = [unregisteredRow(i) for i in range(1, 3)] + [unregisteredRow(3, 'x' * 200000)]
+        self.assertRaises(MembershipImportError, import_memberships, self.club, read_rows(csvFile(*rows)), batch_size=1)
+        self.assertFalse(Membership.objects.filter(club=self.club).exists())
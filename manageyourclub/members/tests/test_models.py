@@ -1,7 +1,8 @@
 # Author: Tobias
 from django.test import TestCase
-from members.models import Membership, club_has_member
+from members.models import ClubMembershipSummary, Membership, MemberState, club_has_member, member_states
 from clubs.tests.test_views import createTestClub, createTestUser
+from manageyourclub.versions import club_key, versions
 
 class TestModels(TestCase):
     
@@ -18,3 +19,187 @@ class TestModels(TestCase):
         self.assertFalse(club_has_member(self.club, self.user))
         Membership.addMember(self.club, self.user)
         self.assertTrue(club_has_member(self.club, self.user))
+
+
+class TestLookupTableCache(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        MemberState.objects.get_or_create(stateID=2, state='inaktiv')
+
+    def test_get(self):
+        """
+            Testinhalt:
+            Nach dem ersten Zugriff sollten die Zustände ohne Datenbankabfrage zurückgegeben werden.
+            Ein unbekannter Zustand sollte DoesNotExist auslösen.
+        """
+        member_states.get(1)
+        with self.assertNumQueries(0):
+            self.assertEqual(member_states.get(1).state, 'aktiv')
+            self.assertEqual(member_states.get(2).state, 'inaktiv')
+        self.assertRaises(MemberState.DoesNotExist, member_states.get, 99)
+
+    def test_get_string_pk(self):
+        """
+            Testinhalt:
+            Wie bei Model.objects.get sollte der primary key auch als String (z.B. aus POST-Daten) angegeben werden können.
+        """
+        self.assertEqual(member_states.get('1').state, 'aktiv')
+        self.assertRaises(MemberState.DoesNotExist, member_states.get, 'abc')
+
+    def test_mutation_does_not_leak(self):
+        """
+            Testinhalt:
+            Änderungen an einem zurückgegebenen Objekt ohne save sollten den Zwischenspeicher nicht verändern.
+        """
+        member_states.get(1).state = 'verändert'
+        member_states.all()[0].state = 'verändert'
+        self.assertEqual(member_states.get(1).state, 'aktiv')
+        self.assertEqual(member_states.all()[0].state, 'aktiv')
+
+    def test_invalidate_on_save(self):
+        """
+            Testinhalt:
+            Wird eine Zeile geändert, sollte der Zwischenspeicher verworfen und neu geladen werden.
+        """
+        state = member_states.get(1)
+        state.state = 'Aktiv'
+        state.save()
+        self.assertEqual(member_states.get(1).state, 'Aktiv')
+
+    def test_setStatusAccepted(self):
+        """
+            Testinhalt:
+            Der Statuswechsel sollte nur noch die Mitgliedschaft sperren und speichern
+            (in einer Transaktion, damit der Zähler offener Anträge stimmt).
+        """
+        club = createTestClub(clubname='Die Tester')
+        user = createTestUser()
+        membership = Membership.addMember(club, user)
+        member_states.get(1)
+        with self.assertNumQueries(4): # SAVEPOINT, SELECT ... FOR UPDATE, UPDATE, RELEASE SAVEPOINT (kein offener Antrag, also kein Ereignis)
+            membership.setStatusAccepted()
+
+class TestReviewRequests(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        for stateID, state in ((0, 'Anfrage'), (1, 'aktiv'), (2, 'abgelehnt')):
+            MemberState.objects.get_or_create(stateID=stateID, state=state)
+        self.club = createTestClub(clubname='Die Tester')
+        self.otherClub = createTestClub(clubname='Die Anderen')
+        self.requests = [
+            Membership.objects.create(club=self.club, memberState_id=0, last_name='Antrag %d' % i) for i in range(3)
+        ]
+        self.active = Membership.objects.create(club=self.club, memberState_id=1, last_name='Aktiv')
+        self.foreign = Membership.objects.create(club=self.otherClub, memberState_id=0, last_name='Fremd')
+
+    def test_accept(self):
+        """
+            Testinhalt:
+            Offene Anträge sollten mit einem UPDATE angenommen werden,
+            für alle anderen Nummern sollte das Ergebnis pro Nummer zurückgegeben werden.
+        """
+        numbers = [membership.number for membership in self.requests[:2]] + [self.active.number, self.foreign.number]
+        member_states.all() # Zwischenspeicher der Nachschlagetabelle füllen
+        ClubMembershipSummary.recount(self.club.pk)
+        with self.assertNumQueries(6): # SAVEPOINT, SELECT ... FOR UPDATE, UPDATE, UPDATE Zähler, INSERT Ereignisse, RELEASE SAVEPOINT
+            results = Membership.reviewRequests(self.club, numbers, accept=True)
+
+        self.assertEqual(results, {
+            self.requests[0].number: Membership.REVIEW_ACCEPTED,
+            self.requests[1].number: Membership.REVIEW_ACCEPTED,
+            self.active.number: Membership.REVIEW_ALREADY_REVIEWED,
+            self.foreign.number: Membership.REVIEW_NOT_FOUND,
+        })
+        accepted = Membership.objects.get(pk=self.requests[0].pk)
+        self.assertEqual(accepted.memberState_id, 1)
+        self.assertIsNotNone(accepted.memberSince)
+        self.assertEqual(Membership.objects.get(pk=self.requests[2].pk).memberState_id, 0)
+        self.assertEqual(Membership.objects.get(pk=self.foreign.pk).memberState_id, 0)
+
+    def test_decline(self):
+        """
+            Testinhalt:
+            Abgelehnte Anträge sollten den Status abgelehnt und kein Eintrittsjahr erhalten.
+        """
+        # reviewRequestsView übergibt den primary key des Vereins aus der URL
+        results = Membership.reviewRequests(self.club.pk, [self.requests[0].number], accept=False)
+
+        self.assertEqual(results, {self.requests[0].number: Membership.REVIEW_DECLINED})
+        declined = Membership.objects.get(pk=self.requests[0].pk)
+        self.assertEqual(declined.memberState_id, 2)
+        self.assertIsNone(declined.memberSince)
+        self.assertEqual(ClubMembershipSummary.pendingRequestsOf(self.club), 2)
+
+class TestClubMembershipSummary(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        for stateID, state in ((0, 'Anfrage'), (1, 'aktiv'), (2, 'abgelehnt')):
+            MemberState.objects.get_or_create(stateID=stateID, state=state)
+        self.club = createTestClub(clubname='Die Tester')
+        self.user = createTestUser()
+
+    def addRequest(self, last_name):
+        return Membership.addUnregisteredMembershipRequestData(
+            club=self.club, phone='0123', first_name='Vorname', last_name=last_name, birthday='2000-01-01',
+            gender=self.user.Geschlecht, postcode_id=12345, streetAddress='Teststraße', houseNumber='1',
+            village='München', iban=None, bank_account_owner=None
+        )
+
+    def test_state_transitions(self):
+        """
+            Testinhalt:
+            Die Anzahl offener Anträge sollte bei jeder Statusänderung angepasst werden.
+        """
+        self.assertEqual(ClubMembershipSummary.pendingRequestsOf(self.club), 0)
+        Membership.addRegisteredMembershipRequestData(self.user, self.club, '0123', None, None)
+        requests = [self.addRequest('Antrag %d' % i) for i in range(4)]
+        self.assertEqual(ClubMembershipSummary.pendingRequestsOf(self.club), 5)
+
+        requests[0].setStatusAccepted()
+        requests[1].setStatusDeclined()
+        requests[1].setStatusDeclined() # bereits geprüft, keine Änderung
+        self.assertEqual(ClubMembershipSummary.pendingRequestsOf(self.club), 3)
+
+        Membership.reviewRequests(self.club, [requests[2].number, requests[0].number], accept=True)
+        self.assertEqual(ClubMembershipSummary.pendingRequestsOf(self.club), 2)
+
+        requests[3].delete()
+        self.assertEqual(ClubMembershipSummary.pendingRequestsOf(self.club), 1)
+        self.assertEqual(ClubMembershipSummary.recount(self.club.pk).pendingRequests, 1)
+
+    def test_stale_instances_count_once(self):
+        """
+            Testinhalt:
+            Wird derselbe Antrag über zwei veraltete Objekte angenommen und abgelehnt (zwei gleichzeitige Anfragen),
+            sollte die Anzahl offener Anträge nur einmal sinken.
+        """
+        request = self.addRequest('Antrag')
+        first, second = Membership.objects.get(pk=request.pk), Membership.objects.get(pk=request.pk)
+        first.setStatusAccepted()
+        second.setStatusDeclined()
+        self.assertEqual(ClubMembershipSummary.pendingRequestsOf(self.club), 0)
+
+    def test_delete_invalidates_club(self):
+        """
+            Testinhalt:
+            Das Löschen eines offenen Antrags sollte die zwischengespeicherten Daten des Vereins verwerfen.
+        """
+        request = self.addRequest('Antrag')
+        before = versions([club_key(self.club.pk)])
+        request.delete()
+        self.assertNotEqual(versions([club_key(self.club.pk)]), before)
+
+    def test_missing_row_is_recounted(self):
+        """
+            Testinhalt:
+            Fehlt die Zusammenfassung eines Vereins, sollte sie aus den Mitgliedschaften berechnet werden.
+        """
+        Membership.objects.create(club=self.club, memberState_id=0, last_name='Ohne Zähler')
+        self.assertFalse(ClubMembershipSummary.objects.filter(club=self.club).exists())
+        self.assertEqual(ClubMembershipSummary.pendingRequestsOf(self.club), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(ClubMembershipSummary.pendingRequestsOf(self.club), 1)
@@ -1,6 +1,11 @@
+from unittest.mock import patch
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from members.views import clubMembersView, editMemberView
+from members.models import FUNCTION_ADMINISTRATOR, FUNCTION_BOARD, Membership, MemberState, MemberFunction
 from clubs.models import ClubModel, AddressModel
 from users.models import CustomUser, Gender
 from clubs.tests.test_views import createTestUser, createTestClub, logTestClientIn
@@ -24,4 +29,164 @@ class TestViews(TestCase):
     def test_editMemberView_GET(self):
         response = self.client.get(self.editMemberView_url)
         self.assertEqual(response.status_code, 200)
-        self.assertTemplateUsed(response, 'club_members.html')
\ No newline at end of file
+        self.assertTemplateUsed(response, 'club_members.html')
+
+class TestImportMembersView(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        self.client = Client()
+        self.club = createTestClub()
+        logTestClientIn(self.client)
+        Membership.addMember(self.club, self.client.user)
+        self.importMembers_url = reverse('import_members', kwargs={'club':self.club.pk})
+
+    def test_importMembersView_GET(self):
+        response = self.client.get(self.importMembers_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'import_members.html')
+
+    def test_importMembersView_POST(self):
+        """
+            Testinhalt:
+            Nach dem Hochladen sollte der Bericht angezeigt werden.
+            Bereits vorhandene Mitglieder sollten als Fehler gemeldet werden.
+        """
+        data = SimpleUploadedFile('mitglieder.csv', b'email\ntestuser@email.de\n')
+        response = self.client.post(self.importMembers_url, {'data': data})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report'].created, 0)
+        self.assertEqual(len(response.context['report'].errors), 1)
+
+class TestClubMembersView(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        MemberState.objects.get_or_create(stateID=0, state='Anfrage')
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        self.trainer = MemberFunction.objects.get_or_create(functionID=1, function='Trainer')[0]
+        self.client = Client()
+        self.club = createTestClub()
+        logTestClientIn(self.client)
+        Membership.addMember(self.club, self.client.user) # Nachname des Testnutzers: 'Nachname'
+        self.clubMembers_url = reverse('club_members', kwargs={'club':self.club.pk})
+
+    def createMembers(self, count, prefix='Person'):
+        "Erstellt count nicht registrierte, aktive Mitglieder."
+        Membership.objects.bulk_create(
+            Membership(club=self.club, memberState_id=1, first_name='Vorname', last_name='%s%03d' % (prefix, i))
+            for i in range(count)
+        )
+
+    def names(self, response):
+        return [membership.display_last_name for membership in response.context['memberships']]
+
+    def test_sort_and_filter(self):
+        """
+            Testinhalt:
+            Registrierte und nicht registrierte Mitglieder sollten gemeinsam nach Namen sortiert
+            und nach Name, Status und Funktion gefiltert werden.
+        """
+        self.createMembers(2)
+        Membership.objects.filter(last_name='Person001').update(memberFunction=self.trainer, memberState_id=0)
+
+        self.assertEqual(self.names(self.client.get(self.clubMembers_url)), ['Nachname', 'Person000', 'Person001'])
+        self.assertEqual(self.names(self.client.get(self.clubMembers_url, {'sort': '-name'})), ['Person001', 'Person000', 'Nachname'])
+        self.assertEqual(self.names(self.client.get(self.clubMembers_url, {'q': 'person'})), ['Person000', 'Person001'])
+        self.assertEqual(self.names(self.client.get(self.clubMembers_url, {'state': 0})), ['Person001'])
+        self.assertEqual(self.names(self.client.get(self.clubMembers_url, {'function': 1})), ['Person001'])
+        # ungültige Parameter werden ignoriert
+        self.assertEqual(len(self.names(self.client.get(self.clubMembers_url, {'sort': 'iban', 'state': 99}))), 3)
+
+    def test_pagination_query_count(self):
+        """
+            Testinhalt:
+            Die Anzahl der Abfragen pro Seite sollte unabhängig von der Anzahl der Mitglieder sein.
+        """
+        with patch('members.views.MEMBERS_PER_PAGE', 5):
+            self.createMembers(3)
+            # Zwischenspeicher der Nachschlagetabellen und der Navigation füllen, die Zeilen (andere Sortierung) nicht
+            self.client.get(self.clubMembers_url, {'sort': 'name'})
+            with CaptureQueriesContext(connection) as few:
+                self.client.get(self.clubMembers_url)
+
+            self.createMembers(20, prefix='Weitere')
+            with CaptureQueriesContext(connection) as many:
+                response = self.client.get(self.clubMembers_url, {'page': 2})
+
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(len(self.names(response)), 5)
+        self.assertEqual(response.context['memberships'].paginator.num_pages, 5)
+
+    def test_rows_cached(self):
+        """
+            Testinhalt:
+            Unveränderte Zeilen sollten aus dem Cache kommen, ohne die Mitgliedschaften abzufragen.
+            Nach einer Änderung im Verein sollten sie neu gerendert werden.
+        """
+        self.createMembers(3)
+        def rowQueries(queries):
+            # die Anzahl für die Seiten wird weiterhin abgefragt
+            return [query for query in queries if '"display_last_name" ASC' in query['sql'] and not query['sql'].startswith('SELECT COUNT')]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.clubMembers_url)
+        self.assertEqual(len(rowQueries(queries)), 1)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.clubMembers_url)
+        self.assertEqual(len(rowQueries(queries)), 0)
+        self.assertNotContains(response, 'Neu')
+
+        Membership.objects.create(club=self.club, memberState_id=1, last_name='Neu')
+        self.assertContains(self.client.get(self.clubMembers_url), 'id="nachname_2">Neu<')
+
+    def test_delete_only_own_club(self):
+        """
+            Testinhalt:
+            Über die Mitgliederübersicht sollten nur Mitgliedschaften des eigenen Vereins gelöscht werden.
+        """
+        otherClub = createTestClub(clubname='andererVerein')
+        foreign = Membership.objects.create(club=otherClub, memberState_id=1, last_name='Fremd')
+        own = Membership.objects.create(club=self.club, memberState_id=1, last_name='Eigen')
+
+        self.client.post(self.clubMembers_url, {'membership': foreign.pk})
+        self.client.post(self.clubMembers_url, {'membership': own.pk})
+
+        self.assertTrue(Membership.objects.filter(pk=foreign.pk).exists())
+        self.assertFalse(Membership.objects.filter(pk=own.pk).exists())
+
+class TestEditMemberView(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        self.board = MemberFunction.objects.get_or_create(functionID=FUNCTION_BOARD, function='Vorstand')[0]
+        self.administrator = MemberFunction.objects.get_or_create(functionID=FUNCTION_ADMINISTRATOR, function='Administrator')[0]
+        self.client = Client()
+        self.club = createTestClub()
+        logTestClientIn(self.client)
+        self.membership = Membership.addMember(self.club, self.client.user)
+        self.other = Membership.objects.create(club=self.club, memberState_id=1, last_name='Anderer')
+        self.editOwn_url = reverse('edit_member', kwargs={'club': self.club.pk, 'memship': self.membership.pk})
+        self.editOther_url = reverse('edit_member', kwargs={'club': self.club.pk, 'memship': self.other.pk})
+
+    def test_member_cannot_edit_functions(self):
+        """
+            Testinhalt:
+            Ein Mitglied ohne Funktion wie Vorstand sollte sich keine Funktion (z.B. Administrator) geben können.
+        """
+        response = self.client.post(self.editOwn_url, {'memberFunction': self.administrator.pk})
+        self.assertRedirects(response, reverse('club_members', kwargs={'club': self.club.pk}), fetch_redirect_response=False)
+        self.membership.refresh_from_db()
+        self.assertIsNone(self.membership.memberFunction)
+
+    def test_board_edits_functions(self):
+        """
+            Testinhalt:
+            Der Vorstand sollte die Funktionen anderer Mitglieder ändern können.
+        """
+        Membership.objects.filter(pk=self.membership.pk).update(memberFunction=self.board)
+        self.client.post(self.editOther_url, {'memberFunction': self.administrator.pk})
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.memberFunction, self.administrator)
@@ -1,8 +1,10 @@
 # Author: Tobias
 from django.urls import path
-from members.views import clubMembersView, editMemberView
+from members.views import clubMembersView, editMemberView, exportMembersView, importMembersView
 
 urlpatterns = [
     path('<int:club>/members/', clubMembersView, name='club_members'),
     path('<int:club>/edit/<int:memship>', editMemberView, name='edit_member'),
+    path('<int:club>/import/', importMembersView, name='import_members'),
+    path('<int:club>/export/', exportMembersView, name='export_members'),
 ]
\ No newline at end of file
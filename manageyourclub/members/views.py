@@ -1,20 +1,30 @@
 # Author: Tobias
+import logging
+
 from django.shortcuts import render, redirect
 from clubs.models import ClubModel
-from members.forms import AddClubMemberForm, editMemberForm
-from members.models import Membership
+from django.core.paginator import Paginator
+from members.forms import AddClubMemberForm, ImportMembersForm, MemberListFilterForm, editMemberForm
+from members.exports import MembershipExportError, csv_response, xlsx_response
+from members.imports import MembershipImportError, import_memberships, read_rows
+from members.models import (
+    Membership, club_has_member, club_member_may_edit_functions, club_member_may_export,
+)
 from users.models import CustomUser
 from django.contrib import messages
 
 
 # Create your views here.
 
+MEMBERS_PER_PAGE = 50
+
+logger = logging.getLogger(__name__)
+
 # Tutorial genutzt https://www.youtube.com/watch?v=F5mRW0jo-U4&t=1358s (ab 2:14:16)
 def clubMembersView(request, club):
     club = ClubModel.objects.get(pk=club)
 
     if request.method == 'POST': # Wird nach klicken auf Mitglied Löschen ausgeführt
-        print("POST wird ausgeführt.")
         form = AddClubMemberForm(request.POST)
         if form.is_valid():
             eMail = form.cleaned_data['eMail']
@@ -29,27 +39,58 @@ def clubMembersView(request, club):
                 messages.error(request, 'Es existiert kein Benutzer mit der E-Mail-Adresse "'+eMail+'".')
         else:
             membership = request.POST.get('membership')
-            if(Membership.objects.filter(pk=membership).exists()):
+            if(Membership.objects.filter(pk=membership, club=club).exists()):
                 membership = Membership.objects.get(pk=membership)
-                print('DELETE ' + str(membership.delete()))
+                number = membership.pk
+                membership.delete()
+                logger.info('Mitgliedschaft %s aus Verein %s gelöscht von Benutzer %s', number, club.pk, request.user.pk)
         return redirect('club_members', club.pk)
 
     form = AddClubMemberForm()
     #deleteMemberForm = DeleteClubMemberForm()
-    memberships = Membership.objects.filter(club=club)
-        
+    # Filter, Sortierung und Seiten werden in der Datenbank berechnet,
+    # pro Seite werden nur die Anzahl und die angezeigten Mitgliedschaften (mit JOINs) abgefragt
+    filterForm = MemberListFilterForm(request.GET)
+    memberships = filterForm.apply(Membership.objects.filter(club=club))
+    page = Paginator(memberships, MEMBERS_PER_PAGE).get_page(request.GET.get('page'))
+
+    # GET-Parameter ohne Seite, damit Filter und Sortierung beim Blättern erhalten bleiben
+    query = request.GET.copy()
+    query.pop('page', None)
+
+    # Links der Spaltenüberschriften: erneutes Klicken kehrt die Sortierung um
+    currentSort = filterForm.cleaned_data.get('sort') or 'name'
+    sortQueries = {}
+    for key in MemberListFilterForm.SORTS:
+        params = query.copy()
+        params['sort'] = '-' + key if currentSort == key else key
+        sortQueries[key] = params.urlencode()
+
     context = {
         'form': form,
         #'delMemForm': deleteMemberForm,
         'club': club,
-        'memberships': memberships,
+        'memberships': page,
+        'filterForm': filterForm,
+        'query': query.urlencode(),
+        'sortQueries': sortQueries,
+        'mayExport': club_member_may_export(club, request.user),
     }
     return render(request, 'club_members.html', context)
 
 # Tutorial genutzt: https://www.geeksforgeeks.org/initial-form-data-django-forms/
 def editMemberView(request, club, memship):
+    """
+    Ändert die Funktion einer Mitgliedschaft. Nur Mitglieder mit einer Funktion aus EDIT_FUNCTIONS (z.B. Vorstand)
+    dürfen Funktionen vergeben, sonst könnte sich jedes Mitglied z.B. die Funktion Kassenwart für den Export geben.
+    """
+    if not request.user.is_authenticated:
+        return redirect('login')
+
     club = ClubModel.objects.get(pk=club)
-    memship = Membership.objects.get(pk=memship)
+    if not club_member_may_edit_functions(club, request.user):
+        return redirect('club_members', club.pk)
+    memship = Membership.objects.get(pk=memship, club=club)
     
     initial = {
         'memberFunction':memship.memberFunction,
@@ -69,4 +110,60 @@ def editMemberView(request, club, memship):
             form.saveChanges(memship)
         return redirect('club_members', club.pk)
 
-    return render(request, 'edit_member.html', context)
\ No newline at end of file
+    return render(request, 'edit_member.html', context)
+
+def importMembersView(request, club):
+    """
+    Importiert eine hochgeladene Mitgliederliste in den Verein.
+    Nach dem Import wird ein Bericht mit der Anzahl der Mitgliedschaften und den Fehlern pro Zeile angezeigt.
+    """
+    if not request.user.is_authenticated:
+        return redirect('login')
+
+    club = ClubModel.objects.get(pk=club)
+    if not club_has_member(club, request.user):
+        return redirect('home')
+
+    report = None
+    if request.method == 'POST':
+        form = ImportMembersForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                report = import_memberships(
+                    club,
+                    read_rows(form.cleaned_data['data']),
+                    dry_run=form.cleaned_data['dry_run'],
+                )
+            except MembershipImportError as error:
+                form.add_error('data', str(error))
+    else:
+        form = ImportMembersForm()
+
+    context = {
+        'form': form,
+        'club': club,
+        'report': report,
+    }
+    return render(request, 'import_members.html', context)
+
+def exportMembersView(request, club):
+    """
+    Gibt die Mitgliederliste des Vereins inklusive Zahlungsdaten und Antworten aus dem Antragsformular
+    als CSV- (Standard) oder XLSX-Datei (GET-Parameter format=xlsx) zurück, siehe members/exports.py.
+    Wegen der Zahlungsdaten dürfen nur Mitglieder mit einer Funktion aus EXPORT_FUNCTIONS (z.B. Kassenwart) exportieren.
+    """
+    if not request.user.is_authenticated:
+        return redirect('login')
+
+    club = ClubModel.objects.get(pk=club)
+    if not club_member_may_export(club, request.user):
+        return redirect('home')
+
+    filename = 'mitglieder_%d' % club.pk
+    if request.GET.get('format') == 'xlsx':
+        try:
+            return xlsx_response(club, filename)
+        except MembershipExportError as error:
+            messages.error(request, str(error))
+            return redirect('club_members', club.pk)
+    return csv_response(club, filename)
@@ -0,0 +1,92 @@
+# Zwischenspeicher für die Antragsformulare der Vereine (RequestMembershipView).
+# Ohne Zwischenspeicher werden bei jeder Anfrage die Felder (FieldsListModel) abgefragt, mit
+# BaseDynamicForm.build_constructor_dict beschrieben und alle Felder und Widgets neu erzeugt.
+# Hier wird pro Verein einmal eine Formularklasse erzeugt, deren base_fields die fertigen Felder sind.
+# Eine Anfrage erzeugt nur noch eine Instanz dieser Klasse (Django kopiert dabei base_fields) und bindet die Daten.
+# Die Klasse hängt an der Version des Formulars (manageyourclub/versions.py, form_key), die bei jeder
+# Änderung an den Feldern des Vereins erhöht wird.
+# Ohne gemeinsamen Cache wird COMPILED_FORMS_TIMEOUT gekürzt, siehe LOCAL_CACHE_TIMEOUT in manageyourclub/versions.py.
+import threading
+import time
+from collections import OrderedDict
+
+from django_form_builder.forms import BaseDynamicForm
+
+from manageyourclub.versions import cache_timeout, form_version
+
+# Höchstens so viele Vereine werden pro Prozess vorgehalten, der am längsten nicht genutzte wird verdrängt
+COMPILED_FORMS_MAX_CLUBS = 256
+# Sekunden, die eine Klasse mit gemeinsamem Cache höchstens genutzt wird
+COMPILED_FORMS_TIMEOUT = 60 * 60
+
+# Feldtypen, die bei jeder Anfrage neu erzeugt werden müssen: das CAPTCHA erzeugt bei jedem Aufbau einen
+# neuen Wert, das Widget der Tabellenfelder (Formset) wird mit den gesendeten Daten aufgebaut.
+PER_REQUEST_FIELD_TYPES = frozenset((
+    'CaptchaField', 'CaptchaHiddenField', 'CustomCaptchaComplexField', 'CustomComplexTableField',
+))
+
+
+def compile_form(fields, name='MembershipRequestForm'):
+    """
+    Erzeugt aus den übergebenen Feldern (FieldsListModel) eine Unterklasse von BaseDynamicForm mit fertigen base_fields.
+    Gibt None zurück, wenn ein Feld bei jeder Anfrage neu erzeugt werden muss (PER_REQUEST_FIELD_TYPES).
+    """
+    fields = list(fields)
+    if any(field.field_type in PER_REQUEST_FIELD_TYPES for field in fields):
+        return None
+    prototype = BaseDynamicForm.get_form(constructor_dict=BaseDynamicForm.build_constructor_dict(fields))
+    formClass = type(name, (BaseDynamicForm,), {'__module__': __name__})
+    formClass.base_fields = prototype.fields
+    return formClass
+
+
+class CompiledFormCache:
+    """
+    Hält pro Verein die mit compile_form erzeugte Klasse und die Version des Formulars, zu der sie gehört.
+    Ist die Version veraltet, werden die Felder mit einer Abfrage neu geladen.
+    """
+
+    def __init__(self, fieldModel, maxClubs=COMPILED_FORMS_MAX_CLUBS):
+        self.fieldModel = fieldModel
+        self.maxClubs = maxClubs
+        self._entries = OrderedDict() # Verein -> (Version, Klasse oder None, Zeitpunkt des Kompilierens)
+        self._lock = threading.Lock()
+
+    def form_class(self, club):
+        "Gibt die Formularklasse des Vereins zurück (None, wenn das Formular nicht vorkompiliert werden kann)."
+        clubId = getattr(club, 'pk', club)
+        # die Version wird vor den Feldern gelesen: ändert sich das Formular dazwischen, passt der Eintrag beim nächsten Mal nicht
+        version = form_version(clubId)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(clubId)
+            if entry is not None and entry[0] == version and now - entry[2] < cache_timeout(COMPILED_FORMS_TIMEOUT):
+                self._entries.move_to_end(clubId)
+                return entry[1]
+        formClass = compile_form(
+            self.fieldModel.objects.filter(club=clubId).order_by('ordering', 'pk'),
+            name='MembershipRequestForm%s' % clubId,
+        )
+        with self._lock:
+            self._entries[clubId] = (version, formClass, now)
+            self._entries.move_to_end(clubId)
+            while len(self._entries) > self.maxClubs:
+                self._entries.popitem(last=False)
+        return formClass
+
+    def get_form(self, club, data=None, files=None):
+        """
+        Gibt das Antragsformular des Vereins zurück, mit data und files gebunden, falls übergeben.
+        Kann das Formular nicht vorkompiliert werden, wird es wie bisher aus den Feldern aufgebaut.
+        """
+        formClass = self.form_class(club)
+        if formClass is not None:
+            return formClass(data=data, files=files)
+        fields = self.fieldModel.objects.filter(club=getattr(club, 'pk', club)).order_by('ordering', 'pk')
+        return BaseDynamicForm.get_form(
+            constructor_dict=BaseDynamicForm.build_constructor_dict(fields), data=data, files=files,
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
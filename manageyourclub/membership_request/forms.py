@@ -5,7 +5,8 @@ from django import forms
 from membership_request.models import FieldsListModel
 from clubs.models import ClubDataModel
 from members.models import Membership
-from users.models import Gender
+from users.models import Gender, genders
+from manageyourclub.lookups import CachedModelChoiceField
 
 
 class AddFieldForm(forms.ModelForm):
@@ -76,7 +77,7 @@ class AddFileForm(forms.Form):
 class UnregisteredMembershipForm(forms.ModelForm):
     #Autor: Max Rosemeier
     #Formular für Standard Membership Formularfeldern bei nicht registrierten Bewerbern
-    gender = forms.ModelChoiceField(label='Geschlecht', queryset=Gender.objects.all())
+    gender = CachedModelChoiceField(label='Geschlecht', cache=genders)
     streetAddress = forms.CharField(max_length=20, label='Straße')
     houseNumber = forms.CharField(max_length=5, label='Hausnummer')
     postcode_id = forms.IntegerField(max_value=99999, min_value=0, label='PLZ')
@@ -0,0 +1,112 @@
+# Misst, wie lange der Aufbau des Antragsformulars (RequestMembershipView) für unterschiedlich viele Felder dauert:
+#   python manage.py benchmark_membership_form --fields 5,50,200 --repeat 50
+# Verglichen werden der bisherige Aufbau (Felder abfragen, build_constructor_dict, alle Felder neu erzeugen)
+# und das vorkompilierte Formular (membership_request/compiled.py), jeweils ungebunden (GET) und mit Daten (POST).
+# Danach wird das Auslesen der Antworten eines gültigen Antrags verglichen: getCustomFormData (POST-Daten als JSON,
+# führende Schlüssel abschneiden) und customAnswers (cleaned_data anhand der Felder des Formulars).
+# Die Testdaten werden am Ende zurückgerollt.
+import json
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.http import QueryDict
+
+from clubs.models import ClubModel, addresses
+from django_form_builder.forms import BaseDynamicForm
+from membership_request.compiled import CompiledFormCache
+from membership_request.models import FieldsListModel
+from membership_request.utils import customAnswers, getCustomFormData
+
+# Feldtypen des Antragsformulars, die der Reihe nach vergeben werden: (field_type, value, Antworten im POST)
+FIELD_TYPES = (
+    ('CustomCharField', '', ['Text']),
+    ('CustomEmailField', '', ['bewerber@example.com']),
+    ('CustomSelectBoxField', 'Ja;Nein;Vielleicht', ['Ja']),
+    ('CustomRadioBoxField', 'Anfänger;Fortgeschritten;Profi', ['Profi']),
+    ('CustomMultiChoiceField', 'Montag;Dienstag;Mittwoch;Donnerstag;Freitag', ['Montag', 'Mittwoch']),
+    ('BaseDateField', '', ['2000-01-31']),
+)
+
+# Felder des Standardformulars eines registrierten Bewerbers, die getCustomFormData abschneidet
+STANDARD_FIELDS = ('csrfmiddlewaretoken', 'iban', 'bank_account_owner', 'paymentMethod')
+
+
+class Rollback(Exception):
+    "Wird ausgelöst, um die Testdaten am Ende zurückzurollen."
+
+
+class Command(BaseCommand):
+    help = 'Gibt die Zeit für den Aufbau des Antragsformulars mit und ohne vorkompiliertes Formular aus.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fields', default='5,50,200', help='Anzahl der Felder, mit Kommas getrennt.')
+        parser.add_argument('--repeat', type=int, default=50, help='Wiederholungen pro Messung.')
+
+    def handle(self, *args, **options):
+        counts = [count for count in options['fields'].split(',') if count]
+        if not counts or not all(count.isdigit() for count in counts):
+            raise CommandError('--fields muss eine Liste von Zahlen sein, z.B. 5,50,200.')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('%8s %-10s %14s %14s %10s' % ('Felder', 'Anfrage', 'bisher', 'vorkompiliert', 'Faktor')))
+        try:
+            with transaction.atomic():
+                clubs = [(self.seed(count), count) for count in map(int, counts)]
+                for club, count in clubs:
+                    self.benchmark(club, count, options['repeat'])
+                self.stdout.write('')
+                self.stdout.write(self.style.MIGRATE_HEADING('%8s %-10s %14s %14s %10s' % ('Felder', 'Antworten', 'bisher', 'cleaned_data', 'Faktor')))
+                for club, count in clubs:
+                    self.benchmark_answers(club, count, options['repeat'])
+                raise Rollback()
+        except Rollback:
+            addresses.clear()
+            cache.clear()
+            self.stdout.write('Testdaten wurden zurückgerollt.')
+
+    def seed(self, count):
+        "Legt einen Verein mit count Feldern an."
+        address = addresses.intern('Benchmarkstraße', '1', 12345, 'Benchmarkstadt')
+        club = ClubModel.objects.create(clubname=('benchmark%d_%d' % (int(time.time()), count))[:30], yearOfFoundation=1900, address=address)
+        FieldsListModel.objects.bulk_create(
+            FieldsListModel(club=club, name='Feld %d' % i, field_type=FIELD_TYPES[i % len(FIELD_TYPES)][0],
+                            value=FIELD_TYPES[i % len(FIELD_TYPES)][1], is_required=i % 2 == 0,
+                            ordering=(i + 1) * FieldsListModel.RANK_GAP)
+            for i in range(count)
+        )
+        return club
+
+    def measure(self, build, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            build()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def benchmark(self, club, count, repeat):
+        data = {'feld_0': 'Wert'}
+        forms = CompiledFormCache(FieldsListModel)
+        forms.form_class(club) # einmal kompilieren, danach wird nur noch gebunden
+
+        def uncompiled(data=None):
+            fields = FieldsListModel.objects.filter(club=club)
+            return BaseDynamicForm.get_form(constructor_dict=BaseDynamicForm.build_constructor_dict(fields), data=data)
+
+        for requestName, requestData in (('GET', None), ('POST', data)):
+            before = self.measure(lambda: uncompiled(requestData), repeat)
+            after = self.measure(lambda: forms.get_form(club, data=requestData), repeat)
+            self.stdout.write('%8d %-10s %11.3f ms %11.3f ms %9.1fx' % (count, requestName, before, after, before / after if after else 0))
+
+    def benchmark_answers(self, club, count, repeat):
+        post = QueryDict(mutable=True)
+        for name in STANDARD_FIELDS:
+            post[name] = 'Standard'
+        for i in range(count):
+            post.setlist('feld_%d' % i, FIELD_TYPES[i % len(FIELD_TYPES)][2])
+        form = CompiledFormCache(FieldsListModel).get_form(club, data=post)
+        if not form.is_valid():
+            raise CommandError('Das Testformular ist ungültig: %s' % form.errors.as_text())
+
+        before = self.measure(lambda: getCustomFormData(json.dumps(post), True), repeat)
+        after = self.measure(lambda: customAnswers(form), repeat)
+        self.stdout.write('%8d %-10s %11.3f ms %11.3f ms %9.1fx' % (count, 'JSON', before, after, before / after if after else 0))
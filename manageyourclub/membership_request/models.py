@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from sqlalchemy import JSON, false
 
 from django_form_builder.dynamic_fields import get_fields_types
@@ -8,6 +8,8 @@ from django.db.models import Max
 
 from members.models import Membership
 from clubs.models import ClubModel
+from manageyourclub.versions import invalidate_form
+from .compiled import CompiledFormCache
 
 class FieldsListModel(DynamicFieldMap):
     # Übernommen von Django-Form-Builder
@@ -20,25 +22,74 @@ class FieldsListModel(DynamicFieldMap):
     club = models.ForeignKey(ClubModel, on_delete=models.CASCADE)
     DynamicFieldMap._meta.get_field('field_type').choices = get_fields_types()
 
-    
+    # ordering ist ein Rang mit Lücken von RANK_GAP: ein Feld wird zwischen seine Nachbarn einsortiert,
+    # ohne die anderen Felder zu verschieben. Erst wenn zwischen zwei Nachbarn kein Platz mehr ist,
+    # werden die Ränge des Vereins mit rebalance neu verteilt. Angezeigt und eingegeben wird die Stelle (1, 2, 3, ...).
+    RANK_GAP = 1024
+
+    class Meta(DynamicFieldMap.Meta):
+        indexes = [models.Index(fields=['club', 'ordering'], name='fields_list_club_order_idx')]
+
     @staticmethod
     def create(club,name,type,value,required,help_text,preText,ordering):
         #Autor: Max
         #Methode zum hinzufügen von Formularfeldern. Kann mit FieldsListModel.addFormField(club=...) angesprochen werden
-        if not FieldsListModel.objects.filter(club=club,name=name,field_type=type,value=value,is_required=required,help_text=help_text,pre_text=preText,ordering=ordering).exists():
-            #Ist die gewählte Stelle des Feldes im Formular schon besetzt, werden die restlichen felder nach hinten verschoben  
-            if FieldsListModel.objects.filter(club=club,ordering=ordering).exists():
-                ordering__max = FieldsListModel.objects.latest('ordering').ordering
+        #ordering ist die Stelle des Feldes im Formular (1 = erstes Feld), die folgenden Felder rücken nach hinten
+        if not FieldsListModel.objects.filter(club=club,name=name,field_type=type,value=value,is_required=required,help_text=help_text,pre_text=preText).exists():
+            with transaction.atomic():
+                rank = FieldsListModel.rankAt(club, ordering)
+                return FieldsListModel.objects.create(club=club,name=name,field_type=type,value=value,is_required=required,help_text=help_text,pre_text=preText,ordering=rank)
+        return None
+
+    @staticmethod
+    def rankAt(club, position, exclude=None):
+        """
+        Gibt den Rang für ein Feld zurück, das an der übergebenen Stelle (1 = erstes Feld) des Formulars stehen soll.
+        Es werden nur die beiden Nachbarn abgefragt. Ist zwischen ihnen kein Platz, werden die Ränge neu verteilt.
+        exclude ist ein Feld, das nicht mitgezählt wird (das Feld, das verschoben wird).
+        """
+        position = max(int(position or 1), 1)
+        fields = FieldsListModel.objects.filter(club=club).order_by('ordering', 'pk')
+        if exclude is not None:
+            fields = fields.exclude(pk=exclude.pk)
+        if position > 1:
+            neighbours = list(fields.values_list('ordering', flat=True)[position - 2:position])
+            before, after = (neighbours + [None])[:2] if neighbours else (None, None)
+            if before is None: # Stelle hinter dem letzten Feld
+                before = fields.values_list('ordering', flat=True).last()
+        else:
+            before, after = None, fields.values_list('ordering', flat=True).first()
+
+        if after is None:
+            return (before or 0) + FieldsListModel.RANK_GAP
+        lower = -1 if before is None else before
+        if after - lower >= 2:
+            return (lower + after) // 2
+        FieldsListModel.rebalance(club, exclude)
+        return FieldsListModel.rankAt(club, position, exclude)
+
+    @staticmethod
+    def rebalance(club, exclude=None):
+        "Verteilt die Ränge der Felder des Vereins in gleichmäßigen Abständen neu (ein UPDATE)."
+        fields = list(FieldsListModel.objects.filter(club=club).exclude(pk=getattr(exclude, 'pk', None)).order_by('ordering', 'pk'))
+        for index, field in enumerate(fields, 1):
+            field.ordering = index * FieldsListModel.RANK_GAP
+        FieldsListModel.objects.bulk_update(fields, ['ordering'])
+        # bulk_update löst kein post_save aus
+        invalidate_form(getattr(club, 'pk', club))
+
+    def move(self, position):
+        "Verschiebt das Feld an die übergebene Stelle des Formulars. Gespeichert wird nur dieses Feld (außer beim Neuverteilen)."
+        with transaction.atomic():
+            self.ordering = FieldsListModel.rankAt(self.club_id, position, exclude=self)
+            self.save(update_fields=['ordering'])
+        return self
 
-                for i in range(ordering__max, ordering-1, -1):
-                    FieldsListModel.objects.filter(club=club,ordering=i).update(ordering=i+1)
 
-            newField  = FieldsListModel.objects.create(club=club,name=name,field_type=type,value=value,is_required=required,help_text=help_text,pre_text=preText,ordering=ordering)
-            newField.save()
-            return newField
-        return None
 
 
+# vorkompilierte Antragsformulare der Vereine, siehe membership_request/compiled.py
+membership_forms = CompiledFormCache(FieldsListModel)
 
 
 class CustomMembershipData(SavedFormContent):
@@ -0,0 +1,110 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from clubs.tests.test_views import createTestClub
+from manageyourclub.versions import LOCAL_CACHE_TIMEOUT
+from membership_request.compiled import CompiledFormCache
+from membership_request.models import FieldsListModel
+from membership_request.tests.test_models import createTestField
+
+
+class TestCompiledFormCache(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        cache.clear()
+        self.club = createTestClub()
+        self.otherClub = createTestClub(clubname='andererVerein')
+        createTestField(self.club, 'Vorname', 1)
+        FieldsListModel.create(self.club, 'Erfahrung', 'CustomSelectBoxField', 'Anfänger;Profi', True, '', '', 2)
+        createTestField(self.otherClub, 'Fremd', 1)
+        self.forms = CompiledFormCache(FieldsListModel)
+
+    def test_compiled_once(self):
+        """
+            Testinhalt:
+            Das Formular sollte nur beim ersten Aufruf aus den Feldern aufgebaut werden,
+            danach sollte nur noch die Version des Formulars im Cache nachgesehen werden.
+        """
+        with self.assertNumQueries(1):
+            form = self.forms.get_form(self.club)
+        self.assertEqual(list(form.fields), ['vorname', 'erfahrung'])
+        with self.assertNumQueries(0):
+            form = self.forms.get_form(self.club, data={'vorname': 'Max', 'erfahrung': 'Profi'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(list(self.forms.get_form(self.otherClub).fields), ['fremd'])
+
+    def test_instances_independent(self):
+        """
+            Testinhalt:
+            Jede Anfrage sollte eigene Felder erhalten, Änderungen an einem Formular betreffen die anderen nicht.
+        """
+        first = self.forms.get_form(self.club)
+        first.fields['vorname'].widget.attrs['class'] = 'geändert'
+        second = self.forms.get_form(self.club, data={})
+        self.assertNotIn('class', second.fields['vorname'].widget.attrs)
+        self.assertFalse(second.is_valid())
+        self.assertIn('erfahrung', second.errors)
+
+    def test_invalidated_on_change(self):
+        """
+            Testinhalt:
+            Nach dem Anlegen, Verschieben oder Löschen eines Feldes sollte das Formular neu aufgebaut werden.
+        """
+        self.forms.get_form(self.club)
+        with self.captureOnCommitCallbacks(execute=True):
+            createTestField(self.club, 'Nachname', 1)
+        self.assertEqual(list(self.forms.get_form(self.club).fields), ['nachname', 'vorname', 'erfahrung'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FieldsListModel.objects.get(club=self.club, name='Nachname').move(3)
+        self.assertEqual(list(self.forms.get_form(self.club).fields), ['vorname', 'erfahrung', 'nachname'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FieldsListModel.objects.get(club=self.club, name='Erfahrung').delete()
+        self.assertEqual(list(self.forms.get_form(self.club).fields), ['vorname', 'nachname'])
+
+    def test_max_age(self):
+        """
+            Testinhalt:
+            Ohne gemeinsamen Cache sollte eine Klasse nach LOCAL_CACHE_TIMEOUT Sekunden neu aufgebaut werden,
+            weil andere Prozesse die Version des Formulars ändern können, ohne dass dieser Prozess es sieht.
+        """
+        formClass = self.forms.form_class(self.club)
+        FieldsListModel.objects.filter(club=self.club, name='Vorname').update(name='Nachname') # ohne Signal
+        self.assertIs(self.forms.form_class(self.club), formClass)
+        later = time.monotonic() + LOCAL_CACHE_TIMEOUT + 1
+        with mock.patch('membership_request.compiled.time.monotonic', return_value=later):
+            self.assertEqual(list(self.forms.get_form(self.club).fields), ['nachname', 'erfahrung'])
+
+    def test_per_request_fields(self):
+        """
+            Testinhalt:
+            Enthält das Formular ein CAPTCHA, sollte es bei jeder Anfrage neu aufgebaut werden.
+        """
+        FieldsListModel.create(self.club, 'Captcha', 'CustomCaptchaComplexField', '', True, '', '', 3)
+        self.assertIsNone(self.forms.form_class(self.club))
+        self.assertIn('vorname', self.forms.get_form(self.club).fields)
+
+
+class TestBenchmarkMembershipForm(TestCase):
+
+    def test_benchmark(self):
+        """
+            Testinhalt:
+            Für jede Anzahl an Feldern sollten GET, POST und das Auslesen der Antworten gemessen
+            und die Testdaten danach entfernt werden.
+        """
+        out = StringIO()
+        call_command('benchmark_membership_form', fields='5,50', repeat=1, stdout=out)
+
+        lines = [line.split() for line in out.getvalue().splitlines()]
+        self.assertEqual([line[:2] for line in lines if line[1:2] in (['GET'], ['POST'])],
+                         [['5', 'GET'], ['5', 'POST'], ['50', 'GET'], ['50', 'POST']])
+        self.assertEqual([line[:2] for line in lines if line[1:2] == ['JSON']], [['5', 'JSON'], ['50', 'JSON']])
+        self.assertFalse(FieldsListModel.objects.exists())
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from clubs.tests.test_views import createTestClub, logTestClientIn
+from members.models import Membership, MemberState
+from membership_request.models import FieldsListModel
+
+
+def createTestField(club, name, ordering):
+    return FieldsListModel.create(club, name, 'CustomCharField', '', False, '', '', ordering)
+
+
+def fieldNames(club):
+    return list(FieldsListModel.objects.filter(club=club).values_list('name', flat=True))
+
+
+class TestFieldOrdering(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        cache.clear()
+        self.club = createTestClub()
+        self.otherClub = createTestClub(clubname='andererVerein')
+        for position, name in enumerate(['A', 'B', 'C'], 1):
+            createTestField(self.club, name, position)
+        createTestField(self.otherClub, 'Fremd', 1)
+
+    def test_insert_between(self):
+        """
+            Testinhalt:
+            Ein neues Feld sollte zwischen seine Nachbarn einsortiert werden, ohne andere Felder zu ändern.
+        """
+        ranks = dict(FieldsListModel.objects.filter(club=self.club).values_list('name', 'ordering'))
+        # SAVEPOINT, Nachbarn, INSERT, RELEASE SAVEPOINT (plus Prüfung auf doppelte Felder)
+        with self.assertNumQueries(5):
+            createTestField(self.club, 'Neu', 2)
+        self.assertEqual(fieldNames(self.club), ['A', 'Neu', 'B', 'C'])
+        self.assertEqual(dict(FieldsListModel.objects.filter(club=self.club).exclude(name='Neu').values_list('name', 'ordering')), ranks)
+        self.assertEqual(fieldNames(self.otherClub), ['Fremd'])
+
+    def test_insert_first_and_after_end(self):
+        """
+            Testinhalt:
+            Stelle 1 sollte vor das erste Feld sortieren, eine Stelle hinter dem Ende ans Ende.
+        """
+        createTestField(self.club, 'Erstes', 1)
+        createTestField(self.club, 'Letztes', 99)
+        self.assertEqual(fieldNames(self.club), ['Erstes', 'A', 'B', 'C', 'Letztes'])
+
+    def test_move(self):
+        """
+            Testinhalt:
+            Beim Verschieben sollte nur das verschobene Feld gespeichert werden.
+        """
+        field = FieldsListModel.objects.get(club=self.club, name='C')
+        # SAVEPOINT, Nachbarn, UPDATE, RELEASE SAVEPOINT
+        with self.assertNumQueries(4):
+            field.move(1)
+        self.assertEqual(fieldNames(self.club), ['C', 'A', 'B'])
+        FieldsListModel.objects.get(club=self.club, name='C').move(3)
+        self.assertEqual(fieldNames(self.club), ['A', 'B', 'C'])
+
+    def test_rebalance_dense_ranks(self):
+        """
+            Testinhalt:
+            Liegen die Ränge ohne Lücke nebeneinander (z.B. alte Daten 1, 2, 3), sollten sie neu verteilt werden.
+        """
+        for rank, name in enumerate(['A', 'B', 'C'], 1):
+            FieldsListModel.objects.filter(club=self.club, name=name).update(ordering=rank)
+        createTestField(self.club, 'Neu', 2)
+        self.assertEqual(fieldNames(self.club), ['A', 'Neu', 'B', 'C'])
+        ranks = list(FieldsListModel.objects.filter(club=self.club).values_list('ordering', flat=True))
+        self.assertEqual(len(set(ranks)), 4)
+        self.assertEqual(list(FieldsListModel.objects.filter(club=self.otherClub).values_list('ordering', flat=True)), [FieldsListModel.RANK_GAP])
+
+
+class TestMoveFormFieldView(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        cache.clear()
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        self.client = Client()
+        self.club = createTestClub()
+        logTestClientIn(self.client)
+        for position, name in enumerate(['A', 'B'], 1):
+            createTestField(self.club, name, position)
+        self.field = FieldsListModel.objects.get(club=self.club, name='B')
+        self.url = reverse('moveFormField', kwargs={'club': self.club.pk, 'field': self.field.pk})
+
+    def test_move_view(self):
+        """
+            Testinhalt:
+            Mitglieder sollten Felder verschieben können, andere Benutzer nicht.
+        """
+        response = self.client.post(self.url, {'position': 1}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        Membership.addMember(self.club, self.client.user)
+        response = self.client.post(self.url, {'position': 1}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['fields'], [self.field.pk, FieldsListModel.objects.get(name='A').pk])
+        response = self.client.post(self.url, {'position': 2})
+        self.assertRedirects(response, reverse('showFormFieldsView', kwargs={'club': self.club.pk}), fetch_redirect_response=False)
+        self.assertEqual(fieldNames(self.club), ['A', 'B'])
@@ -0,0 +1,45 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from clubs.tests.test_views import createTestClub
+from membership_request.models import FieldsListModel, membership_forms
+from membership_request.tests.test_models import createTestField
+from membership_request.utils import customAnswers
+
+
+class TestCustomAnswers(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        cache.clear()
+        membership_forms.clear()
+        self.club = createTestClub()
+        createTestField(self.club, 'Anmerkung', 1)
+        FieldsListModel.create(self.club, 'Tage', 'CustomMultiChoiceField', 'Montag;Dienstag;Mittwoch', False, '', '', 2)
+        FieldsListModel.create(self.club, 'Geboren am', 'BaseDateField', '', False, '', '', 3)
+
+    def test_answers_from_cleaned_data(self):
+        """
+            Testinhalt:
+            Die Antworten sollten anhand der Felder des Formulars gelesen werden: Felder des Standardformulars
+            fehlen, Mehrfachauswahlen werden als Liste gespeichert und Sonderzeichen korrekt maskiert.
+        """
+        form = membership_forms.get_form(self.club, data={
+            'csrfmiddlewaretoken': 'x', 'iban': 'DE00', 'anmerkung': 'Er sagte "Hallo"\nund ging',
+            'tage': ['Montag', 'Mittwoch'], 'geboren_am': '2000-01-31',
+        })
+        self.assertTrue(form.is_valid())
+        self.assertEqual(json.loads(customAnswers(form)), {
+            'anmerkung': 'Er sagte "Hallo"\nund ging', 'tage': ['Montag', 'Mittwoch'], 'geboren_am': '2000-01-31',
+        })
+
+    def test_empty_answers(self):
+        """
+            Testinhalt:
+            Nicht ausgefüllte Felder sollten als leere Antwort gespeichert werden.
+        """
+        form = membership_forms.get_form(self.club, data={'tage': 'Dienstag'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(json.loads(customAnswers(form)), {'anmerkung': '', 'tage': ['Dienstag'], 'geboren_am': ''})
@@ -5,10 +5,13 @@ from .views import *
 urlpatterns = [
     path('addField/', FieldAdd, name='FieldViewOrAdd'),
     path('showMembershipFormFields/', showFormFieldsView, name='showFormFieldsView'),
+    path('<int:field>/moveField/', moveFormFieldView, name='moveFormField'),
     path('FileViewOrAdd/', FileAdd, name='FileViewOrAdd'), 
     path('showFormDataView/', showFormDataView, name='showFormDataView'),
     path('RequestMembershipView/', RequestMembershipView, name='RequestMembershipView'), 
     path('<int:request_data>/acceptRequestClub/', acceptRequestMembershipView, name='acceptRequestMembership'),
     path('<int:request_data>/declineRequestClub/', declineRequestMembershipView, name='declineRequestMembership'),
+    path('reviewRequests/', reviewRequestsView, name='reviewRequests'),
+    path('events/', membershipRequestEventsView, name='membershipRequestEvents'),
     path('<int:request_data>/showMembershipRequestToClubView/', showMembershipRequestToClubView, name='showMembershipRequestToClubView'),
 ]
\ No newline at end of file
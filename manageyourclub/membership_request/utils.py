@@ -1,6 +1,9 @@
 import json
 import os
 from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django_form_builder import dynamic_fields
 from users.models import CustomUser
 from users.models import Gender
 from clubs.models import AddressModel, PlaceModel
@@ -8,10 +11,50 @@ from members.models import Membership
 
 from manageyourclub.settings import BASE_DIR
 
+# Felder des Antragsformulars, die keine Antwort des Bewerbers enthalten
+NO_ANSWER_FIELDS = (dynamic_fields.CaptchaField, dynamic_fields.CaptchaHiddenField)
+
+
+def _answerValue(field, value):
+    #Wandelt einen Wert aus cleaned_data in einen Wert für JSON um
+    if getattr(field, 'is_formset', False):
+        #Tabellenfelder: eine Liste mit einem dict pro ausgefüllter Zeile
+        formset = field.widget.formset
+        if not formset:
+            return []
+        return [
+            {name: _answerValue(None, cell) for name, cell in form.cleaned_data.items()}
+            for form in formset.forms if getattr(form, 'cleaned_data', None)
+        ]
+    if value is None:
+        return ''
+    if isinstance(value, UploadedFile):
+        return value.name
+    if isinstance(value, (list, tuple)):
+        #Mehrfachauswahl
+        return [_answerValue(None, item) for item in value]
+    return value
+
+
+def customAnswers(customForm):
+    """
+    Gibt die Antworten eines gültigen Antragsformulars (customForm.is_valid()) als JSON zurück.
+    Die Felder und ihre Reihenfolge stammen aus dem Formular des Vereins (siehe membership_request/compiled.py),
+    die Werte aus cleaned_data. Schlüssel sind die Namen der Formularfelder (format_field_name), wie bei getCustomFormData.
+    Mehrfachauswahlen werden als Liste gespeichert, Tabellenfelder als Liste von dicts, Dateien mit ihrem Namen.
+    """
+    answers = {
+        name: _answerValue(field, customForm.cleaned_data.get(name))
+        for name, field in customForm.fields.items() if not isinstance(field, NO_ANSWER_FIELDS)
+    }
+    return json.dumps(answers, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
 def getCustomFormData(self, is_registered):
     #Autor: Max Rosemeier
     #schneidet aus den gesendeten Formulardaten die Custom Formulardaten
     #sodass keine redundante speicherung erfolgt
+    #Wird nicht mehr für neue Anträge genutzt (siehe customAnswers), nur noch zum Vergleich in benchmark_membership_form
 
     jsonData = json.loads(self)
     cuttedJson = '{'
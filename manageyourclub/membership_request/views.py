@@ -7,10 +7,16 @@ from django.contrib import messages
 from django_form_builder.utils import get_labeled_errors
 from django_form_builder.forms import BaseDynamicForm
 from django.shortcuts import render, redirect
+from django.http import HttpResponse, JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+import asyncio
 import json
+import time
 
 from .utils import *
 from members.models import Membership, club_has_member
+from notifications.models import MembershipEvent
 from .forms import *
 from .models import *
 from clubs.models import ClubModel, ClubDataModel
@@ -72,6 +78,35 @@ def showFormFieldsView(request,club):
     return render(request, 'show_Form_Fields.html', context)
 
 
+def moveFormFieldView(request, club, field):
+    """
+    Verschiebt ein Feld des Antragsformulars an eine andere Stelle (POST-Parameter position, 1 = erstes Feld),
+    z.B. per Drag and Drop. Gespeichert wird nur das verschobene Feld, siehe FieldsListModel.move.
+    Wird JSON angefragt, wird die neue Reihenfolge der Felder zurückgegeben, ansonsten wird zur Übersicht weitergeleitet.
+    """
+    user = request.user
+    wantsJson = 'application/json' in request.headers.get('Accept', '')
+
+    if not user.is_authenticated or not club_has_member(club, user):
+        #Berechtigungsprüfung
+        if wantsJson:
+            return JsonResponse({'error': 'Keine Berechtigung.'}, status=403)
+        return redirect('allclubs')
+
+    position = request.POST.get('position', '')
+    fieldObject = FieldsListModel.objects.filter(pk=field, club=club).first()
+    if request.method != 'POST' or fieldObject is None or not position.isdigit():
+        if wantsJson:
+            return JsonResponse({'error': 'Ungültige Anfrage.'}, status=400)
+        return redirect('showFormFieldsView', club)
+
+    fieldObject.move(int(position))
+
+    if wantsJson:
+        return JsonResponse({'fields': list(FieldsListModel.objects.filter(club=club).order_by('ordering', 'pk').values_list('pk', flat=True))})
+    return redirect('showFormFieldsView', club)
+
+
 def showFormDataView(request,club):
     #Autor: Max Rosemeier
     #Dieser View stellt eine Übersicht für die Hochgeladenen Dateien für einen Mitgliedschaftsantrag bereit
@@ -164,9 +199,8 @@ def RequestMembershipView(request, club):
 
     files = ClubDataModel.objects.filter(club = club)
     club = ClubModel.objects.get(id = club)
-    fields = FieldsListModel.objects.filter(club = club)
-    constructor_dict = BaseDynamicForm.build_constructor_dict(fields)       
-    customForm = BaseDynamicForm.get_form(constructor_dict=constructor_dict)
+    #Die Felder des Antragsformulars werden nur nach einer Änderung neu aufgebaut, siehe membership_request/compiled.py
+    customForm = membership_forms.get_form(club)
 
     if request.method == 'POST': 
     #Wird nach klicken auf Bestätigungsknopf ausgeführt
@@ -177,11 +211,7 @@ def RequestMembershipView(request, club):
         else:
             form = UnregisteredMembershipForm(request.POST)
 
-        customForm = BaseDynamicForm.get_form(constructor_dict=constructor_dict,
-                                                data=request.POST,
-                                                files=request.FILES,
-                                                remove_filefields=False,
-                                                remove_datafields=False)
+        customForm = membership_forms.get_form(club, data=request.POST, files=request.FILES)
 
 
         if form.is_valid() and customForm.is_valid():
@@ -205,8 +235,8 @@ def RequestMembershipView(request, club):
                 files=request.FILES
                 saveToMedia(files, membership.number)
                 
-                data=json.dumps(request.POST)
-                data = getCustomFormData(data,request.user.is_authenticated)
+                #Die Antworten werden anhand der Felder des Formulars aus cleaned_data gelesen
+                data = customAnswers(customForm)
             
                 CustomMembershipData.get_or_create(membership, data) 
             
@@ -247,6 +277,107 @@ def acceptRequestMembershipView(request, request_data, club):
     
 
 
+def reviewRequestsView(request, club):
+    """
+    Nimmt mehrere Mitgliedschaftsanträge des Vereins auf einmal an oder lehnt sie ab.
+    POST-Parameter: requests (Nummern der Mitgliedschaften, mehrfach) und action (accept oder decline).
+    Die Berechtigung wird einmal geprüft, die Anträge werden mit Membership.reviewRequests in einer Transaktion geändert.
+    Wird JSON angefragt, wird das Ergebnis pro Antrag zurückgegeben, ansonsten wird zur Startseite weitergeleitet.
+    """
+    user = request.user
+    wantsJson = 'application/json' in request.headers.get('Accept', '')
+
+    if request.method != 'POST' or request.POST.get('action') not in ('accept', 'decline'):
+        if wantsJson:
+            return JsonResponse({'error': 'Ungültige Anfrage.'}, status=400)
+        return redirect('home')
+
+    if not user.is_authenticated or not club_has_member(club, user):
+        #Berechtigungsprüfung: nur aktive Mitglieder des Vereins
+        if wantsJson:
+            return JsonResponse({'error': 'Keine Berechtigung.'}, status=403)
+        return redirect('home')
+
+    numbers = [int(number) for number in request.POST.getlist('requests') if number.isdigit()]
+    results = Membership.reviewRequests(club, numbers, accept=request.POST['action'] == 'accept')
+
+    if wantsJson:
+        return JsonResponse({'results': {str(number): result for number, result in results.items()}})
+
+    changed = sum(result in (Membership.REVIEW_ACCEPTED, Membership.REVIEW_DECLINED) for result in results.values())
+    if changed:
+        messages.success(request, '%d Anträge wurden %s.' % (changed, 'angenommen' if request.POST['action'] == 'accept' else 'abgelehnt'))
+    if changed < len(results):
+        messages.error(request, '%d Anträge wurden nicht gefunden oder bereits geprüft.' % (len(results) - changed))
+    return redirect('home')
+
+
+
+# Warten auf neue Ereignisse (long polling) nur unter ASGI (manageyourclub/asgi.py). Unter WSGI würde Django die View
+# mit async_to_sync ausführen und für die ganze Wartezeit einen Worker belegen, dort wird deshalb nur einmal
+# nachgesehen und der Browser meldet sich erst nach EVENTS_WSGI_RETRY wieder.
+EVENTS_LONGPOLL_TIMEOUT = 25 # Sekunden, die unter ASGI auf neue Ereignisse gewartet wird
+EVENTS_POLL_INTERVAL = 1 # Sekunden zwischen zwei Abfragen des Ereignisprotokolls
+EVENTS_RETRY = 1000 # Millisekunden, nach denen EventSource unter ASGI die Verbindung neu aufbaut
+EVENTS_WSGI_RETRY = 60000 # Millisekunden, nach denen EventSource unter WSGI die Verbindung neu aufbaut
+
+
+def _eventsAllowed(user, club):
+    return user.is_authenticated and club_has_member(club, user)
+
+
+def _eventStart(request, club):
+    "Ereignis-id, ab der geliefert wird: Last-Event-ID (Wiederverbindung von EventSource), ?after= oder das letzte Ereignis."
+    start = request.headers.get('Last-Event-ID') or request.GET.get('after', '')
+    if start.isdigit():
+        return int(start)
+    return MembershipEvent.latestId(club)
+
+
+async def membershipRequestEventsView(request, club):
+    """
+    Liefert neue und entschiedene Mitgliedschaftsanträge des Vereins aus dem Ereignisprotokoll (MembershipEvent).
+    Unter ASGI wartet die View, wenn es nach der angegebenen Ereignis-id noch keine Ereignisse gibt, asynchron bis zu
+    EVENTS_LONGPOLL_TIMEOUT Sekunden (GET-Parameter timeout verkürzt das). Unter WSGI wird nicht gewartet,
+    sondern nur einmal nachgesehen, damit keine Anfrage einen Worker blockiert.
+    Mit "Accept: text/event-stream" wird im Format der Server-Sent Events geantwortet. Das ist kein offener Stream:
+    die Antwort endet nach den Ereignissen und EventSource verbindet sich nach retry Millisekunden mit Last-Event-ID
+    neu (long polling). Ansonsten wird {"last": id, "events": [...], "retry": Millisekunden} zurückgegeben.
+    """
+    user = request.user
+    if not await sync_to_async(_eventsAllowed)(user, club):
+        return JsonResponse({'error': 'Keine Berechtigung.'}, status=403)
+
+    if isinstance(request, ASGIRequest):
+        timeout = request.GET.get('timeout', '')
+        timeout = min(int(timeout), EVENTS_LONGPOLL_TIMEOUT) if timeout.isdigit() else EVENTS_LONGPOLL_TIMEOUT
+        retry = EVENTS_RETRY
+    else:
+        timeout, retry = 0, EVENTS_WSGI_RETRY
+    last = await sync_to_async(_eventStart)(request, club)
+    deadline = time.monotonic() + timeout
+    while True:
+        events = await sync_to_async(MembershipEvent.after)(club, last)
+        if events or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(EVENTS_POLL_INTERVAL)
+    if events:
+        last = events[-1]['id']
+
+    if 'text/event-stream' not in request.headers.get('Accept', ''):
+        return JsonResponse({'last': last, 'events': events, 'retry': retry})
+
+    lines = ['retry: %d' % retry, '']
+    for event in events:
+        lines += ['id: %d' % event['id'], 'event: %s' % event['kind'], 'data: %s' % json.dumps(event), '']
+    # auch ohne Ereignisse die id senden, damit die nächste Verbindung an derselben Stelle weitermacht
+    lines += ['id: %d' % last, '', '']
+    response = HttpResponse('\n'.join(lines), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+
 def declineRequestMembershipView(request,club, request_data):
     #Autor: Max Rosemeier
     #Funktion um Mitgliedsanfragen von Usern an Vereine abzulehnen
@@ -0,0 +1,7 @@
+from django.contrib import admin
+from notifications.models import MembershipEvent, OutboxMessage
+
+# Register your models here.
+
+admin.site.register(OutboxMessage)
+admin.site.register(MembershipEvent)
@@ -0,0 +1,17 @@
+# Löscht alte Einträge aus dem Ereignisprotokoll der Beitrittsanfragen (notifications.models.MembershipEvent).
+# Die Startseite liest nur Ereignisse nach dem Laden der Seite, ältere werden nicht mehr gebraucht.
+#   python manage.py prune_membership_events --days 7
+from django.core.management.base import BaseCommand
+
+from notifications.models import MembershipEvent
+
+
+class Command(BaseCommand):
+    help = 'Löscht alte Ereignisse der Beitrittsanfragen.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Ereignisse, die älter sind, werden gelöscht.')
+
+    def handle(self, *args, **options):
+        deleted = MembershipEvent.prune(options['days'])
+        self.stdout.write(self.style.SUCCESS('%d Ereignisse gelöscht.' % deleted))
@@ -0,0 +1,32 @@
+# Versendet die E-Mails aus der Outbox, siehe notifications/outbox.py.
+#   python manage.py send_outbox          versendet alle fälligen E-Mails und beendet sich
+#   python manage.py send_outbox --loop   läuft als Worker-Prozess weiter und prüft alle --interval Sekunden
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import OUTBOX_BATCH_SIZE, send_queued
+
+
+class Command(BaseCommand):
+    help = 'Versendet die E-Mails aus der Outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=OUTBOX_BATCH_SIZE,
+                            help='Anzahl der E-Mails, die über eine Verbindung versendet werden.')
+        parser.add_argument('--loop', action='store_true', help='Als Worker-Prozess weiterlaufen.')
+        parser.add_argument('--interval', type=float, default=5, help='Wartezeit in Sekunden, wenn die Outbox leer ist.')
+
+    def handle(self, *args, **options):
+        totalSent = totalFailed = 0
+        while True:
+            sent, failed = send_queued(options['batch_size'])
+            totalSent += sent
+            totalFailed += failed
+            if sent or failed:
+                self.stdout.write('%d E-Mails versendet, %d fehlgeschlagen.' % (sent, failed))
+            elif options['loop']:
+                time.sleep(options['interval'])
+            else:
+                break
+        self.stdout.write(self.style.SUCCESS('Insgesamt %d E-Mails versendet, %d fehlgeschlagen.' % (totalSent, totalFailed)))
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+
+from clubs.models import ClubModel
+
+
+class OutboxMessage(models.Model):
+    """
+    Eine zu versendende E-Mail. Wird von notifications.outbox.OutboxBackend angelegt
+    und von "python manage.py send_outbox" versendet, siehe notifications/outbox.py.
+    """
+    PENDING = 0
+    SENT = 1
+    DEAD = 2 # Versand nach OUTBOX_MAX_ATTEMPTS Versuchen aufgegeben
+    STATUS_CHOICES = (
+        (PENDING, 'wartend'),
+        (SENT, 'versendet'),
+        (DEAD, 'fehlgeschlagen'),
+    )
+
+    subject = models.TextField()
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    # Empfänger (to, cc, bcc), reply_to, headers, alternatives und attachments der EmailMessage
+    data = models.JSONField(default=dict)
+    status = models.SmallIntegerField(choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created = models.DateTimeField(auto_now_add=True)
+    sent = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt'], name='outbox_status_next_idx')]
+
+    def __str__(self):
+        return '%s an %s (%s)' % (self.subject, ', '.join(self.data.get('to', [])), self.get_status_display())
+
+
+class MembershipEvent(models.Model):
+    """
+    Ereignisprotokoll der Beitrittsanfragen eines Vereins: neue Anfrage, angenommen, abgelehnt.
+    Wird in derselben Transaktion wie die Statusänderung geschrieben (members.models.Membership)
+    und von membership_request.views.membershipRequestEventsView an die Startseite ausgeliefert.
+    Da das Protokoll in der Datenbank liegt, kann jeder Worker-Prozess die Ereignisse ausliefern.
+    """
+    REQUESTED = 0
+    ACCEPTED = 1
+    DECLINED = 2
+    KIND_CHOICES = (
+        (REQUESTED, 'requested'),
+        (ACCEPTED, 'accepted'),
+        (DECLINED, 'declined'),
+    )
+
+    club = models.ForeignKey(to=ClubModel, on_delete=models.CASCADE)
+    kind = models.SmallIntegerField(choices=KIND_CHOICES)
+    membership = models.IntegerField() # Nummer der Mitgliedschaft, kein ForeignKey: gelöschte Anträge bleiben im Protokoll
+    data = models.JSONField(default=dict) # Name des Antragstellers bei neuen Anfragen
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['club', 'id'], name='membership_event_club_idx')]
+
+    @staticmethod
+    def record(club_id, kind, memberships):
+        "Protokolliert ein Ereignis für jede übergebene Mitgliedschaft (Membership oder Nummer)."
+        events = []
+        for membership in memberships:
+            data = {}
+            if hasattr(membership, 'number'):
+                if membership.member_id is not None:
+                    data = {'first_name': membership.member.Vorname, 'last_name': membership.member.Nachname}
+                else:
+                    data = {'first_name': membership.first_name, 'last_name': membership.last_name}
+                membership = membership.number
+            events.append(MembershipEvent(club_id=club_id, kind=kind, membership=membership, data=data))
+        MembershipEvent.objects.bulk_create(events)
+
+    @staticmethod
+    def latestId(club_id):
+        "Gibt die id des letzten Ereignisses des Vereins zurück (0, wenn es noch keines gibt)."
+        return MembershipEvent.objects.filter(club_id=club_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+    @staticmethod
+    def after(club_id, event_id, limit=100):
+        "Gibt bis zu limit Ereignisse des Vereins nach event_id als Liste von dicts zurück."
+        return [
+            {'id': event.id, 'kind': event.get_kind_display(), 'membership': event.membership, **event.data}
+            for event in MembershipEvent.objects.filter(club_id=club_id, id__gt=event_id).order_by('id')[:limit]
+        ]
+
+    @staticmethod
+    def prune(days):
+        "Löscht Ereignisse, die älter als days Tage sind. Gibt die Anzahl zurück."
+        return MembershipEvent.objects.filter(created__lt=timezone.now() - timedelta(days=days)).delete()[0]
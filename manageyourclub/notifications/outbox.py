@@ -0,0 +1,145 @@
+# Ausgangsspeicher (Outbox) für E-Mails.
+# Mit EMAIL_BACKEND = 'notifications.outbox.OutboxBackend' werden alle E-Mails (Aktivierung, Passwort zurücksetzen,
+# Benachrichtigungen) nicht mehr während der Anfrage per SMTP versendet, sondern als OutboxMessage gespeichert.
+# Der Worker "python manage.py send_outbox" versendet sie blockweise über eine gemeinsame Verbindung
+# des in OUTBOX_EMAIL_BACKEND eingestellten Backends und wiederholt fehlgeschlagene Versuche mit wachsendem Abstand.
+import base64
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from notifications.models import OutboxMessage
+
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_DELAY = 60 # Sekunden bis zum zweiten Versuch, verdoppelt sich mit jedem weiteren Versuch
+OUTBOX_MAX_RETRY_DELAY = 6 * 60 * 60
+OUTBOX_LEASE = 5 * 60 # so lange gehört ein Block einem Worker, bevor ihn ein anderer übernehmen darf
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class OutboxBackend(BaseEmailBackend):
+    "E-Mail-Backend, das die Nachrichten in der Outbox speichert statt sie zu versenden."
+
+    def send_messages(self, email_messages):
+        messages = [_to_outbox(message) for message in email_messages if message.recipients()]
+        OutboxMessage.objects.bulk_create(messages)
+        return len(messages)
+
+
+def _to_outbox(message):
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            raise ValueError('Die Outbox unterstützt nur Anhänge als (Dateiname, Inhalt, MIME-Typ).')
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        attachments.append([filename, base64.b64encode(content).decode('ascii'), mimetype])
+
+    return OutboxMessage(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        data={
+            'to': list(message.to),
+            'cc': list(message.cc),
+            'bcc': list(message.bcc),
+            'reply_to': list(message.reply_to),
+            'headers': dict(message.extra_headers),
+            'alternatives': [list(alternative) for alternative in getattr(message, 'alternatives', [])],
+            'attachments': attachments,
+        },
+    )
+
+
+def _to_email(outboxMessage, connection):
+    data = outboxMessage.data
+    message = EmailMultiAlternatives(
+        subject=outboxMessage.subject,
+        body=outboxMessage.body,
+        from_email=outboxMessage.from_email,
+        to=data.get('to'),
+        cc=data.get('cc'),
+        bcc=data.get('bcc'),
+        reply_to=data.get('reply_to'),
+        headers=data.get('headers'),
+        alternatives=[tuple(alternative) for alternative in data.get('alternatives', [])],
+        connection=connection,
+    )
+    for filename, content, mimetype in data.get('attachments', []):
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+def retry_delay(attempts):
+    "Wartezeit nach dem attempts-ten fehlgeschlagenen Versuch (exponentiell, begrenzt)."
+    delay = _setting('OUTBOX_RETRY_DELAY', OUTBOX_RETRY_DELAY) * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, _setting('OUTBOX_MAX_RETRY_DELAY', OUTBOX_MAX_RETRY_DELAY)))
+
+
+def _claim(batch_size):
+    """
+    Reserviert bis zu batch_size fällige Nachrichten für diesen Worker, indem next_attempt um OUTBOX_LEASE
+    in die Zukunft gesetzt wird. Stürzt der Worker ab, werden die Nachrichten danach erneut versucht.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pending = OutboxMessage.objects.select_for_update(skip_locked=True).filter(
+            status=OutboxMessage.PENDING, next_attempt__lte=now,
+        ).order_by('next_attempt', 'pk')
+        ids = list(pending.values_list('pk', flat=True)[:batch_size])
+        OutboxMessage.objects.filter(pk__in=ids).update(next_attempt=now + timedelta(seconds=OUTBOX_LEASE))
+    return list(OutboxMessage.objects.filter(pk__in=ids).order_by('pk'))
+
+
+def send_queued(batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Versendet einen Block fälliger Nachrichten über eine einzige Verbindung.
+    Fehlgeschlagene Nachrichten werden mit wachsendem Abstand erneut versucht
+    und nach OUTBOX_MAX_ATTEMPTS Versuchen als fehlgeschlagen (DEAD) markiert.
+    Gibt (versendet, fehlgeschlagen) zurück.
+    """
+    messages = _claim(batch_size)
+    if not messages:
+        return 0, 0
+
+    sent, failed = [], []
+    connection = get_connection(backend=_setting('OUTBOX_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend'))
+    try:
+        connection.open()
+    except Exception as error:
+        failed = [(message, error) for message in messages]
+    else:
+        try:
+            for message in messages:
+                try:
+                    _to_email(message, connection).send()
+                    sent.append(message)
+                except Exception as error:
+                    failed.append((message, error))
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    OutboxMessage.objects.filter(pk__in=[message.pk for message in sent]).update(
+        status=OutboxMessage.SENT, sent=now, last_error='', attempts=F('attempts') + 1,
+    )
+    maxAttempts = _setting('OUTBOX_MAX_ATTEMPTS', OUTBOX_MAX_ATTEMPTS)
+    for message, error in failed:
+        message.attempts += 1
+        message.last_error = '%s: %s' % (type(error).__name__, error)
+        if message.attempts >= maxAttempts:
+            message.status = OutboxMessage.DEAD
+        else:
+            message.next_attempt = now + retry_delay(message.attempts)
+        message.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt'])
+    return len(sent), len(failed)
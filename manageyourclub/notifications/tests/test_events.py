@@ -0,0 +1,136 @@
+import json
+import time
+from datetime import timedelta
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import AsyncClient, Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from clubs.tests.test_views import createTestClub, logTestClientIn
+from members.models import ClubMembershipSummary, Membership, MemberState
+from membership_request.views import EVENTS_RETRY, EVENTS_WSGI_RETRY
+from notifications.models import MembershipEvent
+
+
+class TestMembershipEvents(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        for stateID, state in ((0, 'Anfrage'), (1, 'aktiv'), (2, 'abgelehnt')):
+            MemberState.objects.get_or_create(stateID=stateID, state=state)
+        self.client = Client()
+        logTestClientIn(self.client)
+        self.club = createTestClub(clubname='Die Tester')
+        self.otherClub = createTestClub(clubname='Die Anderen')
+        Membership.addMember(self.club, self.client.user)
+        ClubMembershipSummary.recount(self.club.pk)
+        self.events_url = reverse('membershipRequestEvents', kwargs={'club': self.club.pk})
+
+    def request(self, last_name, club=None):
+        "Stellt einen Mitgliedschaftsantrag ohne Benutzerkonto."
+        return Membership.addUnregisteredMembershipRequestData(
+            club or self.club, '', 'Vorname', last_name, None, None, 12345, 'Teststraße', '95b', 'München', '', ''
+        )
+
+    def test_recorded(self):
+        """
+            Testinhalt:
+            Neue Anträge sowie angenommene und abgelehnte Anträge sollten protokolliert werden,
+            Statuswechsel aktiver Mitgliedschaften nicht.
+        """
+        first = self.request('Erster')
+        second = self.request('Zweiter')
+        self.request('Fremd', club=self.otherClub)
+        first.setStatusAccepted()
+        first.setStatusDeclined() # kein offener Antrag mehr
+        Membership.reviewRequests(self.club.pk, [second.number], accept=False)
+
+        events = MembershipEvent.after(self.club.pk, 0)
+        self.assertEqual(
+            [(event['kind'], event['membership']) for event in events],
+            [('requested', first.number), ('requested', second.number), ('accepted', first.number), ('declined', second.number)]
+        )
+        self.assertEqual(events[0]['last_name'], 'Erster')
+        self.assertEqual(MembershipEvent.latestId(self.club.pk), events[-1]['id'])
+        self.assertEqual(MembershipEvent.after(self.club.pk, events[1]['id'], limit=1)[0]['id'], events[2]['id'])
+
+    def test_view_json(self):
+        """
+            Testinhalt:
+            Ohne Angabe sollten nur Ereignisse nach dem letzten vorhandenen geliefert werden,
+            mit after alle späteren.
+        """
+        before = self.request('Vorher')
+        response = self.client.get(self.events_url, {'timeout': 0})
+        self.assertEqual(response.json()['events'], [])
+        last = response.json()['last']
+
+        self.request('Nachher')
+        events = self.client.get(self.events_url, {'timeout': 0, 'after': last}).json()['events']
+        self.assertEqual([event['last_name'] for event in events], ['Nachher'])
+        self.assertNotEqual(events[0]['membership'], before.number)
+
+    def test_view_event_stream(self):
+        """
+            Testinhalt:
+            Mit Accept: text/event-stream sollten die Ereignisse als Server-Sent Events geliefert werden,
+            die Last-Event-ID einer Wiederverbindung sollte Vorrang vor after haben.
+        """
+        membership = self.request('Antrag')
+        requested = MembershipEvent.latestId(self.club.pk)
+        membership.setStatusAccepted()
+        accepted = MembershipEvent.latestId(self.club.pk)
+
+        response = self.client.get(
+            self.events_url, {'timeout': 0, 'after': 0},
+            HTTP_ACCEPT='text/event-stream', HTTP_LAST_EVENT_ID=str(requested)
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = response.content.decode()
+        self.assertIn('id: %d\nevent: accepted\ndata: ' % accepted, body)
+        self.assertNotIn('event: requested', body)
+        self.assertTrue(body.endswith('id: %d\n\n' % accepted))
+        data = json.loads(body.split('data: ')[1].split('\n')[0])
+        self.assertEqual(data['membership'], membership.number)
+
+    def test_view_wsgi_does_not_wait(self):
+        """
+            Testinhalt:
+            Unter WSGI sollte die View nicht auf Ereignisse warten und eine lange Wartezeit bis zur
+            nächsten Anfrage vorgeben, unter ASGI sollte sie warten und schnell neu verbinden lassen.
+        """
+        start = time.monotonic()
+        response = self.client.get(self.events_url) # ohne timeout, unter ASGI würden 25 Sekunden gewartet
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(response.json()['retry'], EVENTS_WSGI_RETRY)
+
+        asyncClient = AsyncClient()
+        asyncClient.cookies = self.client.cookies
+        # AsyncClient übernimmt in Django 3.2 die GET-Parameter aus data nicht
+        response = async_to_sync(asyncClient.get)(self.events_url + '?timeout=0')
+        self.assertEqual(response.json()['retry'], EVENTS_RETRY)
+
+    def test_view_forbidden(self):
+        """
+            Testinhalt:
+            Nur Mitglieder des Vereins sollten die Ereignisse abrufen können.
+        """
+        response = self.client.get(reverse('membershipRequestEvents', kwargs={'club': self.otherClub.pk}), {'timeout': 0})
+        self.assertEqual(response.status_code, 403)
+
+    def test_prune(self):
+        """
+            Testinhalt:
+            prune_membership_events sollte nur Ereignisse löschen, die älter als --days Tage sind.
+        """
+        self.request('Alt')
+        MembershipEvent.objects.update(created=timezone.now() - timedelta(days=10))
+        self.request('Neu')
+
+        out = StringIO()
+        call_command('prune_membership_events', '--days', '7', stdout=out)
+        self.assertIn('1 Ereignisse gelöscht.', out.getvalue())
+        self.assertEqual([event['last_name'] for event in MembershipEvent.after(self.club.pk, 0)], ['Neu'])
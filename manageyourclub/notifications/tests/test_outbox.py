@@ -0,0 +1,87 @@
+from io import StringIO
+from smtplib import SMTPException
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from notifications.models import OutboxMessage
+from notifications.outbox import send_queued
+
+LOCMEM = 'django.core.mail.backends.locmem.EmailBackend'
+
+@override_settings(EMAIL_BACKEND='notifications.outbox.OutboxBackend', OUTBOX_EMAIL_BACKEND=LOCMEM)
+class TestOutbox(TestCase):
+
+    def sendTestMails(self, count):
+        for i in range(count):
+            send_mail('Betreff %d' % i, 'Text', 'verein@example.com', ['empfaenger%d@example.com' % i])
+
+    def test_queue_and_send(self):
+        """
+            Testinhalt:
+            E-Mails sollten zunächst nur in der Outbox gespeichert und erst vom Worker versendet werden.
+            HTML-Inhalte und Anhänge sollten erhalten bleiben.
+        """
+        message = EmailMultiAlternatives('Betreff', 'Text', 'verein@example.com', ['a@example.com'], bcc=['b@example.com'])
+        message.attach_alternative('<p>Text</p>', 'text/html')
+        message.attach('liste.csv', 'a;b\n', 'text/csv')
+        message.send()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxMessage.objects.get().status, OutboxMessage.PENDING)
+
+        self.assertEqual(send_queued(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        sentMail = mail.outbox[0]
+        self.assertEqual(sentMail.recipients(), ['a@example.com', 'b@example.com'])
+        self.assertEqual(sentMail.alternatives, [('<p>Text</p>', 'text/html')])
+        self.assertEqual(sentMail.attachments, [('liste.csv', 'a;b\n', 'text/csv')])
+        self.assertEqual(OutboxMessage.objects.get().status, OutboxMessage.SENT)
+        self.assertEqual(send_queued(), (0, 0))
+
+    def test_one_connection_per_batch(self):
+        """
+            Testinhalt:
+            Alle Nachrichten eines Blocks sollten über dieselbe Verbindung versendet werden.
+        """
+        self.sendTestMails(5)
+        with patch('notifications.outbox.get_connection', wraps=get_connection) as connections:
+            self.assertEqual(send_queued(batch_size=3), (3, 0))
+            self.assertEqual(send_queued(batch_size=3), (2, 0))
+        self.assertEqual(connections.call_count, 2)
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_retry_and_dead_letter(self):
+        """
+            Testinhalt:
+            Fehlgeschlagene Nachrichten sollten später erneut versucht
+            und nach OUTBOX_MAX_ATTEMPTS Versuchen als fehlgeschlagen markiert werden.
+        """
+        self.sendTestMails(1)
+        with patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=SMTPException('nicht erreichbar')):
+            self.assertEqual(send_queued(), (0, 1))
+            message = OutboxMessage.objects.get()
+            self.assertEqual(message.status, OutboxMessage.PENDING)
+            self.assertEqual(message.attempts, 1)
+            self.assertIn('nicht erreichbar', message.last_error)
+            self.assertGreater(message.next_attempt, timezone.now())
+            self.assertEqual(send_queued(), (0, 0)) # noch nicht fällig
+
+            OutboxMessage.objects.update(next_attempt=timezone.now())
+            self.assertEqual(send_queued(), (0, 1))
+        self.assertEqual(OutboxMessage.objects.get().status, OutboxMessage.DEAD)
+
+    def test_command(self):
+        """
+            Testinhalt:
+            Der Befehl sollte alle fälligen Nachrichten versenden und die Anzahl ausgeben.
+        """
+        self.sendTestMails(3)
+        out = StringIO()
+        call_command('send_outbox', batch_size=2, stdout=out)
+        self.assertIn('Insgesamt 3 E-Mails versendet, 0 fehlgeschlagen.', out.getvalue())
+        self.assertEqual(len(mail.outbox), 3)
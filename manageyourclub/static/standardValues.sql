@@ -40,6 +40,11 @@ VALUES (
     5, "Trainer"
 );
 
+INSERT INTO members_memberfunction (functionID, function)
+VALUES (
+    6, "Kassenwart"
+);
+
 -- memberState
 INSERT INTO members_memberstate (stateID, state)
 VALUES (
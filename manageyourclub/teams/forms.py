@@ -1,12 +1,11 @@
 from django import forms
-from teams.models import SportModel, TeamModel
-from users.models import CustomUser
-from members.models import Membership
+from teams.models import TeamModel, sports
+from teams.roster import add_team_members, split_entries
 
 class TeamForm(forms.ModelForm):
     #Author: Max
     teamName = forms.CharField(max_length=30, label='Mannschaftsname')
-    sportName = forms.CharField(max_length=30, label='Sportart')
+    sportName = forms.CharField(max_length=20, label='Sportart')
 
     class Meta:
         model = TeamModel
@@ -27,7 +26,6 @@ class TeamForm(forms.ModelForm):
         else: # Wenn der primary key gesetzt wurde, soll ein Objekt geändert werden.
             instance = TeamModel.objects.get(pk=pk) # Objekt holen
 
-            oldSport = instance.sportId
             instance.teamName = self.cleaned_data['teamName'] # Diese Beiden Aktionen werden im ersten Fall automatisch ausgeführt.
             
         instance.clubId = club
@@ -37,20 +35,14 @@ class TeamForm(forms.ModelForm):
         if club is not None: 
             #Mannschaftserstellung nur möglich, wenn Verein ausgewählt
 
-            sport, created = SportModel.objects.get_or_create(sportName=valueSportName)
-            if created and commit:
-                sport.save()
-
-            #Jetzt existiert die Sportart in der Datenbank.
-            #speichere den Sport im Feld sportId vom TeamModel ab.
-            #instance.sportId = SportModell.objects.get(sportName=valueSportName)
-            instance.sportId = sport
-            if commit:
-                instance.save()
-                # gegebenenfalls aufräumen
-                if pk is not None and not TeamModel.objects.filter(sportId=oldSport).exists(): # gegebenenfalls nicht mehr gebrauchte Adresse löschen
-                    oldSport.delete()
-            return instance
+            #Die Sportart wird über den Katalog aufgelöst (teams/sports.py), bekannte Sportarten ohne Datenbankabfrage.
+            #Nicht mehr genutzte Sportarten werden von collect_unused_sports aufgeräumt.
+            def save(sport):
+                instance.sportId = sport
+                if commit:
+                    instance.save()
+                return instance
+            return sports.save_with_sport(save, valueSportName)
     
 
 class AddTeamMemberForm(forms.Form):
@@ -59,13 +51,20 @@ class AddTeamMemberForm(forms.Form):
     eMail = forms.CharField(max_length=50, label='E-Mail-Adresse')
 
     def addMember(self, club, team, commit=True):
-
-        eMail = self.cleaned_data['eMail']
         #Bughandling: nur Mitglieder des Vereins sind zu Mannschaften hinzufügbar
-        if CustomUser.objects.filter(email=eMail).exists():
-            user = CustomUser.objects.get(email=eMail)
-            member = Membership.objects.get(member = user, club=club )
-            if member.club == club:
-                team.members.add(member) 
+        return add_team_members(club, team, [self.cleaned_data['eMail'].strip()])
+
+
+class AddTeamMembersForm(forms.Form):
+    "Fügt mehrere Mitglieder auf einmal hinzu, siehe teams/roster.py."
+    entries = forms.CharField(
+        label='E-Mail-Adressen oder Mitgliedsnummern',
+        help_text='Getrennt durch Kommas, Leerzeichen oder Zeilenumbrüche.',
+        widget=forms.Textarea(attrs={'rows': 6}),
+        max_length=20000,
+    )
+
+    def addMembers(self, club, team):
+        return add_team_members(club, team, split_entries(self.cleaned_data['entries']))
 
 
@@ -0,0 +1,30 @@
+# Führt doppelte Sportarten zusammen und löscht Sportarten, die von keiner Mannschaft mehr genutzt werden.
+# Sollte regelmäßig (z.B. nächtlich per cron) ausgeführt werden und in einer bestehenden Datenbank einmal direkt
+# nach dem Anlegen der Spalte SportModel.key, um key für alte Sportarten (NULL) zu füllen (Reihenfolge siehe teams/models.py):
+#   python manage.py collect_unused_sports
+from django.core.management.base import BaseCommand
+
+from clubs.addresses import ORPHAN_BATCH_SIZE, delete_orphans, merge_duplicates
+from teams.models import SportModel, sports
+from teams.sports import normalize_sport, sport_key
+
+
+class Command(BaseCommand):
+    help = 'Führt doppelte Sportarten zusammen und löscht nicht mehr genutzte Sportarten.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ORPHAN_BATCH_SIZE,
+                            help='Anzahl der Zeilen, die pro Transaktion gelöscht werden.')
+
+    def handle(self, *args, **options):
+        # die Mannschaften doppelter Sportarten werden vor dem Löschen auf die behaltene Sportart umgebogen
+        merged = merge_duplicates(
+            SportModel,
+            ('sportName', 'key'),
+            lambda values: (normalize_sport(values[0]), sport_key(values[0])),
+            ('sportName', 'key'),
+            key=lambda normalized: normalized[1],
+        )
+        sports.clear()
+        count = delete_orphans(SportModel, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('%d Sportarten zusammengeführt, %d Sportarten gelöscht.' % (merged, count)))
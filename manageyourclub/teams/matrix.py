@@ -0,0 +1,105 @@
+# Übersicht, welche Mitglieder eines Vereins in welchen Mannschaften spielen (teamMatrixView).
+# Pro Seite werden die Mannschaften, die Mitgliedschaften und die Zeilen der Zwischentabelle von TeamModel.members
+# mit je einer Abfrage geladen. Die Mannschaften eines Mitglieds werden als Bitmaske gespeichert:
+# Bit i ist gesetzt, wenn das Mitglied in der i-ten Mannschaft (nach Namen sortiert) spielt.
+# Beim Speichern werden nur die Unterschiede zur Zwischentabelle geschrieben (höchstens ein INSERT und ein DELETE).
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models.functions import Coalesce
+
+from manageyourclub.versions import invalidate_club
+from members.models import Membership
+from teams.models import TeamModel
+
+MATRIX_MEMBERS_PER_PAGE = 50
+
+TeamMembers = TeamModel.members.through
+
+
+class MatrixRow:
+    "Eine Zeile der Übersicht: die Mitgliedschaft und die Bitmaske ihrer Mannschaften."
+
+    def __init__(self, membership, mask, teams):
+        self.membership = membership
+        self.mask = mask
+        self.teams = teams
+
+    @property
+    def cells(self):
+        "Gibt für jede Mannschaft (Mannschaft, ausgewählt) zurück (für das Template)."
+        return [(team, bool(self.mask >> index & 1)) for index, team in enumerate(self.teams)]
+
+
+class TeamMatrix:
+    """
+    Mitglieder × Mannschaften eines Vereins, seitenweise.
+    teams ist die Liste der Mannschaften (Spalten). Nach load sind rows die MatrixRow der Seite und page die Seite des Paginators.
+    """
+
+    def __init__(self, club):
+        self.club = club
+        self.teams = list(TeamModel.objects.filter(clubId=club).order_by('teamName', 'pk'))
+        self.columns = {team.pk: index for index, team in enumerate(self.teams)}
+        self.page = None
+        self.rows = []
+
+    def load(self, page=None, per_page=MATRIX_MEMBERS_PER_PAGE):
+        "Lädt die aktiven Mitgliedschaften der Seite und ihre Mannschaften."
+        memberships = Membership.objects.filter(club=self.club, memberState=1).select_related('member').annotate(
+            display_first_name=Coalesce('member__Vorname', 'first_name'),
+            display_last_name=Coalesce('member__Nachname', 'last_name'),
+        ).order_by('display_last_name', 'display_first_name', 'pk')
+        self.page = Paginator(memberships, per_page).get_page(page)
+        masks = self.masks([membership.pk for membership in self.page])
+        self.rows = [MatrixRow(membership, masks.get(membership.pk, 0), self.teams) for membership in self.page]
+        return self
+
+    def masks(self, numbers):
+        "Liest die Zwischentabelle für die übergebenen Mitgliedschaften mit einer Abfrage und gibt {Nummer: Bitmaske} zurück."
+        masks = {}
+        if not numbers or not self.teams:
+            return masks
+        for number, team in TeamMembers.objects.filter(
+            membership__in=numbers, teammodel__in=list(self.columns)
+        ).values_list('membership', 'teammodel'):
+            masks[number] = masks.get(number, 0) | 1 << self.columns[team]
+        return masks
+
+    def save(self, numbers, cells):
+        """
+        Übernimmt die Auswahl für die übergebenen Mitgliedschaften (in der Regel die der angezeigten Seite).
+        cells ist eine Sammlung von Paaren (Nummer, Mannschafts-id), die ausgewählt sein sollen, alle anderen
+        Zellen dieser Mitgliedschaften werden abgewählt. Mitgliedschaften und Mannschaften anderer Vereine werden ignoriert.
+        Gibt (Anzahl hinzugefügt, Anzahl entfernt) zurück.
+        """
+        valid = set(Membership.objects.filter(club=self.club, number__in=set(numbers)).values_list('number', flat=True))
+        wanted = {(number, team) for number, team in cells if number in valid and team in self.columns}
+
+        with transaction.atomic():
+            current = {
+                (number, team): pk for pk, number, team in TeamMembers.objects.filter(
+                    membership__in=valid, teammodel__in=list(self.columns)
+                ).values_list('pk', 'membership', 'teammodel')
+            } if valid and self.teams else {}
+            added = wanted - current.keys()
+            removed = [current[cell] for cell in current.keys() - wanted]
+            if added:
+                TeamMembers.objects.bulk_create(
+                    (TeamMembers(membership_id=number, teammodel_id=team) for number, team in added), ignore_conflicts=True
+                )
+            if removed:
+                TeamMembers.objects.filter(pk__in=removed).delete()
+            if added or removed:
+                # bulk_create und delete auf der Zwischentabelle lösen kein m2m_changed aus
+                invalidate_club(self.club.pk)
+        return len(added), len(removed)
+
+
+def parse_cells(values):
+    "Wandelt die Werte der Checkboxen ('Nummer-Mannschaft') in Paare von Zahlen um, ungültige Werte werden ignoriert."
+    cells = []
+    for value in values:
+        number, _, team = value.partition('-')
+        if number.isdigit() and team.isdigit():
+            cells.append((int(number), int(team)))
+    return cells
@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import Count, F, Prefetch
 from clubs.models import ClubModel
 from members.models import Membership
+from teams.sports import SportInterner, normalize_sport, sport_key
 
 #Author: Max 
 #Vorlage für die Models und daraus entstandenen Forms/ Views ist die Club App/ Rücksprache mit Tobias
@@ -9,6 +11,36 @@ class SportModel(models.Model):
     #Modell für die Sportart
     #uid wird von Django vorgsteuert
     sportName = models.CharField(max_length=20)
+    # normalisierter Name, eindeutig, damit es jede Sportart nur einmal gibt (siehe teams/sports.py).
+    # null=True, damit die Spalte in bestehenden Datenbanken mit ihrem Unique-Index angelegt werden kann:
+    # alte Sportarten erhalten NULL, das mehrfach vorkommen darf. Reihenfolge beim Update einer bestehenden Datenbank:
+    #   1. python manage.py makemigrations teams && python manage.py migrate teams  (Spalte key, alte Zeilen NULL)
+    #   2. python manage.py collect_unused_sports  (füllt key und führt doppelte Sportarten zusammen)
+    # Neue Sportarten erhalten key immer in save() bzw. SportInterner.intern.
+    key = models.CharField(max_length=40, unique=True, null=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        self.sportName = normalize_sport(self.sportName)
+        self.key = sport_key(self.sportName)
+        super().save(*args, **kwargs)
+
+
+class TeamQuerySet(models.QuerySet):
+    """QuerySet für Mannschaften mit den Abfragen der Mannschaftsübersicht."""
+
+    def overview(self, with_rosters=False):
+        """
+        Gibt die Mannschaften sortiert nach Namen mit memberCount (Anzahl der Mitglieder) und sportName zurück,
+        beides aus einer Abfrage. Mit with_rosters werden die Mitglieder inklusive Benutzer mit einer weiteren
+        Abfrage für alle Mannschaften geladen (prefetch_related), unabhängig von der Anzahl der Mannschaften.
+        """
+        teams = self.annotate(memberCount=Count('members'), sportName=F('sportId__sportName')).order_by('teamName', 'pk')
+        if with_rosters:
+            teams = teams.prefetch_related(Prefetch(
+                'members',
+                queryset=Membership.objects.select_related('member').order_by('member__Nachname', 'last_name', 'number'),
+            ))
+        return teams
 
 
 class TeamModel(models.Model):
@@ -18,7 +50,12 @@ class TeamModel(models.Model):
    
     teamName = models.CharField(max_length=30)
     clubId = models.ForeignKey(to=ClubModel, on_delete=models.CASCADE)
-    sportId = models.ForeignKey(to=SportModel, on_delete=models.CASCADE)
+    # PROTECT, damit beim Löschen einer Sportart nicht ihre Mannschaften gelöscht werden (siehe collect_unused_sports)
+    sportId = models.ForeignKey(to=SportModel, on_delete=models.PROTECT)
     members = models.ManyToManyField(Membership, related_name="teams")
 
+    objects = TeamQuerySet.as_manager()
+
 
+# Zwischenspeicher und zentrale Stelle zum Anlegen von Sportarten, siehe teams/sports.py
+sports = SportInterner(SportModel)
@@ -0,0 +1,73 @@
+# Mehrere Mitglieder auf einmal zu einer Mannschaft hinzufügen (addTeamMemberView).
+# Die Einträge (E-Mail-Adressen oder Mitgliedsnummern) werden mit einer Abfrage den Mitgliedschaften des Vereins
+# zugeordnet und mit einem einzigen team.members.add gespeichert. Nur für nicht gefundene E-Mail-Adressen wird
+# zusätzlich abgefragt, ob es den Benutzer gibt, um unbekannte Adressen von Nicht-Mitgliedern zu unterscheiden.
+import re
+
+from django.db.models import Exists, OuterRef, Q
+
+from members.models import Membership
+from users.models import CustomUser
+
+ENTRY_SEPARATORS = re.compile(r'[\s,;]+')
+
+
+class TeamRosterReport:
+    "Ergebnis von add_team_members."
+
+    def __init__(self):
+        self.added = [] # hinzugefügte Mitgliedschaften
+        self.already = [] # Einträge, die bereits in der Mannschaft sind
+        self.unknown = [] # E-Mail-Adressen ohne Benutzer und Nummern ohne Mitgliedschaft im Verein
+        self.not_members = [] # E-Mail-Adressen von Benutzern, die nicht Mitglied des Vereins sind
+
+    @property
+    def errors(self):
+        return bool(self.unknown or self.not_members)
+
+
+def split_entries(text):
+    "Zerlegt die Eingabe an Kommas, Semikolons, Leerzeichen und Zeilenumbrüchen und entfernt doppelte Einträge."
+    return list(dict.fromkeys(entry for entry in ENTRY_SEPARATORS.split(text) if entry))
+
+
+def add_team_members(club, team, entries):
+    """
+    Fügt die Mitgliedschaften des Vereins zur Mannschaft hinzu, die zu den Einträgen passen.
+    Ein Eintrag ist eine E-Mail-Adresse eines registrierten Mitglieds oder eine Mitgliedsnummer.
+    Gibt einen TeamRosterReport zurück.
+    """
+    report = TeamRosterReport()
+    if not entries:
+        return report
+    numbers = {int(entry) for entry in entries if entry.isdigit()}
+    emails = {entry for entry in entries if not entry.isdigit()}
+
+    memberships = Membership.objects.filter(club=club).filter(
+        Q(member__email__in=emails) | Q(number__in=numbers)
+    ).select_related('member').annotate(
+        inTeam=Exists(team.members.through.objects.filter(teammodel=team, membership=OuterRef('pk')))
+    )
+    byEntry = {}
+    for membership in memberships:
+        if membership.number in numbers:
+            byEntry[str(membership.number)] = membership
+        if membership.member is not None and membership.member.email in emails:
+            byEntry[membership.member.email] = membership
+
+    missingEmails = [entry for entry in entries if entry in emails and entry not in byEntry]
+    existingUsers = set(CustomUser.objects.filter(email__in=missingEmails).values_list('email', flat=True)) if missingEmails else set()
+
+    new = {}
+    for entry in entries:
+        membership = byEntry.get(entry)
+        if membership is None:
+            (report.not_members if entry in existingUsers else report.unknown).append(entry)
+        elif membership.inTeam:
+            report.already.append(entry)
+        else:
+            new[membership.pk] = membership # E-Mail-Adresse und Nummer derselben Mitgliedschaft nur einmal
+    if new:
+        team.members.add(*new.values())
+    report.added = list(new.values())
+    return report
@@ -0,0 +1,80 @@
+# Zentrale Stelle zum Auflösen von Sportarten (SportModel) beim Anlegen und Bearbeiten von Mannschaften.
+# Jede Sportart gibt es nur einmal: der normalisierte Name (SportModel.key) ist eindeutig, sodass auch
+# gleichzeitig angelegte Mannschaften dieselbe Sportart erhalten. Die Sportarten werden pro Prozess im
+# Arbeitsspeicher gehalten, eine bekannte Sportart wird ohne Datenbankabfrage aufgelöst.
+# Nicht mehr genutzte Sportarten werden nicht beim Bearbeiten gelöscht,
+# sondern regelmäßig mit "python manage.py collect_unused_sports" aufgeräumt (siehe clubs.addresses.delete_orphans).
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+def normalize_sport(sportName):
+    "Entfernt Leerzeichen am Anfang und Ende und fasst mehrere Leerzeichen zusammen."
+    return ' '.join(str(sportName).split())
+
+
+def sport_key(sportName):
+    "Gibt den Schlüssel zurück, unter dem eine Sportart eindeutig ist (ohne Unterschied in Groß- und Kleinschreibung)."
+    return normalize_sport(sportName).casefold()
+
+
+class SportInterner:
+    """
+    Löst Namen von Sportarten zu SportModel-Objekten auf und legt fehlende an.
+    Der Katalog der Sportarten ist klein und wird deshalb vollständig zwischengespeichert.
+    Wird eine Sportart geändert oder gelöscht, wird sie aus dem Zwischenspeicher entfernt.
+    Neue Einträge werden erst nach dem Commit übernommen, damit zurückgerollte Sportarten nicht im Zwischenspeicher landen.
+    """
+
+    def __init__(self, sportModel):
+        self.sportModel = sportModel
+        self._entries = {} # Schlüssel -> SportModel
+        self._lock = threading.Lock()
+        post_save.connect(self._forget_instance, sender=sportModel, weak=False, dispatch_uid='sport_interner_save_%s' % id(self))
+        post_delete.connect(self._forget_instance, sender=sportModel, weak=False, dispatch_uid='sport_interner_delete_%s' % id(self))
+
+    def intern(self, sportName):
+        "Gibt das SportModel-Objekt zum übergebenen Namen zurück und legt es gegebenenfalls an."
+        key = sport_key(sportName)
+        with self._lock:
+            sport = self._entries.get(key)
+        if sport is None:
+            # get_or_create fängt den IntegrityError ab, wenn ein anderer Prozess die Sportart gleichzeitig anlegt
+            sport = self.sportModel.objects.get_or_create(key=key, defaults={'sportName': normalize_sport(sportName)})[0]
+            transaction.on_commit(lambda: self._put(key, sport))
+        return sport
+
+    def save_with_sport(self, save, sportName):
+        """
+        Löst die Sportart auf und ruft save(sport) in einer Transaktion auf.
+        Wie clubs.addresses.AddressInterner.save_with_address wird die Sportart vorher gesperrt (select_for_update):
+        wurde die zwischengespeicherte Sportart inzwischen von collect_unused_sports gelöscht, wird sie aus dem
+        Zwischenspeicher entfernt und neu angelegt. Ein IntegrityError käme in einer äußeren Transaktion erst beim Commit.
+        """
+        with transaction.atomic():
+            sport = self.intern(sportName)
+            if not self.sportModel.objects.select_for_update().filter(pk=sport.pk).exists():
+                self.forget(sport)
+                sport = self.intern(sportName)
+            return save(sport)
+
+    def forget(self, sport):
+        "Entfernt die Sportart aus dem Zwischenspeicher."
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.pk == sport.pk:
+                    del self._entries[key]
+
+    def clear(self):
+        "Leert den Zwischenspeicher."
+        with self._lock:
+            self._entries.clear()
+
+    def _forget_instance(self, sender, instance, **kwargs):
+        self.forget(instance)
+
+    def _put(self, key, sport):
+        with self._lock:
+            self._entries[key] = sport
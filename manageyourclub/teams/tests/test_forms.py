@@ -1,9 +1,9 @@
 # Author: Tobias
 from django.test import TestCase, Client
-from clubs.tests.test_views import logTestClientIn, createTestClub
+from clubs.tests.test_views import logTestClientIn, createTestClub, createTestUser
 from teams.tests.test_views import createTestTeam
 from members.models import Membership
-from teams.forms import TeamForm, AddTeamMemberForm
+from teams.forms import TeamForm, AddTeamMemberForm, AddTeamMembersForm
 from teams.models import TeamModel
 
 class TestForms(TestCase):
@@ -102,3 +102,47 @@ class TestForms(TestCase):
         self.assertEqual(len(self.team.members.all()), 1)
 
 
+
+
+class TestAddTeamMembersForm(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        self.club = createTestClub()
+        self.otherClub = createTestClub(clubname='andererVerein')
+        self.team = createTestTeam(self.club)
+        self.users = [createTestUser(email='spieler%d@email.de' % i) for i in range(3)]
+        self.memberships = [Membership.objects.create(club=self.club, member=user) for user in self.users[:2]]
+        Membership.objects.create(club=self.otherClub, member=self.users[2])
+        self.unregistered = Membership.objects.create(club=self.club, first_name='Ohne', last_name='Konto')
+        self.team.members.add(self.memberships[1])
+
+    def test_addMembers(self):
+        """
+            Testinhalt:
+            E-Mail-Adressen und Mitgliedsnummern sollten mit einer Abfrage aufgelöst und auf einmal hinzugefügt werden.
+            Unbekannte Einträge, Nicht-Mitglieder und bereits hinzugefügte Mitglieder sollten gemeldet werden.
+        """
+        entries = 'spieler0@email.de, spieler1@email.de;spieler2@email.de\n%d unbekannt@email.de 999999 spieler0@email.de' % self.unregistered.number
+        form = AddTeamMembersForm({'entries': entries})
+        self.assertTrue(form.is_valid())
+        # Mitgliedschaften (mit Mannschaftszugehörigkeit), Benutzer der nicht gefundenen Adressen,
+        # vorhandene Mannschaftsmitglieder und INSERT in team.members.add
+        with self.assertNumQueries(4):
+            report = form.addMembers(self.club, self.team)
+
+        self.assertEqual(report.added, [self.memberships[0], self.unregistered])
+        self.assertEqual(report.already, ['spieler1@email.de'])
+        self.assertEqual(report.not_members, ['spieler2@email.de'])
+        self.assertEqual(report.unknown, ['unbekannt@email.de', '999999'])
+        self.assertEqual(set(self.team.members.all()), {self.memberships[0], self.memberships[1], self.unregistered})
+
+    def test_addMember_not_member(self):
+        """
+            Testinhalt:
+            Das Formular für eine E-Mail-Adresse sollte Nicht-Mitglieder melden, statt einen Fehler auszulösen.
+        """
+        form = AddTeamMemberForm({'eMail': 'spieler2@email.de'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.addMember(self.club, self.team).not_members, ['spieler2@email.de'])
+        self.assertFalse(self.team.members.filter(member=self.users[2]).exists())
@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from clubs.tests.test_views import createTestClub, logTestClientIn
+from members.models import Membership, MemberState
+from teams.matrix import TeamMatrix, parse_cells
+from teams.tests.test_views import createTestTeam
+
+
+class TestTeamMatrix(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        cache.clear()
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        self.client = Client()
+        self.club = createTestClub()
+        self.otherClub = createTestClub(clubname='andererVerein')
+        logTestClientIn(self.client)
+        self.own = Membership.addMember(self.club, self.client.user) # Nachname 'Nachname'
+        self.players = [
+            Membership.objects.create(club=self.club, memberState_id=1, first_name='Spieler', last_name='Person%d' % i) for i in range(3)
+        ]
+        self.teamA = createTestTeam(self.club, teamName='A', members=[self.players[0], self.players[1]])
+        self.teamB = createTestTeam(self.club, teamName='B', members=[self.players[1]])
+        self.foreignTeam = createTestTeam(self.otherClub, teamName='Fremd')
+        self.matrix_url = reverse('teamMatrix', kwargs={'club': self.club.pk})
+
+    def test_load(self):
+        """
+            Testinhalt:
+            Mannschaften, Mitgliedschaften und Zuordnungen sollten mit je einer Abfrage geladen werden,
+            die Mannschaften eines Mitglieds als Bitmaske.
+        """
+        with self.assertNumQueries(4): # Mannschaften, Anzahl für die Seiten, Mitgliedschaften, Zwischentabelle
+            matrix = TeamMatrix(self.club).load()
+            masks = {row.membership.pk: row.mask for row in matrix.rows}
+        self.assertEqual([team.teamName for team in matrix.teams], ['A', 'B'])
+        self.assertEqual(masks, {self.own.pk: 0, self.players[0].pk: 0b01, self.players[1].pk: 0b11, self.players[2].pk: 0})
+        self.assertEqual(matrix.rows[2].cells, [(self.teamA, True), (self.teamB, True)])
+
+    def test_save_diff(self):
+        """
+            Testinhalt:
+            Nur geänderte Zellen sollten geschrieben werden, Mitgliedschaften und Mannschaften
+            anderer Vereine sollten ignoriert werden.
+        """
+        foreign = Membership.objects.create(club=self.otherClub, memberState_id=1, last_name='Fremd')
+        numbers = [player.pk for player in self.players] + [foreign.pk]
+        cells = [
+            (self.players[0].pk, self.teamA.pk), # unverändert
+            (self.players[1].pk, self.teamA.pk), # aus B entfernt
+            (self.players[2].pk, self.teamB.pk), # neu
+            (self.players[2].pk, self.foreignTeam.pk),
+            (foreign.pk, self.teamA.pk),
+        ]
+        matrix = TeamMatrix(self.club)
+        # Mitgliedschaften, SAVEPOINT, Zwischentabelle, INSERT, DELETE, RELEASE SAVEPOINT
+        with self.assertNumQueries(6):
+            self.assertEqual(matrix.save(numbers, cells), (1, 1))
+
+        self.assertEqual(set(self.teamA.members.all()), {self.players[0], self.players[1]})
+        self.assertEqual(set(self.teamB.members.all()), {self.players[2]})
+        self.assertFalse(self.foreignTeam.members.exists())
+
+    def test_view(self):
+        """
+            Testinhalt:
+            Die Übersicht sollte die Zuordnungen anzeigen und mit POST die Checkboxen der Seite übernehmen.
+        """
+        response = self.client.get(self.matrix_url)
+        self.assertContains(response, 'id="matrix_cell_%d_%d" checked' % (self.players[1].pk, self.teamB.pk))
+        self.assertContains(response, 'id="matrix_cell_%d_%d">' % (self.players[2].pk, self.teamA.pk))
+
+        self.client.post(self.matrix_url, {
+            'members': [self.players[1].pk, self.players[2].pk],
+            'cells': ['%d-%d' % (self.players[2].pk, self.teamA.pk), 'ungültig'],
+            'page': '1',
+        })
+        self.assertEqual(set(self.teamA.members.all()), {self.players[0], self.players[2]})
+        self.assertFalse(self.teamB.members.exists())
+        self.assertContains(self.client.get(self.matrix_url), 'id="matrix_cell_%d_%d" checked' % (self.players[2].pk, self.teamA.pk))
+
+    def test_parse_cells(self):
+        """
+            Testinhalt:
+            Ungültige Werte der Checkboxen sollten ignoriert werden.
+        """
+        self.assertEqual(parse_cells(['1-2', '3-', 'a-4', '5-6-7', '8-9']), [(1, 2), (8, 9)])
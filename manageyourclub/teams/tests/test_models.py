@@ -0,0 +1,117 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from clubs.tests.test_views import createTestClub
+from teams.forms import TeamForm
+from teams.models import SportModel, TeamModel, sports
+from teams.tests.test_views import createTestTeam
+
+
+class TestSportCatalogue(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        sports.clear()
+        self.club = createTestClub()
+
+    def tearDown(self):
+        sports.clear()
+
+    def test_intern_normalized(self):
+        """
+            Testinhalt:
+            Namen, die sich nur in Leerzeichen oder Groß- und Kleinschreibung unterscheiden,
+            sollten dieselbe Sportart ergeben. Der erste Name bleibt erhalten.
+        """
+        sport = sports.intern('  Beach   Volleyball ')
+        self.assertEqual(sport.sportName, 'Beach Volleyball')
+        self.assertEqual(sports.intern('BEACH VOLLEYBALL'), sport)
+        self.assertEqual(SportModel.objects.count(), 1)
+
+    def test_intern_cached(self):
+        """
+            Testinhalt:
+            Nach dem Commit sollte eine bekannte Sportart ohne Datenbankabfrage aufgelöst werden
+            und eine Mannschaft mit einer Prüfung der gesperrten Sportart und einem einzigen INSERT angelegt werden.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            sport = sports.intern('Fußball')
+        with self.assertNumQueries(0):
+            self.assertEqual(sports.intern('fußball'), sport)
+
+        form = TeamForm({'teamName': 'Erste', 'sportName': 'Fußball'})
+        self.assertTrue(form.is_valid())
+        form.SetInstanceID(None)
+        with self.assertNumQueries(4): # SAVEPOINT, SELECT ... FOR UPDATE, INSERT, RELEASE SAVEPOINT
+            team = form.save(self.club)
+        self.assertEqual(team.sportId, sport)
+
+    def test_save_with_deleted_sport(self):
+        """
+            Testinhalt:
+            Wurde eine zwischengespeicherte Sportart von einem anderen Prozess (ohne Signal) gelöscht,
+            sollte save_with_sport auch innerhalb einer äußeren Transaktion eine bestehende Sportart übergeben.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            sport = sports.intern('Handball')
+        SportModel.objects.filter(pk=sport.pk)._raw_delete(SportModel.objects.db)
+
+        saved = sports.save_with_sport(lambda newSport: newSport, 'Handball')
+
+        self.assertNotEqual(saved.pk, sport.pk)
+        self.assertTrue(SportModel.objects.filter(pk=saved.pk).exists())
+
+    def test_renamed_sport_forgotten(self):
+        """
+            Testinhalt:
+            Eine geänderte Sportart sollte aus dem Zwischenspeicher entfernt werden.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            sport = sports.intern('Handball')
+        sport.sportName = 'Hallenhandball'
+        sport.save()
+        self.assertEqual(sports.intern('Handball').sportName, 'Handball')
+        self.assertEqual(SportModel.objects.count(), 2)
+
+    def test_collect_unused_sports(self):
+        """
+            Testinhalt:
+            Nur Sportarten ohne Mannschaft sollten gelöscht werden, auch nicht beim Löschen oder Ändern einer Mannschaft.
+        """
+        team = createTestTeam(self.club, sportname='Genutzt')
+        form = TeamForm({'teamName': team.teamName, 'sportName': 'Neu'})
+        self.assertTrue(form.is_valid())
+        form.SetInstanceID(team.pk)
+        form.save(self.club)
+        self.assertTrue(SportModel.objects.filter(sportName='Genutzt').exists())
+
+        out = StringIO()
+        call_command('collect_unused_sports', stdout=out)
+        self.assertIn('0 Sportarten zusammengeführt, 1 Sportarten gelöscht.', out.getvalue())
+        self.assertEqual(list(SportModel.objects.values_list('sportName', flat=True)), ['Neu'])
+        self.assertEqual(TeamModel.objects.get(pk=team.pk).sportId.sportName, 'Neu')
+
+    def test_collect_unused_sports_merges_duplicates(self):
+        """
+            Testinhalt:
+            Alte Sportarten ohne key sollten ihn erhalten, doppelte Sportarten sollten zusammengeführt werden,
+            ohne dass dabei Mannschaften gelöscht werden.
+        """
+        kept = createTestTeam(self.club, teamName='Erste', sportname='Fußball').sportId
+        duplicateTeam = createTestTeam(self.club, teamName='Zweite', sportname='Tennis')
+        legacy = createTestTeam(self.club, teamName='Dritte', sportname='Handball').sportId
+        # wie vor der Einführung von key angelegt
+        SportModel.objects.filter(pk=duplicateTeam.sportId.pk).update(sportName=' FUßBALL ', key=None)
+        SportModel.objects.filter(pk=legacy.pk).update(sportName='Handball  ', key=None)
+
+        out = StringIO()
+        call_command('collect_unused_sports', stdout=out)
+
+        self.assertIn('1 Sportarten zusammengeführt, 0 Sportarten gelöscht.', out.getvalue())
+        self.assertEqual(TeamModel.objects.count(), 3)
+        self.assertEqual(TeamModel.objects.get(pk=duplicateTeam.pk).sportId, kept)
+        self.assertEqual(SportModel.objects.get(pk=legacy.pk).key, 'handball')
+        self.assertEqual(SportModel.objects.get(pk=legacy.pk).sportName, 'Handball')
+        self.assertEqual(SportModel.objects.count(), 2)
@@ -1,9 +1,12 @@
 # Author: Tobias
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from clubs.tests.test_views import logTestClientIn, createTestClub
 from teams.models import SportModel, TeamModel
-from members.models import Membership
+from members.models import Membership, MemberState
 
 def createTestTeam(club, members=None, teamName='Tester', sportname='Testing'):
     "Erstellt eine Mannschaft für den angegebenen Verein"
@@ -151,5 +154,72 @@ class TestViews(TestCase):
         self.assertTrue(self.team)
         
     
-    # FIXME fehlt noch: addTeamMember_POST  
-        
\ No newline at end of file
+    # FIXME fehlt noch: addTeamMember_POST
+
+
+class TestShowAllTeams(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        cache.clear()
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        self.client = Client()
+        self.club = createTestClub()
+        logTestClientIn(self.client)
+        Membership.addMember(self.club, self.client.user)
+        self.showAllTeams_url = reverse('showAllTeams', kwargs={'club':self.club.pk})
+
+    def createTeams(self, count):
+        "Erstellt count Mannschaften mit je zwei Mitgliedern ohne Benutzerkonto."
+        for i in range(count):
+            team = createTestTeam(self.club, teamName='Team %03d' % i)
+            team.members.add(*(
+                Membership.objects.create(club=self.club, memberState_id=1, first_name='Spieler', last_name='%03d-%d' % (i, j))
+                for j in range(2)
+            ))
+
+    def test_overview_query_budget(self):
+        """
+            Testinhalt:
+            Mannschaften mit Anzahl der Mitglieder und Sportart sollten mit einer Abfrage,
+            mit Mitgliedern mit zwei Abfragen geladen werden, unabhängig von der Anzahl der Mannschaften.
+        """
+        for count in (3, 30):
+            TeamModel.objects.all().delete()
+            self.createTeams(count)
+            with self.assertNumQueries(1):
+                teams = list(TeamModel.objects.filter(clubId=self.club).overview())
+                self.assertEqual([(team.memberCount, team.sportName) for team in teams], [(2, 'Testing')] * count)
+            with self.assertNumQueries(2):
+                teams = list(TeamModel.objects.filter(clubId=self.club).overview(with_rosters=True))
+                self.assertEqual([membership.last_name for membership in teams[0].members.all()], ['000-0', '000-1'])
+
+    def test_view_query_count(self):
+        """
+            Testinhalt:
+            Die Mannschaftsübersicht mit Mitgliedern sollte für 3 und 30 Mannschaften gleich viele Abfragen brauchen.
+        """
+        self.createTeams(3)
+        # Zwischenspeicher der Navigation füllen, die Übersicht mit Mitgliedern (anderer Eintrag) nicht
+        self.client.get(self.showAllTeams_url)
+        with CaptureQueriesContext(connection) as few:
+            response = self.client.get(self.showAllTeams_url, {'rosters': '1'})
+        self.assertContains(response, 'Spieler 002-1')
+
+        self.createTeams(30)
+        self.client.get(self.showAllTeams_url)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.showAllTeams_url, {'rosters': '1'})
+        self.assertEqual(len(few), len(many))
+        self.assertContains(response, 'id="teammembers_33"')
+
+    def test_roster_change_visible(self):
+        """
+            Testinhalt:
+            Nach dem Hinzufügen eines Mitglieds sollte die zwischengespeicherte Übersicht neu gerendert werden.
+        """
+        self.createTeams(1)
+        self.assertRegex(self.client.get(self.showAllTeams_url).content.decode(), r'id="teammembers_1">\s*2\s')
+        team = TeamModel.objects.get()
+        team.members.add(Membership.objects.create(club=self.club, memberState_id=1, last_name='Neu'))
+        self.assertRegex(self.client.get(self.showAllTeams_url).content.decode(), r'id="teammembers_1">\s*3\s')
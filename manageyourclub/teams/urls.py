@@ -1,5 +1,5 @@
 from django.urls import path
-from teams.views import addTeamView, showTeamView, showAllTeams, deleteTeamView, addTeamMemberView
+from teams.views import addTeamView, showTeamView, showAllTeams, deleteTeamView, addTeamMemberView, teamMatrixView
 
 # Tutorial genutzt: https://dev-yakuza.posstree.com/en/django/form/
 
@@ -9,5 +9,6 @@ urlpatterns = [
     path('<int:club>/<int:team>/addTeamMember/', addTeamMemberView, name='addTeamMember'),
     path('<int:club>/<int:team>/editTeam/', addTeamView, name='editTeam'),
     path('<int:club>/showAllTeams/', showAllTeams, name='showAllTeams'),
+    path('<int:club>/matrix/', teamMatrixView, name='teamMatrix'),
     path('<int:team>/delete/', deleteTeamView, name='deleteTeam'),
 ]
@@ -1,6 +1,9 @@
+from django.contrib import messages
 from django.shortcuts import render, redirect
+from members.models import club_has_member
+from teams.matrix import TeamMatrix, parse_cells
 from teams.models import TeamModel
-from teams.forms import TeamForm, AddTeamMemberForm
+from teams.forms import TeamForm, AddTeamMemberForm, AddTeamMembersForm
 from clubs.models import ClubModel
 
 
@@ -85,11 +88,15 @@ def showAllTeams(request, club):
 
     club = ClubModel.objects.get(pk=club)
 
-    teams = TeamModel.objects.filter(clubId=club)
+    # mit ?rosters=1 werden die Mitglieder jeder Mannschaft angezeigt
+    rosters = request.GET.get('rosters') == '1'
+    # wird erst im Template innerhalb von {% clubcache %} ausgewertet, immer mit gleich vielen Abfragen
+    teams = TeamModel.objects.filter(clubId=club).overview(with_rosters=rosters)
 
     context = {
         'teams': teams,
         'club': club,
+        'rosters': rosters,
     }
 
     return render(request, 'showAllTeams.html', context)
@@ -102,10 +109,8 @@ def deleteTeamView(request, team):
     team = TeamModel.objects.get(pk=team)
 
     if request.method == 'POST':
-        sport = team.sportId    
+        # nicht mehr genutzte Sportarten werden von collect_unused_sports aufgeräumt
         team.delete()
-        if not TeamModel.objects.filter(sportId=sport).exists():
-            sport.delete()
 
         return redirect('/?Mannschaft_wurde_gelöscht:_'+str(team))
 
@@ -119,18 +124,29 @@ def addTeamMemberView(request, team, club):
     club = ClubModel.objects.get(pk=club)
     team = TeamModel.objects.get(pk=team)
 
-    teamMembers = team.members.all()  
     form = AddTeamMemberForm()
+    bulkForm = AddTeamMembersForm()
+    report = None
 
     #Übergabe der Daten per JSON Format
     if request.method == 'POST': 
-        form = AddTeamMemberForm(request.POST)
-
-        if form.is_valid():
-            form.addMember(club, team)
+        # mit dem Feld entries werden mehrere Mitglieder auf einmal hinzugefügt, siehe teams/roster.py
+        if 'entries' in request.POST:
+            bulkForm = AddTeamMembersForm(request.POST)
+            if bulkForm.is_valid():
+                report = bulkForm.addMembers(club, team)
+        else:
+            form = AddTeamMemberForm(request.POST)
+            if form.is_valid():
+                report = form.addMember(club, team)
+
+    # erst nach dem Hinzufügen abfragen, damit die neuen Mitglieder angezeigt werden
+    teamMembers = team.members.select_related('member')
 
     context = {
         'form': form,
+        'bulkForm': bulkForm,
+        'report': report,
         'team': team,
         'club': club,
         'teamMembers': teamMembers,
@@ -140,3 +156,28 @@ def addTeamMemberView(request, team, club):
     return render(request, 'teamMemberHandling/addTeamMember.html', context)
 
 
+def teamMatrixView(request, club):
+    """
+    Übersicht, welche Mitglieder in welchen Mannschaften spielen, seitenweise (GET-Parameter page).
+    Mit POST werden die Checkboxen der angezeigten Seite übernommen, siehe teams/matrix.py.
+    """
+    if not request.user.is_authenticated:
+        return redirect('login')
+
+    club = ClubModel.objects.get(pk=club)
+    if not club_has_member(club, request.user):
+        return redirect('home')
+
+    if request.method == 'POST':
+        # members enthält die Mitgliedschaften der angezeigten Seite, cells die ausgewählten Zellen
+        numbers = [int(number) for number in request.POST.getlist('members') if number.isdigit()]
+        added, removed = TeamMatrix(club).save(numbers, parse_cells(request.POST.getlist('cells')))
+        messages.success(request, '%d Zuordnungen hinzugefügt, %d entfernt.' % (added, removed))
+        page = request.POST.get('page', '')
+        return redirect('%s?page=%s' % (request.path, page if page.isdigit() else 1))
+
+    context = {
+        'club': club,
+        'matrix': TeamMatrix(club).load(request.GET.get('page')),
+    }
+    return render(request, 'teamMatrix.html', context)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     name = 'users'
+
+    def ready(self):
+        # registriert die Prüfung auf doppelte Vorlagennamen (manageyourclub.W001)
+        import manageyourclub.template_loading
@@ -0,0 +1,50 @@
+# Authentifizierungs-Backend, das den Benutzer einer Sitzung (request.user) aus dem Cache lädt.
+# Ohne Zwischenspeicher fragt Django bei jeder Anfrage eines eingeloggten Benutzers CustomUser ab.
+# Der Eintrag hängt an der Version des Benutzers (manageyourclub/versions.py), die bei jedem Speichern oder
+# Löschen des Benutzers erhöht wird, also auch, wenn sich das Passwort oder is_active ändert. Django vergleicht
+# den Passwort-Hash der Sitzung mit dem geladenen Benutzer, nach einer Passwortänderung endet die Sitzung deshalb sofort.
+# QuerySet.update() und Massenaktionen im Admin-Bereich lösen keine Signale aus. Deshalb werden Passwort und
+# is_active spätestens nach USER_RECHECK_INTERVAL Sekunden mit der Datenbank verglichen.
+# Das Backend setzt einen gemeinsamen Cache voraus (CACHE_PROFILE = 'shared', Prüfung manageyourclub.E002).
+import time
+
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from manageyourclub.versions import user_key, versions
+
+USER_CACHE_TIMEOUT = 60 * 60
+USER_RECHECK_INTERVAL = 60
+
+
+def _cache_key(user_id):
+    return 'auth_user_%s' % user_id
+
+
+class CachedModelBackend(ModelBackend):
+    "ModelBackend, dessen get_user den Benutzer bis zur nächsten Änderung aus dem Cache liefert."
+
+    def get_user(self, user_id):
+        key = _cache_key(user_id)
+        version = versions([user_key(user_id)])[user_key(user_id)]
+        entry = cache.get(key)
+        if entry is not None and entry['version'] == version and self._still_valid(entry):
+            user = entry['user']
+        else:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, {'version': version, 'user': user, 'checked': time.time()}, USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+    def _still_valid(self, entry):
+        "Vergleicht Passwort und is_active des Eintrags höchstens alle USER_RECHECK_INTERVAL Sekunden mit der Datenbank."
+        if time.time() - entry['checked'] < USER_RECHECK_INTERVAL:
+            return True
+        user = entry['user']
+        current = type(user)._default_manager.filter(pk=user.pk).values_list('password', 'is_active').first()
+        if current != (user.password, user.is_active):
+            return False
+        entry['checked'] = time.time()
+        cache.set(_cache_key(user.pk), entry, USER_CACHE_TIMEOUT)
+        return True
@@ -1,6 +1,7 @@
 from django.contrib.auth.forms import UserCreationForm, PasswordChangeForm, UserChangeForm
 from django import forms
-from users.models import CustomUser, Gender
+from users.models import CustomUser, Gender, genders
+from manageyourclub.lookups import CachedModelChoiceField
 from clubs.models import PlaceModel
 
 class EditProfileForm(UserChangeForm):
@@ -41,7 +42,7 @@ class CreateCustomUserForm(UserCreationForm):
     Vorname = forms.CharField(widget=forms.TextInput(attrs={'class':'form-control','type':'text'}))
     Nachname = forms.CharField(widget=forms.TextInput(attrs={'class':'form-control','type':'text'}))
     Geburtstag = forms.CharField(label='Geburtstag (yyyy-mm-dd)', widget=forms.TextInput(attrs={'class':'form-control','type':'text'}))
-    Geschlecht = forms.ModelChoiceField(label='Geschlecht', queryset=Gender.objects.all())
+    Geschlecht = CachedModelChoiceField(label='Geschlecht', cache=genders)
     Postleitzahl = forms.CharField(widget=forms.TextInput(attrs={'class':'form-control','type':'number'}))
     Ort = forms.CharField(widget=forms.TextInput(attrs={'class':'form-control','type':'text'}))
     Straße = forms.CharField(widget=forms.TextInput(attrs={'class':'form-control','type':'text'}))
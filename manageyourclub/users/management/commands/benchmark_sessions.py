@@ -0,0 +1,92 @@
+# Zählt die Datenbankabfragen pro Anfrage für jeden Speicherort der Sitzungen (SESSION_ENGINES in settings.py)
+# mit ModelBackend und mit CachedModelBackend (users/backends.py):
+#   python manage.py benchmark_sessions --repeat 20
+# Gemessen werden die Benachrichtigungen, die Mitgliederübersicht und ein Formular mit Meldung und Weiterleitung.
+# Die Testdaten werden am Ende zurückgerollt.
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from clubs.models import ClubModel, addresses
+from members.models import Membership, MemberState
+from users.models import CustomUser, Gender
+
+BACKENDS = ('django.contrib.auth.backends.ModelBackend', 'users.backends.CachedModelBackend')
+
+
+class Rollback(Exception):
+    "Wird ausgelöst, um die Testdaten am Ende zurückzurollen."
+
+
+class Command(BaseCommand):
+    help = 'Gibt die Datenbankabfragen pro Anfrage für jeden Speicherort der Sitzungen aus.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Wiederholungen jeder Anfrage.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                club, user = self.seed()
+                self.benchmark(club, user, options['repeat'])
+                raise Rollback()
+        except Rollback:
+            addresses.clear() # zurückgerollte Adressen dürfen nicht im Zwischenspeicher bleiben
+            self.stdout.write('Testdaten wurden zurückgerollt.')
+
+    def seed(self):
+        "Legt einen Verein mit einem Mitglied an."
+        for stateID, state in ((0, 'Anfrage'), (1, 'aktiv')):
+            MemberState.objects.get_or_create(stateID=stateID, defaults={'state': state})
+        gender = Gender.objects.get_or_create(gender='divers')[0]
+        address = addresses.intern('Benchmarkstraße', '1', 12345, 'Benchmarkstadt')
+        prefix = 'benchmark%d' % int(time.time())
+        club = ClubModel.objects.create(clubname=prefix[:30], yearOfFoundation=1900, address=address)
+        user = CustomUser.objects.create(email='%s@example.com' % prefix, Vorname='Vorname', Nachname='Nachname',
+                                         Geburtstag=date(1990, 1, 1), Geschlecht=gender, Adresse=address, password='!')
+        Membership.objects.create(club=club, member=user, memberState_id=1)
+        return club, user
+
+    def steps(self, club):
+        "Die gemessenen Anfragen: (Name, Funktion mit dem Client als Argument)."
+        members = reverse('club_members', kwargs={'club': club.pk})
+        return (
+            ('Benachrichtigungen', lambda client: client.get(reverse('home', kwargs={'club': club.pk}))),
+            ('Mitgliederübersicht', lambda client: client.get(members)),
+            # Meldung über messages, Weiterleitung und Anzeige der Meldung auf der Folgeseite
+            ('Meldung und Weiterleitung', lambda client: client.post(members, {'eMail': 'unbekannt@example.com'}, follow=True)),
+        )
+
+    def measure(self, client, step, repeat):
+        "Gibt die durchschnittliche Anzahl der Abfragen (insgesamt, Sitzung, Benutzer) und die Dauer in ms zurück."
+        total = session = user = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                step(client)
+            total += len(queries)
+            session += len([query for query in queries if 'django_session' in query['sql']])
+            user += len([query for query in queries if 'WHERE "users_customuser"."id" =' in query['sql']]) # request.user
+        duration = (time.perf_counter() - start) / repeat * 1000
+        return total / repeat, session / repeat, user / repeat, duration
+
+    def benchmark(self, club, user, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING('%-15s %-22s %-28s %9s %9s %9s %10s' % (
+            'Sitzungen', 'Backend', 'Anfrage', 'Abfragen', 'Sitzung', 'Benutzer', 'Dauer')))
+        hosts = list(settings.ALLOWED_HOSTS) + ['testserver']
+        for profile, engine in settings.SESSION_ENGINES.items():
+            for backend in BACKENDS:
+                with override_settings(SESSION_ENGINE=engine, AUTHENTICATION_BACKENDS=[backend], ALLOWED_HOSTS=hosts):
+                    client = Client()
+                    client.force_login(user, backend=backend)
+                    for name, step in self.steps(club):
+                        step(client) # Zwischenspeicher füllen
+                        total, session, users, duration = self.measure(client, step, repeat)
+                        self.stdout.write('%-15s %-22s %-28s %9.1f %9.1f %9.1f %7.2f ms' % (
+                            profile, backend.rsplit('.', 1)[-1], name, total, session, users, duration))
@@ -0,0 +1,149 @@
+# Misst die Renderzeit der wichtigsten Seiten mit einem realistischen Datenbestand:
+#   python manage.py benchmark_templates --members 2000 --requests 200 --fields 30
+# Jede Seite wird mit und ohne cached loader (TEMPLATE_PROFILE = 'production') gerendert,
+# jeweils mit leerem Cache (Navigation und Fragmente werden neu berechnet) und mit gefülltem Cache.
+# Die Testdaten werden am Ende zurückgerollt, außer --keep wird angegeben.
+import time
+from datetime import date
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import engines
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from clubs.models import ClubModel, addresses
+from manageyourclub.template_loading import warm_templates
+from members.models import ClubMembershipSummary, Membership, MemberState
+from members.views import clubMembersView
+from membership_request.models import FieldsListModel
+from membership_request.views import RequestMembershipView
+from users.models import CustomUser, Gender
+from users.views import home_view
+
+LOADERS = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']
+CACHED_LOADERS = [('django.template.loaders.cached.Loader', LOADERS)]
+
+# (Vorlage, View, Name der URL, Benutzer der Seite)
+PAGES = (
+    ('home.html', home_view, 'home', 'member'),
+    ('club_members.html', clubMembersView, 'club_members', 'member'),
+    ('custom_membership_Form.html', RequestMembershipView, 'RequestMembershipView', 'applicant'),
+)
+
+# Feldtypen des Antragsformulars, die der Reihe nach vergeben werden: (field_type, value)
+FIELD_TYPES = (
+    ('CustomCharField', ''),
+    ('CustomEmailField', ''),
+    ('CustomSelectBoxField', 'Ja;Nein;Vielleicht'),
+    ('CustomRadioBoxField', 'Anfänger;Fortgeschritten;Profi'),
+    ('CustomMultiChoiceField', 'Montag;Dienstag;Mittwoch;Donnerstag;Freitag'),
+)
+
+
+class Rollback(Exception):
+    "Wird ausgelöst, um die Testdaten am Ende zurückzurollen."
+
+
+class Command(BaseCommand):
+    help = 'Legt Testdaten an und gibt die Renderzeiten von home.html, club_members.html und custom_membership_Form.html aus.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=2000, help='Mitglieder des Vereins.')
+        parser.add_argument('--requests', type=int, default=200, help='Offene Beitrittsanfragen des Vereins.')
+        parser.add_argument('--fields', type=int, default=30, help='Felder des Antragsformulars.')
+        parser.add_argument('--repeat', type=int, default=50, help='Wiederholungen pro Seite für die Zeitmessung.')
+        parser.add_argument('--keep', action='store_true', help='Testdaten nicht zurückrollen.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                club, users = self.seed(options)
+                self.benchmark(club, users, options['repeat'])
+                if not options['keep']:
+                    raise Rollback()
+        except Rollback:
+            # zurückgerollte Adressen, Navigation und Fragmente dürfen nicht im Zwischenspeicher bleiben
+            addresses.clear()
+            cache.clear()
+            self.stdout.write('Testdaten wurden zurückgerollt.')
+
+    def seed(self, options):
+        "Legt die Testdaten mit bulk_create an und gibt den Verein und die Benutzer der Seiten zurück."
+        start = time.monotonic()
+        for stateID, state in ((0, 'Anfrage'), (1, 'aktiv'), (2, 'abgelehnt')):
+            MemberState.objects.get_or_create(stateID=stateID, defaults={'state': state})
+        gender = Gender.objects.get_or_create(gender='divers')[0]
+        address = addresses.intern('Benchmarkstraße', '1', 12345, 'Benchmarkstadt')
+
+        prefix = 'benchmark%d' % int(time.time())
+        club = ClubModel.objects.create(clubname=prefix[:30], yearOfFoundation=1900, address=address)
+        CustomUser.objects.bulk_create(
+            (CustomUser(email='%s_%d@example.com' % (prefix, i), Vorname='Vorname', Nachname='Nachname %d' % i,
+                        Geburtstag=date(1990, 1, 1), Geschlecht=gender, Adresse=address, password='!')
+             for i in range(options['requests'] + 2)),
+            batch_size=1000,
+        )
+        # nicht jede Datenbank gibt bei bulk_create die primary keys zurück, deshalb neu laden
+        users = list(CustomUser.objects.filter(email__startswith=prefix).order_by('pk'))
+        member, applicant, requesting = users[0], users[1], users[2:]
+
+        memberships = [Membership(club=club, member=member, memberState_id=1)]
+        memberships += [Membership(club=club, member=user, memberState_id=0) for user in requesting]
+        memberships += [
+            Membership(club=club, memberState_id=1, first_name='Vorname', last_name='Person %d' % i, birthday=date(1990, 1, 1))
+            for i in range(options['members'])
+        ]
+        Membership.objects.bulk_create(memberships, batch_size=1000)
+        ClubMembershipSummary.recount(club.pk)
+
+        FieldsListModel.objects.bulk_create(
+            FieldsListModel(club=club, name='Feld %d' % i, field_type=FIELD_TYPES[i % len(FIELD_TYPES)][0],
+                            value=FIELD_TYPES[i % len(FIELD_TYPES)][1], is_required=i % 2 == 0, ordering=i)
+            for i in range(options['fields'])
+        )
+
+        self.stdout.write('%d Mitglieder, %d Anträge und %d Formularfelder in %.2f s angelegt.' % (
+            options['members'], len(requesting), options['fields'], time.monotonic() - start))
+        return club, {'member': member, 'applicant': applicant}
+
+    def render(self, view, urlName, club, user):
+        path = reverse(urlName, kwargs={'club': club.pk})
+        request = RequestFactory().get(path)
+        request.user = user
+        request.resolver_match = resolve(path)
+        response = view(request, club=club.pk)
+        if response.status_code != 200:
+            raise RuntimeError('%s antwortet mit %d.' % (path, response.status_code))
+        return response
+
+    def measure(self, view, urlName, club, user, repeat, clearCache):
+        total = 0
+        for _ in range(repeat):
+            if clearCache:
+                cache.clear()
+            start = time.perf_counter()
+            self.render(view, urlName, club, user)
+            total += time.perf_counter() - start
+        return total / repeat * 1000
+
+    def benchmark(self, club, users, repeat):
+        engine = engines['django'].engine
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING('%-30s %-18s %14s %14s' % ('Vorlage', 'Loader', 'Cache leer', 'Cache gefüllt')))
+        try:
+            for loaderName, loaders in (('ohne cached loader', LOADERS), ('cached loader', CACHED_LOADERS)):
+                engine.template_loaders = engine.get_template_loaders(loaders)
+                if loaders is CACHED_LOADERS:
+                    count, duration, errors = warm_templates()
+                    self.stdout.write('%d Vorlagen in %.1f ms vorkompiliert.' % (count, duration * 1000))
+                    for name, error in errors.items():
+                        self.stdout.write(self.style.ERROR('    %s: %s' % (name, error)))
+                for templateName, view, urlName, user in PAGES:
+                    cold = self.measure(view, urlName, club, users[user], repeat, clearCache=True)
+                    warm = self.measure(view, urlName, club, users[user], repeat, clearCache=False)
+                    self.stdout.write('%-30s %-18s %11.2f ms %11.2f ms' % (templateName, loaderName, cold, warm))
+        finally:
+            # wieder die Loader aus den Einstellungen verwenden
+            del engine.template_loaders
@@ -2,7 +2,7 @@ from django.db import models
 
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser
 
-from clubs.models import AddressModel
+from clubs.models import AddressModel, addresses
 
 #Test
 """
@@ -12,6 +12,7 @@ from django.dispatch import receiver
 """
 from django.core.mail import send_mail
 from manageyourclub.settings import EMAIL_HOST_USER
+from manageyourclub.lookups import LookupTableCache
 
 
 
@@ -40,7 +41,7 @@ class CustomUserManager(BaseUserManager):
             raise ValueError("Eine Emailadresse wird zur Accounterstellung benötigt")
 
         Adresse = AddressModel.objects.get(pk=Adresse)
-        Geschlecht = Gender.objects.get(pk=Geschlecht)
+        Geschlecht = genders.get(Geschlecht)
 
         #Erstellung eines CustomUser Objects
         user = self.model(
@@ -92,6 +93,9 @@ class Gender(models.Model): # Author: Tobias
     def __str__(self):
         return self.gender
 
+# Zwischenspeicher für die Geschlechts-Auswahlmöglichkeiten, siehe manageyourclub/lookups.py
+genders = LookupTableCache(Gender)
+
 # Erstellung Customuser
 # Email muss unique sein, damit Login mit mail möglich ist
 class CustomUser(AbstractBaseUser):
@@ -143,13 +147,9 @@ class CustomUser(AbstractBaseUser):
     def editAddress(self, streetAddress, houseNumber, postcode, village): # Author: Tobias
         """
             Überschreibt die Daten des Objektes mit den übergebenen Parametern.
-            Wenn die vorherige Adresse nicht mehr gebraucht wird, wird sie gelöscht.
+            Die vorherige Adresse wird, falls sie nicht mehr gebraucht wird, von collect_orphan_addresses gelöscht.
         """
-        oldAdr = self.Adresse
-        self.saveAddress(streetAddress, houseNumber, postcode, village)
-        if not oldAdr.isUsed():
-            oldAdr.delete()
-        return self
+        return self.saveAddress(streetAddress, houseNumber, postcode, village)
 
     def saveAddress(self, streetAddress, houseNumber, postcode, village): # Author: Tobias
         """
@@ -157,6 +157,9 @@ class CustomUser(AbstractBaseUser):
             Diese Funktion sollte nur Dann benutzt werden, wenn das Objekt noch keine Adresse gespeichert hat.
             Ansonsten sollte editAddress genutzt werden.
         """
-        self.Adresse = AddressModel.get_or_create(streetAddress, houseNumber, postcode, village)
+        return addresses.save_with_address(self._saveAddress, streetAddress, houseNumber, postcode, village)
+
+    def _saveAddress(self, address):
+        self.Adresse = address
         self.save()
         return self
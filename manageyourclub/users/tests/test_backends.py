@@ -0,0 +1,102 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, Client, override_settings
+from django.urls import reverse
+from clubs.tests.test_views import createTestUser
+from manageyourclub.versions import check_shared_cache
+from users.backends import USER_RECHECK_INTERVAL, CachedModelBackend
+from users.models import CustomUser
+
+class TestCachedModelBackend(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        cache.clear()
+        self.backend = CachedModelBackend()
+        self.user = createTestUser()
+
+    def test_cached(self):
+        """
+            Testinhalt:
+            Nach dem ersten Zugriff sollte der Benutzer ohne Datenbankabfrage geladen werden.
+        """
+        self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk).email, self.user.email)
+
+    def test_invalidated(self):
+        """
+            Testinhalt:
+            Änderungen am Passwort und an is_active sollten sofort wirken.
+        """
+        self.backend.get_user(self.user.pk)
+        self.user.set_password('neuesPasswort123')
+        self.user.save()
+        self.assertEqual(self.backend.get_user(self.user.pk).password, self.user.password)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_update_without_signal(self):
+        """
+            Testinhalt:
+            Änderungen mit QuerySet.update() lösen kein Signal aus und sollten nach USER_RECHECK_INTERVAL wirken,
+            bis dahin sollte der Benutzer nur einmal pro Intervall mit der Datenbank verglichen werden.
+        """
+        self.backend.get_user(self.user.pk)
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNotNone(self.backend.get_user(self.user.pk))
+
+        with mock.patch('users.backends.time.time', return_value=time.time() + USER_RECHECK_INTERVAL + 1):
+            self.assertIsNone(self.backend.get_user(self.user.pk))
+
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=True)
+        with mock.patch('users.backends.time.time', return_value=time.time() + 3 * USER_RECHECK_INTERVAL):
+            self.backend.get_user(self.user.pk)
+            with self.assertNumQueries(0):
+                self.assertIsNotNone(self.backend.get_user(self.user.pk))
+
+    def test_session_ends_after_password_change(self):
+        """
+            Testinhalt:
+            Nach einer Passwortänderung an anderer Stelle sollte die Sitzung nicht mehr gültig sein.
+        """
+        client = Client()
+        client.force_login(self.user)
+        self.assertTrue(client.get(reverse('userData')).context['user'].is_authenticated)
+
+        self.user.set_password('neuesPasswort123')
+        self.user.save()
+        self.assertRedirects(client.get(reverse('userData')), reverse('login'), fetch_redirect_response=False)
+
+
+class TestSharedCacheCheck(SimpleTestCase):
+
+    @override_settings(AUTHENTICATION_BACKENDS=['users.backends.CachedModelBackend'])
+    def test_cached_backend_needs_shared_cache(self):
+        """
+            Testinhalt:
+            CachedModelBackend mit LocMemCache sollte als Fehler gemeldet werden, mit gemeinsamem Cache nicht.
+        """
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['manageyourclub.E002'])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache', 'LOCATION': '127.0.0.1:11211'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(SERVER_PROCESSES=4)
+    def test_processes_need_shared_cache(self):
+        """
+            Testinhalt:
+            Mehrere Server-Prozesse mit LocMemCache sollten als Fehler gemeldet werden.
+        """
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['manageyourclub.E001'])
+
+    def test_model_backend(self):
+        """
+            Testinhalt:
+            Mit ModelBackend (Standard ohne gemeinsamen Cache) sollte kein Fehler gemeldet werden.
+        """
+        self.assertEqual(check_shared_cache(None), [])
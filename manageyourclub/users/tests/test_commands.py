@@ -0,0 +1,41 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from members.models import Membership
+
+class TestBenchmarkTemplates(TestCase):
+
+    def test_benchmark(self):
+        """
+            Testinhalt:
+            Alle drei Seiten sollten mit beiden Loadern gerendert und die Testdaten danach entfernt werden.
+        """
+        out = StringIO()
+        call_command('benchmark_templates', members=30, requests=25, fields=5, repeat=1, stdout=out)
+
+        for templateName in ('home.html', 'club_members.html', 'custom_membership_Form.html'):
+            self.assertIn(templateName + ' ', out.getvalue())
+        self.assertIn('cached loader', out.getvalue())
+        self.assertIn('Vorlagen in', out.getvalue())
+        self.assertFalse(Membership.objects.exists())
+
+class TestBenchmarkSessions(TestCase):
+
+    def test_benchmark(self):
+        """
+            Testinhalt:
+            Für jeden Speicherort der Sitzungen sollten die Abfragen gezählt werden.
+            Mit Sitzungen im Cookie und CachedModelBackend sollten weder Sitzung noch Benutzer abgefragt werden.
+        """
+        out = StringIO()
+        call_command('benchmark_sessions', repeat=2, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        for profile in ('db', 'cached_db', 'cache', 'signed_cookie'):
+            self.assertTrue([line for line in lines if line.startswith(profile + ' ')])
+        cookieLines = [line.split() for line in lines if line.startswith('signed_cookie') and 'CachedModelBackend' in line]
+        self.assertEqual(len(cookieLines), 3)
+        for columns in cookieLines:
+            self.assertEqual(columns[-4:-2], ['0.0', '0.0']) # Abfragen für Sitzung und request.user
+        self.assertFalse(Membership.objects.exists())
@@ -146,7 +146,7 @@ class TestForms(TestCase):
         self.assertEqual(user.Geschlecht, Gender.objects.get(pk=data['Geschlecht']))
         self.assertEqual(user.Adresse.streetAddress, data['Straße'])
         self.assertEqual(user.Adresse.houseNumber, data['Hausnummer'])
-        self.assertEqual(user.Adresse.postcode.postcode, data['Postleitzahl'])
+        self.assertEqual(str(user.Adresse.postcode.postcode), data['Postleitzahl'])
         self.assertEqual(user.Adresse.postcode.village, data['Ort'])
 
     def test_EditProfileForm_valid_data(self):
@@ -1,11 +1,18 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.shortcuts import render, redirect
 from users.models import CustomUser, Gender
 from clubs.models import AddressModel, PlaceModel, ClubModel
 from clubs.tests.test_views import createTestUser, logTestClientIn,createTestClub
 from teams.tests.test_views import createTestTeam
-from members.models import Membership
+from members.models import ClubMembershipSummary, Membership, MemberState
+from users.views import REQUESTS_PER_PAGE
+from manageyourclub.navigation import NAVIGATION_TIMEOUT, clubs_of
+from manageyourclub.versions import LOCAL_CACHE_TIMEOUT, cache_timeout
+from unittest import mock
 
 
 def getUser():
@@ -210,4 +217,121 @@ class TestUsersViews(TestCase):
         "houseNumber":"95b"}, follow = True)
 
         self.assertEquals(response.status_code, 200)
-        self.assertTemplateUsed(response, self.home_template)
\ No newline at end of file
+        self.assertTemplateUsed(response, self.home_template)
+
+class TestHomeView(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        MemberState.objects.get_or_create(stateID=0, state='Anfrage')
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        self.client = Client()
+        logTestClientIn(self.client)
+        self.club = createTestClub()
+        Membership.addMember(self.club, self.client.user)
+
+    def test_requests_paged(self):
+        """
+            Testinhalt:
+            Die Anzahl offener Anträge sollte angezeigt und die Anträge seitenweise geladen werden.
+        """
+        Membership.objects.bulk_create(
+            Membership(club=self.club, memberState_id=0, last_name='Antrag %d' % i) for i in range(25)
+        )
+        ClubMembershipSummary.recount(self.club.pk)
+
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['pendingRequests'], 25)
+        self.assertEqual(len(response.context['membershipRequestNotifications']), REQUESTS_PER_PAGE)
+        self.assertEqual(response.context['pages'], 2)
+
+        response = self.client.get(reverse('home'), {'page': 2})
+        self.assertEqual(len(response.context['membershipRequestNotifications']), 25 - REQUESTS_PER_PAGE)
+
+    def test_no_requests_not_loaded(self):
+        """
+            Testinhalt:
+            Ohne offene Anträge sollten die Anträge gar nicht abgefragt werden.
+        """
+        ClubMembershipSummary.recount(self.club.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['pendingRequests'], 0)
+        self.assertFalse(any('"memberState_id" = 0' in query['sql'] for query in queries))
+
+
+class TestNavigation(TestCase):
+
+    def setUp(self):
+        "Vorbereitung für die Tests"
+        cache.clear()
+        MemberState.objects.get_or_create(stateID=0, state='Anfrage')
+        MemberState.objects.get_or_create(stateID=1, state='aktiv')
+        MemberState.objects.get_or_create(stateID=2, state='abgelehnt')
+        self.client = Client()
+        logTestClientIn(self.client)
+        self.user = self.client.user
+        self.club = createTestClub(clubname='B-Verein')
+        Membership.addMember(self.club, self.user)
+
+    def test_cached(self):
+        """
+            Testinhalt:
+            Nach dem ersten Zugriff sollte die Navigation ohne Datenbankabfrage auskommen.
+        """
+        clubs = clubs_of(self.user)
+        self.assertEqual([club['clubname'] for club in clubs], ['B-Verein'])
+        with self.assertNumQueries(0):
+            self.assertEqual(clubs_of(self.user), clubs)
+
+    def test_invalidated(self):
+        """
+            Testinhalt:
+            Änderungen an Mitgliedschaften, Vereinen und Mannschaften sollten in der Navigation sichtbar werden.
+        """
+        clubs_of(self.user)
+
+        otherClub = createTestClub(clubname='A-Verein')
+        Membership.addMember(otherClub, self.user)
+        self.assertEqual([club['clubname'] for club in clubs_of(self.user)], ['A-Verein', 'B-Verein'])
+
+        self.club.clubname = 'C-Verein'
+        self.club.save()
+        self.assertEqual([club['clubname'] for club in clubs_of(self.user)], ['A-Verein', 'C-Verein'])
+
+        createTestTeam(self.club)
+        Membership.objects.create(club=self.club, memberState_id=0, last_name='Antrag')
+        ClubMembershipSummary.recount(self.club.pk)
+        club = clubs_of(self.user)[1]
+        self.assertEqual((club['teams'], club['pendingRequests']), (1, 1))
+
+        Membership.reviewRequests(self.club, [Membership.objects.get(last_name='Antrag').number], accept=False)
+        self.assertEqual(clubs_of(self.user)[1]['pendingRequests'], 0)
+
+        Membership.objects.filter(club=otherClub).delete()
+        self.assertEqual([club['clubname'] for club in clubs_of(self.user)], ['C-Verein'])
+
+    def test_timeout(self):
+        """
+            Testinhalt:
+            Ohne gemeinsamen Cache sollte die Navigation nur LOCAL_CACHE_TIMEOUT Sekunden zwischengespeichert werden,
+            andere Prozesse erfahren sonst nichts von Änderungen.
+        """
+        with mock.patch('manageyourclub.navigation.cache', wraps=cache) as navigationCache:
+            clubs_of(self.user)
+        self.assertEqual(navigationCache.set.call_args[0][2], LOCAL_CACHE_TIMEOUT)
+
+        with mock.patch('manageyourclub.versions.shared_cache', return_value=True):
+            self.assertEqual(cache_timeout(NAVIGATION_TIMEOUT), NAVIGATION_TIMEOUT)
+
+    def test_view(self):
+        """
+            Testinhalt:
+            Die Seiten sollten die Vereine und offenen Anträge aus der Navigation anzeigen.
+        """
+        Membership.objects.create(club=self.club, memberState_id=0, last_name='Antrag')
+        ClubMembershipSummary.recount(self.club.pk)
+        response = self.client.get(reverse('myclub', kwargs={'club': self.club.pk}))
+        self.assertEqual(response.context['navigation'].club['id'], self.club.pk)
+        self.assertContains(response, 'id="navigation_pending_requests">1<')
+        self.assertContains(response, 'id="select_club_1">B-Verein<')
@@ -13,8 +13,9 @@ from django.utils.encoding import force_text
 from django.utils.http import urlsafe_base64_decode
 
 from clubs.models import ClubModel
-from members.models import get_membership, club_has_member
+from members.models import ClubMembershipSummary, get_membership
 from members.models import *
+from notifications.models import MembershipEvent
 from users.tokens import account_activation_token
 from users.forms import CreateCustomUserForm, CustomPasswordChangeForm, EditProfileForm
 from users.models import CustomUser
@@ -113,7 +114,9 @@ class SignUpView(View):
             return redirect('login')
 
         return render(request, self.template_name, {'form': form})
-        
+
+REQUESTS_PER_PAGE = 20
+
 def home_view(request, club=None):
     #alle
     if not request.user.is_authenticated:
@@ -125,20 +128,30 @@ def home_view(request, club=None):
         return redirect('addclub')
 
     club = membership.club # für den Fall das club vorher None war
-    club_list = filter(
-                lambda c: 
-                    club_has_member(c, request.user), 
-                ClubModel.objects.all()
-            )
 
-    membershipRequestNotifications = Membership.objects.filter(club=club,memberState=0)
+    # Die Anzahl der offenen Anträge steht in ClubMembershipSummary,
+    # die Anträge selbst werden nur geladen, wenn es welche gibt, und seitenweise angezeigt
+    pendingRequests = ClubMembershipSummary.pendingRequestsOf(club)
+    pages = max(1, -(-pendingRequests // REQUESTS_PER_PAGE))
+    page = request.GET.get('page', '1')
+    page = min(max(int(page), 1), pages) if page.isdigit() else 1
+
+    membershipRequestNotifications = []
+    if pendingRequests:
+        start = (page - 1) * REQUESTS_PER_PAGE
+        membershipRequestNotifications = Membership.objects.filter(club=club,memberState=0).select_related('member').order_by('number')[start:start + REQUESTS_PER_PAGE]
 
     context = {
         'user':request.user,
-        'club_list': club_list,
         'to': 'home',
         'club':club,
         'membershipRequestNotifications':membershipRequestNotifications,
+        'pendingRequests': pendingRequests,
+        # die Ereignisse darf nur abrufen, wer aktives Mitglied ist (siehe membershipRequestEventsView)
+        'membershipEvents': membership.memberState_id == 1,
+        'lastEventId': MembershipEvent.latestId(club.pk), # ab hier liefert membershipRequestEventsView neue Ereignisse
+        'page': page,
+        'pages': pages,
     }
 
     return render(request, 'home.html', context)